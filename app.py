@@ -1,10 +1,13 @@
 # app.py
+import os
 import time
+import asyncio
 import threading
-from typing import Optional, List, Tuple, Iterable
+from typing import Optional, List, Literal
 
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse, JSONResponse, PlainTextResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -12,16 +15,11 @@ from pydantic import BaseModel
 import requests  # pip install requests
 
 # local package modules (your existing scripts)
-from sdos.db import get_connection
-from sdos.graph import (
-    get_or_build_graph,
-    load_graph_from_cache,
-    load_artist_name_cache,
-    build_artist_name_cache,
-)
-# updated pathfinding import supports excluded edges
-from sdos.pathfinding import bidirectional_bfs_with_tracks
-from sdos.search import search_artists
+from sdos.engine import Engine, STAGE_SECONDS
+from sdos.pathfinding import SearchLimits
+from sdos.loader import FAILED
+from sdos.pathjson import encode_hops, encode_compact, encode_object
+from sdos import metrics
 
 app = FastAPI(title="SDOS — MusicBrainz Collaboration Pathfinder")
 
@@ -36,36 +34,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global in-process caches (protected by lock)
-GRAPH = None
-ARTIST_CACHE = None  # dict: artist_id -> (name, gid)
-GRAPH_LOCK = threading.Lock()
+# The SDOS engine: graph, artist names, result caches and pair pools (configured by SDOS_* env vars)
+ENGINE = Engine.from_env()
 
-# Background loader to populate caches at startup (non-blocking)
-def _background_loader():
-    global GRAPH, ARTIST_CACHE
-    try:
-        # artist cache
-        ARTIST_CACHE = load_artist_name_cache()
-        if ARTIST_CACHE is None:
-            conn = get_connection()
-            try:
-                ARTIST_CACHE = build_artist_name_cache(conn)
-            finally:
-                conn.close()
-
-        # graph cache (load from pickle or build)
-        GRAPH = load_graph_from_cache()
-        if GRAPH is None:
-            # building can be expensive — do it here (background) and save cache
-            GRAPH = get_or_build_graph(conn=get_connection(), force_rebuild=False)
-    except Exception as e:
-        print("Background loader error:", e)
+# Server-side caps for one path search; requests can only ask for less
+PATH_TIMEOUT_SECONDS = float(os.environ.get("SDOS_PATH_TIMEOUT_SECONDS", "10"))
+PATH_MAX_EXPANDED = int(os.environ["SDOS_PATH_MAX_EXPANDED"]) if os.environ.get("SDOS_PATH_MAX_EXPANDED") else None
+# How long a request waits for an in-flight load before answering 503
+LOAD_WAIT_SECONDS = float(os.environ.get("SDOS_LOAD_WAIT_SECONDS", "30"))
+COVER_CACHE_TTL = 7 * 24 * 3600
+
+def _require_graph():
+    """Wait for the single in-flight load; 503 if it is not done in time."""
+    if not ENGINE.load(timeout=LOAD_WAIT_SECONDS):
+        status = ENGINE.loader.status()
+        if status["phase"] == FAILED:
+            # the next load is not started before retry_in_seconds (the loader backs off after failures)
+            detail = "Collaboration graph failed to load."
+            headers = {"Retry-After": str(int(status["retry_in_seconds"] or 0) + 1)}
+        else:
+            detail = "Collaboration graph is still loading."
+            headers = {"Retry-After": str(int(status["eta_seconds"] or 5))}
+        raise HTTPException(status_code=503, detail=detail, headers=headers)
 
 @app.on_event("startup")
 def startup_event():
-    t = threading.Thread(target=_background_loader, daemon=True)
-    t.start()
+    ENGINE.load(wait=False)
+
+@app.on_event("shutdown")
+def shutdown_event():
+    ENGINE.close()
 
 # Models
 class PathRequest(BaseModel):
@@ -74,6 +72,18 @@ class PathRequest(BaseModel):
     rebuild: Optional[bool] = False
     # Optional exclusion list of edges to avoid: list of [a, b]
     exclude_edges: Optional[List[List[int]]] = None
+    # Prefer well-known collaborations among equally short paths
+    ranked: Optional[bool] = False
+    # Give up after this long / after expanding this many artists (capped by the server limits)
+    timeout_ms: Optional[int] = None
+    max_expanded: Optional[int] = None
+    # Return a page of all equally short routes (route_count tells how many there are);
+    # ranked does not apply to them, the routes come in a fixed order by artist id
+    all_routes: Optional[bool] = False
+    route_offset: Optional[int] = 0
+    route_limit: Optional[int] = 10
+    # "compact": artists listed once, hops as [artist_index, track]
+    format: Optional[Literal["full", "compact"]] = "full"
 
 # Serve your pre-existing HTML (redirect to static index)
 @app.get("/", include_in_schema=False)
@@ -82,62 +92,153 @@ def root_redirect():
 
 @app.get("/health")
 def health():
+    return {"status": "ok", "load": ENGINE.loader.status()}
+
+# Liveness: the process is up and serving requests
+@app.get("/health/live")
+def health_live():
     return {"status": "ok"}
 
+# Readiness: 200 once the graph is loaded, 503 (with load phase and ETA) until then
+@app.get("/health/ready")
+def health_ready():
+    status = ENGINE.loader.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # API: search endpoint (wraps your existing search_artists)
 @app.get("/api/search")
 def api_search(q: str = Query(..., min_length=1), limit: int = 10):
-    conn = get_connection()
-    try:
-        rows = search_artists(conn, q, limit=limit)
-    finally:
-        conn.close()
-    result = []
-    for r in rows:
-        aid, name, gid, release_count = r
-        result.append({
-            "id": int(aid),
+    result = ENGINE.search(q, limit=limit)
+    with STAGE_SECONDS["serialization"].time():
+        return JSONResponse(result)
+
+# API: collaborators of one artist, heaviest collaborations first
+MAX_NEIGHBORS_PER_PAGE = 200
+
+@app.get("/api/neighbors/{artist_id}")
+def api_neighbors(artist_id: int, offset: int = Query(0, ge=0), limit: int = Query(50, ge=1)):
+    _require_graph()
+    if artist_id not in ENGINE:
+        raise HTTPException(status_code=404, detail="Artist not present in the filtered collaboration graph.")
+    limit = min(limit, MAX_NEIGHBORS_PER_PAGE)
+    total, rows = ENGINE.neighbors(artist_id, offset, limit)
+    artist_cache = ENGINE.artist_names()
+    page = []
+    for neighbor, track, weight in rows:
+        name, gid = artist_cache.get(neighbor, (None, None))
+        page.append({
+            "id": int(neighbor),
             "name": name,
-            "gid": str(gid) if gid is not None else None,
-            "release_count": int(release_count),
+            "mbid": str(gid) if gid else None,
+            "track": track,
+            "weight": int(weight),
         })
+    with STAGE_SECONDS["serialization"].time():
+        return JSONResponse({"id": artist_id, "total": total, "offset": offset, "neighbors": page})
+
+
+# API: cover art / preview lookup (server-side iTunes search for browsers where the direct call is blocked)
+ITUNES_SEARCH_URL = "https://itunes.apple.com/search"
+
+@app.get("/api/cover")
+def api_cover(track: str = Query(..., min_length=1), artist: Optional[str] = None):
+    cache_key = f"{track.strip().lower()}||{(artist or '').strip().lower()}"
+    cached = ENGINE.cache_get("cover", cache_key)
+    if cached is not None:
+        return JSONResponse(cached)
+
+    result = {"cover": None, "preview": None}
+    try:
+        resp = requests.get(ITUNES_SEARCH_URL, params={
+            "term": f"{track} {artist or ''}".strip(), "entity": "song", "limit": 1, "country": "US",
+        }, timeout=5)
+        resp.raise_for_status()
+        items = resp.json().get("results") or []
+    except (requests.RequestException, ValueError) as e:
+        print(f"⚠️ iTunes lookup failed: {e}")
+        # not cached; the page falls back to asking iTunes itself
+        raise HTTPException(status_code=502, detail="Cover lookup failed.")
+    if items:
+        cover = items[0].get("artworkUrl100")
+        result = {
+            "cover": cover.replace("100x100", "600x600") if cover else None,
+            "preview": items[0].get("previewUrl"),
+        }
+    ENGINE.cache_set("cover", cache_key, result, ttl=COVER_CACHE_TTL)
     return JSONResponse(result)
 
+# Random pairs come from the engine's pool, precomputed in the background
+@app.get("/api/random-pair")
+def api_random_pair():
+    entry = ENGINE.random_pair()
+    if entry is None:
+        status = ENGINE.loader.status()
+        raise HTTPException(status_code=503, detail="Random pairs are still being prepared.",
+                            headers={"Retry-After": str(int(status["eta_seconds"] or 5))})
+    return Response(entry, media_type="application/json")
+
+@app.get("/api/trending-pairs")
+def api_trending_pairs(limit: int = Query(10, ge=1, le=100)):
+    entries = ENGINE.trending_pairs(limit)
+    return Response(b'[' + b','.join(entries) + b']', media_type="application/json")
+
+# API: instant degree-of-separation bounds from landmark distances, shown while /api/path runs
+@app.get("/api/path/estimate")
+def api_path_estimate(source_id: int, target_id: int):
+    _require_graph()
+    if ENGINE.missing(source_id, target_id):
+        raise HTTPException(status_code=404,
+                            detail="One or more artists not present in the filtered collaboration graph.")
+    start = time.perf_counter()
+    estimate = ENGINE.estimate(source_id, target_id)
+    estimate["seconds"] = time.perf_counter() - start
+    return JSONResponse(dict(estimate, source_id=source_id, target_id=target_id))
 
 # API: find path with optional exclude_edges
+def _search_limits(req: PathRequest, cancel):
+    timeout = PATH_TIMEOUT_SECONDS
+    if req.timeout_ms is not None:
+        timeout = min(timeout, max(req.timeout_ms, 0) / 1000.0)
+    budget = PATH_MAX_EXPANDED
+    if req.max_expanded is not None:
+        budget = req.max_expanded if budget is None else min(budget, req.max_expanded)
+    return SearchLimits.after(timeout, budget, cancel)
+
+async def _cancel_on_disconnect(request: Request, cancel: threading.Event):
+    while not cancel.is_set():
+        if await request.is_disconnected():
+            cancel.set()
+            return
+        await asyncio.sleep(0.1)
+
 @app.post("/api/path")
-def api_path(req: PathRequest):
-    global GRAPH, ARTIST_CACHE
-
-    # optionally rebuild first
-    if req.rebuild:
-        with GRAPH_LOCK:
-            conn = get_connection()
-            try:
-                GRAPH = get_or_build_graph(conn=conn, force_rebuild=True)
-            finally:
-                conn.close()
-
-    # ensure graph is loaded
-    if GRAPH is None:
-        with GRAPH_LOCK:
-            conn = get_connection()
-            try:
-                GRAPH = get_or_build_graph(conn=conn, force_rebuild=False)
-            finally:
-                conn.close()
-
-    # ensure artist cache
-    if ARTIST_CACHE is None:
-        ARTIST_CACHE = load_artist_name_cache() or {}
+async def api_path(req: PathRequest, request: Request):
+    # the search runs in the threadpool; stop it if the client goes away
+    cancel = threading.Event()
+    watcher = asyncio.ensure_future(_cancel_on_disconnect(request, cancel))
+    try:
+        return await run_in_threadpool(_api_path, req, cancel)
+    finally:
+        cancel.set()
+        watcher.cancel()
+
+def _api_path(req: PathRequest, cancel: threading.Event):
+    # wait for the startup load rather than starting a second one
+    _require_graph()
+
+    # optionally rebuild first; with shared graph files the other workers
+    # keep the old graph until they are restarted (the response says so)
+    restart_required = ENGINE.rebuild() if req.rebuild else False
+
+    # artist cache (loaded here on first use in lazy mode)
+    ENGINE.artist_names()
 
     # Quick membership check
-    if req.source_id not in GRAPH or req.target_id not in GRAPH:
-        missing = []
-        if req.source_id not in GRAPH:
-            missing.append(req.source_id)
-        if req.target_id not in GRAPH:
-            missing.append(req.target_id)
+    if ENGINE.missing(req.source_id, req.target_id):
         detail_msg = "One or more artists not present in the filtered collaboration graph."
         raise HTTPException(status_code=404, detail=detail_msg)
 
@@ -149,43 +250,42 @@ def api_path(req: PathRequest):
         except Exception:
             excluded = None
 
-    start = time.time()
-    path = bidirectional_bfs_with_tracks(GRAPH, req.source_id, req.target_id, excluded_edges=excluded)
-    elapsed = time.time() - start
-
-    if not path:
-        return {"found": False, "seconds": elapsed, "path": []}
-
-    # Build readable information using artist cache
-    full_path = []
-    prev_id = req.source_id
-    prev_name = ARTIST_CACHE.get(prev_id, ("<unknown>", None))[0]
-    for node_id, track in path:
-        node_name, node_gid = ARTIST_CACHE.get(node_id, (None, None))
-        if node_name is None:
-            # fallback to DB
-            conn = get_connection()
-            try:
-                cur = conn.cursor()
-                cur.execute("SELECT name, gid FROM artist WHERE id = %s", (node_id,))
-                row = cur.fetchone()
-                if row:
-                    node_name, node_gid = row[0], row[1]
-                else:
-                    node_name, node_gid = f"<id:{node_id}>", None
-                cur.close()
-            finally:
-                conn.close()
-
-        full_path.append({
-            "from_id": prev_id,
-            "from_name": prev_name,
-            "to_id": int(node_id),
-            "to_name": node_name,
-            "to_mbid": str(node_gid) if node_gid else None,
-            "track": track
-        })
-        prev_id = node_id
-        prev_name = node_name
+    result = ENGINE.path(req.source_id, req.target_id, excluded_edges=excluded, ranked=req.ranked,
+                         all_routes=req.all_routes, route_offset=req.route_offset,
+                         route_limit=req.route_limit, limits=_search_limits(req, cancel))
+    if restart_required:
+        result = dict(result, restart_required=True)
+    return _render_path(req, result)
+
+def _render_path(req: PathRequest, result):
+    """
+    JSON bytes for a path result, assembled from the engine's pre-encoded artist
+    fragments. format "full" has the usual hop dicts; "compact" lists the artists
+    once and gives each hop as [artist_index, track].
+    """
+    if not result["found"]:
+        with STAGE_SECONDS["serialization"].time():
+            return Response(encode_object(dict(result, path=[])), media_type="application/json")
+
+    fragments = ENGINE.fragments
+    routes = [result["path"]] + result.get("routes", [])
+    names_start = time.perf_counter()
+    fragments.get(req.source_id)
+    for route in routes:
+        for node_id, _ in route:
+            fragments.get(node_id)
+    STAGE_SECONDS["name_resolution"].observe(time.perf_counter() - names_start)
 
-    return {"found": True, "seconds": elapsed, "degrees": len(path), "path": full_path}
+    with STAGE_SECONDS["serialization"].time():
+        fields = result
+        if req.format == "compact":
+            fields = dict(result, format="compact")
+            artists, encoded = encode_compact(fragments, req.source_id, routes)
+            raw = {"artists": artists, "path": encoded[0]}
+        else:
+            encoded = [encode_hops(fragments, req.source_id, route) for route in routes]
+            raw = {"path": encoded[0]}
+        if "routes" in result:
+            raw["routes"] = b'[' + b','.join(encoded[1:]) + b']'
+        # raw values are spliced in where path / routes sit in the result, as json.dumps would order them
+        return Response(encode_object(fields, raw), media_type="application/json")
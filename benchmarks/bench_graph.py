@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+bench_graph.py
+
+Reproducible benchmark for graph build, save/load, memory and path-query latency
+on synthetic power-law collaboration graphs (see benchmarks/synthetic.py).
+
+Usage:
+    python -m benchmarks.bench_graph --artists 10000,100000 --out bench_results.json
+    python -m benchmarks.bench_graph --artists 100000 --compare bench_results.json
+
+The same --seed always produces the same graph and the same query pairs, so two
+result files can be compared run to run (--compare prints the ratios).
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import pickle
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+
+from sdos.graph import build_graph_from_recordings, build_edge_weights
+from sdos.pathfinding import (
+    bidirectional_bfs_with_tracks,
+    ranked_bfs_with_tracks,
+    direction_optimizing_bfs_with_tracks,
+    count_edges,
+)
+from sdos.shared_graph import write_shared_graph, SharedGraph
+from sdos.prune import prune_leaves
+
+from benchmarks.synthetic import generate_recordings
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+    return {
+        "p50_ms": pct(50) * 1000,
+        "p90_ms": pct(90) * 1000,
+        "p99_ms": pct(99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+    }
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def random_pairs(graph, n_pairs, seed):
+    """Fixed random (source, target) pairs of graph members for a given seed."""
+    rng = random.Random(seed)
+    nodes = sorted(graph)
+    return [tuple(rng.sample(nodes, 2)) for _ in range(n_pairs)]
+
+
+def hub_pairs(graph, n_pairs, seed, n_hubs=10):
+    """
+    Pairs whose shortest paths run through the top-degree hubs: both ends are
+    collaborators of (usually different) top-n_hubs artists.
+    """
+    rng = random.Random(seed)
+    hubs = sorted(graph, key=lambda n: len(graph[n]), reverse=True)[:n_hubs]
+    pairs = []
+    while len(pairs) < n_pairs:
+        source = rng.choice(graph[rng.choice(hubs)])[0]
+        target = rng.choice(graph[rng.choice(hubs)])[0]
+        if source != target:
+            pairs.append((source, target))
+    return pairs
+
+
+def time_queries(search, pairs):
+    latencies = []
+    found = 0
+    hops = 0
+    for source, target in pairs:
+        path, elapsed = timed(search, source, target)
+        latencies.append(elapsed)
+        if path:
+            found += 1
+            hops += len(path)
+    result = percentiles(latencies)
+    result["found"] = found
+    result["mean_degrees"] = hops / found if found else None
+    return result
+
+
+def graph_memory_bytes(path):
+    """Bytes allocated by unpickling the graph (measured separately from load time)."""
+    gc.collect()
+    tracemalloc.start()
+    with open(path, 'rb') as f:
+        graph = pickle.load(f)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del graph
+    return current
+
+
+def bench_size(n_artists, args, workdir):
+    result = {"artists": n_artists}
+
+    rows, gen_time = timed(list, generate_recordings(n_artists, args.recordings_per_artist,
+                                                     args.gamma, args.seed))
+    result["recordings"] = len(rows)
+    result["generate_seconds"] = gen_time
+
+    edge_counts = {}
+    graph, build_time = timed(build_graph_from_recordings, rows, edge_counts=edge_counts)
+    del rows
+    weights, weights_time = timed(build_edge_weights, graph, edge_counts)
+    del edge_counts
+    result["build_seconds"] = build_time
+    result["weights_seconds"] = weights_time
+    result["graph_artists"] = len(graph)
+    result["graph_edges"] = sum(len(v) for v in graph.values()) // 2
+    result["max_degree"] = max(len(v) for v in graph.values())
+
+    pkl_path = os.path.join(workdir, f"graph_{n_artists}.pkl")
+
+    def save_pickle():
+        with open(pkl_path, 'wb') as f:
+            pickle.dump(graph, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load_pickle():
+        with open(pkl_path, 'rb') as f:
+            return pickle.load(f)
+
+    _, result["pickle_save_seconds"] = timed(save_pickle)
+    _, result["pickle_load_seconds"] = timed(load_pickle)
+    result["pickle_file_bytes"] = os.path.getsize(pkl_path)
+    result["graph_memory_bytes"] = graph_memory_bytes(pkl_path)
+
+    pairs = random_pairs(graph, args.pairs, args.seed)
+    total_edges = count_edges(graph)
+
+    def direction_bfs(s, t):
+        return direction_optimizing_bfs_with_tracks(graph, s, t, total_edges=total_edges)
+
+    queries = {
+        "bfs": time_queries(lambda s, t: bidirectional_bfs_with_tracks(graph, s, t), pairs),
+        "ranked": time_queries(lambda s, t: ranked_bfs_with_tracks(graph, s, t, weights=weights), pairs),
+        "direction_bfs": time_queries(direction_bfs, pairs),
+    }
+    hubs = hub_pairs(graph, args.pairs, args.seed)
+    queries["hub_bfs"] = time_queries(lambda s, t: bidirectional_bfs_with_tracks(graph, s, t), hubs)
+    queries["hub_direction_bfs"] = time_queries(direction_bfs, hubs)
+
+    pruned, result["prune_seconds"] = timed(prune_leaves, graph, weights)
+    result["pruned_core_artists"] = len(pruned.core)
+    result["pruned_hanging_artists"] = len(pruned.hanging)
+    queries["pruned_bfs"] = time_queries(pruned.find_path, pairs)
+    del pruned
+
+    if not args.skip_shared:
+        shared_path = os.path.join(workdir, f"graph_{n_artists}.bin")
+        _, result["shared_write_seconds"] = timed(write_shared_graph, shared_path, graph, weights)
+        shared, result["shared_open_seconds"] = timed(SharedGraph, shared_path)
+        result["shared_file_bytes"] = os.path.getsize(shared_path)
+        queries["shared_bfs"] = time_queries(lambda s, t: bidirectional_bfs_with_tracks(shared, s, t), pairs)
+        queries["shared_hub_direction_bfs"] = time_queries(
+            lambda s, t: direction_optimizing_bfs_with_tracks(shared, s, t, total_edges=total_edges), hubs)
+        shared.close()
+
+    result["queries"] = queries
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous):
+    """Print current/previous ratios for every timing that exists in both runs."""
+    prev_by_size = {r["artists"]: r for r in previous.get("results", [])}
+    for res in current["results"]:
+        prev = prev_by_size.get(res["artists"])
+        if prev is None:
+            continue
+        print(f"\n{res['artists']} artists (current / previous):")
+        for key, value in res.items():
+            if key.endswith("_seconds") and prev.get(key):
+                print(f"  {key:24s} {value / prev[key]:6.2f}x")
+        for algo, q in res["queries"].items():
+            pq = prev.get("queries", {}).get(algo)
+            if pq and pq.get("p50_ms") and pq.get("p99_ms"):
+                print(f"  {algo + ' p50':24s} {q['p50_ms'] / pq['p50_ms']:6.2f}x")
+                print(f"  {algo + ' p99':24s} {q['p99_ms'] / pq['p99_ms']:6.2f}x")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="SDOS synthetic graph benchmark")
+    parser.add_argument("--artists", default="10000,100000",
+                        help="comma separated graph sizes (number of artists)")
+    parser.add_argument("--recordings-per-artist", type=float, default=1.5)
+    parser.add_argument("--gamma", type=float, default=2.3, help="power-law exponent of the degree distribution")
+    parser.add_argument("--pairs", type=int, default=200, help="path queries per graph")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-shared", action="store_true", help="skip the mmap'd shared graph format")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(s) for s in args.artists.split(",") if s.strip()]
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "results": [],
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in sizes:
+            print(f"Benchmarking {n} artists...")
+            res = bench_size(n, args, workdir)
+            report["results"].append(res)
+            bfs = res["queries"]["bfs"]
+            print(f"  build {res['build_seconds']:.2f}s, pickle load {res['pickle_load_seconds']:.2f}s, "
+                  f"bfs p50 {bfs['p50_ms']:.2f}ms p99 {bfs['p99_ms']:.2f}ms")
+
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+# benchmarks/synthetic.py
+# Synthetic MusicBrainz-shaped collaboration data for benchmarks (no Postgres needed)
+
+import random
+from itertools import accumulate
+
+# share of recordings credited to 2, 3, 4 and 5 artists
+CREDIT_SIZES = (2, 3, 4, 5)
+CREDIT_SIZE_WEIGHTS = (0.80, 0.14, 0.04, 0.02)
+
+
+def artist_ids(n_artists, seed=0):
+    """Sparse, shuffled artist ids like MusicBrainz row ids (hubs are not the low ids)."""
+    rng = random.Random(seed)
+    ids = list(range(1, 3 * n_artists, 3))[:n_artists]
+    rng.shuffle(ids)
+    return ids
+
+
+def generate_recordings(n_artists, recordings_per_artist=1.5, gamma=2.3, seed=0):
+    """
+    Yield (recording_id, recording_name, artist_ids) rows like the build query returns.
+    Artists are drawn Chung-Lu style with weight rank^(-1/(gamma-1)), which gives a
+    power-law degree distribution with exponent ~gamma: a few hubs with thousands of
+    collaborators and a long tail of artists with one or two.
+    """
+    rng = random.Random(seed)
+    ids = artist_ids(n_artists, seed)
+    exponent = -1.0 / (gamma - 1.0)
+    cum_weights = list(accumulate((rank + 1) ** exponent for rank in range(n_artists)))
+    sizes = rng.choices(CREDIT_SIZES, weights=CREDIT_SIZE_WEIGHTS, k=int(n_artists * recordings_per_artist))
+
+    for rec_id, size in enumerate(sizes, 1):
+        credited = rng.choices(ids, cum_weights=cum_weights, k=size)
+        yield rec_id, f"Recording {rec_id}", credited
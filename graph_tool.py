@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+graph_tool.py
+
+Offline tools for the SDOS collaboration graph:
+ - export: write the cached graph (+ edge weights and artist names) as a
+   compressed columnar edge-list file that can be shipped as a build artifact
+ - import: read such a file back into the runtime caches (data/processed/*.pkl,
+   including the landmark distances), optionally also writing the mmap'd
+   shared-graph files
+ - build-dump: build the graph, edge weights and artist names straight from an
+   extracted MusicBrainz dump (mbdump/ table files), no Postgres needed
+
+Usage:
+    python graph_tool.py export graph.sdosel            # from data/processed caches
+    python graph_tool.py export graph.sdosel --build    # build from Postgres first if needed
+    python graph_tool.py import graph.sdosel [--shared data/shared]
+    python graph_tool.py build-dump path/to/mbdump [--shared data/shared] [--export graph.sdosel]
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime
+
+from sdos.graph import (
+    EDGE_WEIGHT_CACHE_FILE,
+    build_edge_weights,
+    load_graph_and_build_id,
+    load_edge_weights,
+    load_artist_name_cache,
+    save_graph_to_cache,
+    save_edge_weights_to_cache,
+    save_artist_name_cache,
+)
+from sdos.edgelist import export_graph, import_graph
+from sdos.graphindex import GraphIndex
+from sdos.landmarks import SHARED_LANDMARKS_FILE, Landmarks, save_landmarks
+from sdos.mbdump import build_graph_from_dump, build_artist_name_cache_from_dump
+from sdos.shared_graph import (
+    write_shared_graph,
+    write_shared_artist_names,
+    shared_dir_lock,
+    SHARED_GRAPH_FILE,
+    SHARED_NAMES_FILE,
+)
+
+
+def format_seconds(td):
+    return f"{td.total_seconds():.3f}s"
+
+
+def cmd_export(args):
+    start = datetime.now()
+    graph, build_id = load_graph_and_build_id()
+    artist_cache = None if args.no_artists else load_artist_name_cache()
+    if graph is None or (artist_cache is None and not args.no_artists):
+        if not args.build:
+            print("❌ No cached graph/artist names in data/processed (use --build to build from the database).")
+            return 1
+        from sdos.db import get_connection
+        from sdos.graph import rebuild_graph_cache, build_artist_name_cache
+        conn = get_connection()
+        try:
+            if graph is None:
+                graph, build_id = rebuild_graph_cache(conn)
+            if artist_cache is None and not args.no_artists:
+                artist_cache = build_artist_name_cache(conn)
+        finally:
+            conn.close()
+    weights = load_edge_weights(build_id)
+    load_time = datetime.now() - start
+
+    start = datetime.now()
+    n_edges = export_graph(args.path, graph, weights, artist_cache, level=args.level)
+    export_time = datetime.now() - start
+
+    print(f"✅ Exported {len(graph)} artists / {n_edges} edges"
+          f"{'' if artist_cache is None else f' / {len(artist_cache)} names'} to {args.path}"
+          f" ({os.path.getsize(args.path) / 1e6:.1f} MB)")
+    print(f"   load {format_seconds(load_time)}, export {format_seconds(export_time)}")
+    return 0
+
+
+def cmd_import(args):
+    start = datetime.now()
+    graph, weights, artist_cache = import_graph(args.path)
+    read_time = datetime.now() - start
+    print(f"Read {len(graph)} artists from {args.path} in {format_seconds(read_time)}")
+
+    start = datetime.now()
+    write_runtime_caches(graph, weights, artist_cache, args.shared)
+    write_time = datetime.now() - start
+    print(f"✅ Runtime caches written in {format_seconds(write_time)}")
+    return 0
+
+
+def write_runtime_caches(graph, weights, artist_cache, shared_dir=None):
+    # a new build id: results cached for the previous graph are not served for this one
+    build_id = save_graph_to_cache(graph)
+    if weights is not None:
+        save_edge_weights_to_cache(weights, build_id)
+    elif os.path.exists(EDGE_WEIGHT_CACHE_FILE):
+        # weights of the previous graph: the ranked search would index the new rows with them
+        os.remove(EDGE_WEIGHT_CACHE_FILE)
+    if artist_cache is not None:
+        save_artist_name_cache(artist_cache)
+    # landmark distances for /api/path/estimate, so the server does not compute them at startup
+    landmark_count = int(os.environ.get("SDOS_LANDMARKS", "16"))
+    landmarks = None
+    if landmark_count:
+        landmarks = Landmarks.build(graph, count=landmark_count, index=GraphIndex(graph), version=build_id)
+        save_landmarks(landmarks)
+    if shared_dir:
+        # same lock as the server workers creating the files (sdos.shared_graph.open_or_create_shared)
+        with shared_dir_lock(shared_dir):
+            write_shared_graph(os.path.join(shared_dir, SHARED_GRAPH_FILE), graph, weights, build_id)
+            if artist_cache is not None:
+                write_shared_artist_names(os.path.join(shared_dir, SHARED_NAMES_FILE), artist_cache)
+            if landmarks is not None:
+                save_landmarks(landmarks, os.path.join(shared_dir, SHARED_LANDMARKS_FILE))
+
+
+def cmd_build_dump(args):
+    start = datetime.now()
+    edge_counts = {}
+    graph = build_graph_from_dump(args.dump_dir, edge_counts=edge_counts)
+    weights = build_edge_weights(graph, edge_counts)
+    del edge_counts
+    build_time = datetime.now() - start
+    n_edges = sum(len(v) for v in graph.values()) // 2
+    print(f"Built {len(graph)} artists / {n_edges} edges in {format_seconds(build_time)}")
+
+    start = datetime.now()
+    artist_cache = None if args.no_artists else build_artist_name_cache_from_dump(args.dump_dir)
+    write_runtime_caches(graph, weights, artist_cache, args.shared)
+    if args.export:
+        export_graph(args.export, graph, weights, artist_cache)
+    write_time = datetime.now() - start
+    print(f"✅ Runtime caches written in {format_seconds(write_time)}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SDOS graph export/import")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="export the cached graph to an edge-list file")
+    p_export.add_argument("path")
+    p_export.add_argument("--build", action="store_true", help="build missing caches from the database")
+    p_export.add_argument("--no-artists", action="store_true", help="leave out the artist name table")
+    p_export.add_argument("--level", type=int, default=6, help="zlib compression level (0-9)")
+    p_export.set_defaults(func=cmd_export)
+
+    p_import = sub.add_parser("import", help="import an edge-list file into the runtime caches")
+    p_import.add_argument("path")
+    p_import.add_argument("--shared", metavar="DIR", help="also write the mmap'd shared graph files to DIR")
+    p_import.set_defaults(func=cmd_import)
+
+    p_dump = sub.add_parser("build-dump", help="build the graph from extracted MusicBrainz dump files")
+    p_dump.add_argument("dump_dir", help="directory with the mbdump table files (plain, .gz or .bz2)")
+    p_dump.add_argument("--shared", metavar="DIR", help="also write the mmap'd shared graph files to DIR")
+    p_dump.add_argument("--export", metavar="PATH", help="also write an edge-list file")
+    p_dump.add_argument("--no-artists", action="store_true", help="skip the artist name cache")
+    p_dump.set_defaults(func=cmd_build_dump)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,19 @@
 import os
+import threading
+from contextlib import contextmanager
+
 import psycopg2
 from urllib.parse import urlparse
 
+# Local development database (used when DATABASE_URL is not set)
+DB_CONFIG = {
+    'dbname': 'mb_sdos_db',
+    'user': 'tsabera',
+    'password': '',
+    'host': 'localhost',
+    'port': 5432,
+}
+
 def get_connection():
     """Return a new PostgreSQL connection."""
     # Check if we're running on Railway (production)
@@ -19,11 +31,46 @@ def get_connection():
         )
     else:
         # Fallback to local development configuration
-        DB_CONFIG = {
-            'dbname': 'mb_sdos_db',
-            'user': 'tsabera',
-            'password': '',
-            'host': 'localhost',
-            'port': 5432,
-        }
-        return psycopg2.connect(**DB_CONFIG)
\ No newline at end of file
+        return psycopg2.connect(**DB_CONFIG)
+
+
+class ConnectionPool:
+    """
+    Keeps up to max_idle open connections from connect() for reuse. connection()
+    lends one out as a context manager and ends its transaction on return;
+    a connection that raised is closed instead of going back to the pool.
+    """
+
+    def __init__(self, connect=get_connection, max_idle=4):
+        self._connect = connect
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        conn = None
+        with self._lock:
+            while self._idle and conn is None:
+                conn = self._idle.pop()
+                if conn.closed:  # dropped by the server while idle
+                    conn = None
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+            conn.rollback()
+        except Exception:
+            conn.close()
+            raise
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
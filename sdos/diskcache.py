@@ -0,0 +1,173 @@
+# sdos/diskcache.py
+# Persistent key-value cache on local disk (SQLite), shared by all worker processes.
+# Entries live in namespaces ("search", "path", "cover", ...), can be tagged with
+# the build id of the graph they were computed from and can expire; the file is kept
+# under a size bound by evicting the least recently used entries.
+
+import os
+import time
+import pickle
+import sqlite3
+import threading
+
+DISK_CACHE_FILE = 'data/processed/cache.sqlite'
+# a hit only rewrites its access time when the stored one is older than this,
+# so reads of hot entries do not all queue up for SQLite's write lock
+ACCESS_UPDATE_SECONDS = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    version TEXT,
+    expires REAL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL,
+    value BLOB NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+
+class DiskCache:
+    """
+    get/set pickled values by (namespace, key). A value stored with a version is
+    only returned for the same version; any other version is a plain miss, so
+    workers on different graphs during a rollout keep each other's entries, and
+    entries of old graphs age out through eviction. ttl is in seconds. When the
+    stored values grow past max_bytes, the least recently read entries are
+    dropped until the cache is back under 90% of the bound (read times are kept
+    to within ACCESS_UPDATE_SECONDS). Database errors are logged and treated as
+    misses, so a broken cache file never fails a request; an entry that no longer
+    unpickles (corrupt, or written by incompatible code) is deleted and is a miss.
+    Each thread uses its own connection; close() closes all of them.
+    """
+
+    def __init__(self, path=DISK_CACHE_FILE, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._conns = []  # every thread's connection, for close()
+        self._conns_lock = threading.Lock()
+        self._generation = 0  # bumped by close(), so threads reconnect afterwards
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        self._bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.generation != self._generation:
+            # only this thread uses it; check_same_thread=False lets close() close it from another
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conns_lock:
+                self._conns.append(conn)
+                self._local.generation = self._generation
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close every thread's connection (a later call opens a new one)."""
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+            self._generation += 1
+        for conn in conns:
+            conn.close()
+
+    def get(self, namespace, key, version=None):
+        try:
+            conn = self._conn()
+            row = conn.execute("SELECT version, expires, accessed, value FROM entries "
+                               "WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+            if row is None:
+                return None
+            stored_version, expires, accessed, value = row
+            if stored_version != version:
+                return None
+            now = time.time()
+            if expires is not None and expires < now:
+                conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ? AND expires < ?",
+                             (namespace, key, now))
+                return None
+            if now - accessed > ACCESS_UPDATE_SECONDS:
+                conn.execute("UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?",
+                             (now, namespace, key))
+        except sqlite3.Error as e:
+            print(f"⚠️ Disk cache read failed: {e}")
+            return None
+        try:
+            return pickle.loads(value)
+        except Exception as e:  # EOFError, AttributeError, ImportError, ... as well as UnpicklingError
+            print(f"⚠️ Dropping unreadable disk cache entry {namespace}/{key}: {type(e).__name__}: {e}")
+            self._delete(namespace, key)
+            return None
+
+    def _delete(self, namespace, key):
+        try:
+            self._conn().execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+        except sqlite3.Error as e:
+            print(f"⚠️ Disk cache delete failed: {e}")
+
+    def set(self, namespace, key, value, version=None, ttl=None):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, version, expires, accessed, size, value) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (namespace, key, version, None if ttl is None else now + ttl, now, len(blob), blob))
+        except sqlite3.Error as e:
+            print(f"⚠️ Disk cache write failed: {e}")
+            return
+        self._bytes += len(blob)
+        if self._bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries down to 90% of max_bytes (sizes re-read from disk)."""
+        target = int(self.max_bytes * 0.9)
+        try:
+            conn = self._conn()
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > target:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    freed = 0
+                    doomed = []
+                    for namespace, key, size in conn.execute(
+                            "SELECT namespace, key, size FROM entries ORDER BY accessed"):
+                        if total - freed <= target:
+                            break
+                        doomed.append((namespace, key))
+                        freed += size
+                    conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", doomed)
+                    conn.execute("COMMIT")
+                except sqlite3.Error:
+                    conn.execute("ROLLBACK")
+                    raise
+                total -= freed
+            self._bytes = total
+        except sqlite3.Error as e:
+            print(f"⚠️ Disk cache eviction failed: {e}")
+
+    def clear(self, namespace=None):
+        try:
+            if namespace is None:
+                self._conn().execute("DELETE FROM entries")
+            else:
+                self._conn().execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+            self._bytes = self._conn().execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"⚠️ Disk cache clear failed: {e}")
+
+    def stats(self):
+        """{namespace: (entries, bytes)}"""
+        try:
+            rows = self._conn().execute(
+                "SELECT namespace, COUNT(*), SUM(size) FROM entries GROUP BY namespace").fetchall()
+        except sqlite3.Error:
+            return {}
+        return {namespace: (count, size) for namespace, count, size in rows}
@@ -0,0 +1,162 @@
+# sdos/edgelist.py
+# Portable, compressed columnar edge-list format for shipping a built graph
+# between machines (independent of the Python/pickle version).
+#
+# File layout (little endian):
+#   magic b'SDOSEL01'
+#   repeated sections: name (32s, NUL padded), typecode (1s), pad (7x), raw_len (Q), stored_len (Q)
+#                      followed by stored_len bytes of zlib-compressed column data
+#
+# Columns:
+#   edge_a, edge_b, edge_recording (uint32)   one row per undirected edge
+#   edge_weight (uint32, optional)            recordings shared by the pair
+#   recording_offsets (uint64) + recording_names (utf-8)   recording name table
+#   artist_ids (uint32), artist_gids (16 bytes each, zero = none),
+#   artist_name_offsets (uint64) + artist_names (utf-8)    artist name table
+
+import sys
+import zlib
+import struct
+import uuid
+from array import array
+from collections import defaultdict
+
+from sdos.shared_graph import pack_strings
+
+MAGIC = b'SDOSEL01'
+_SECTION = struct.Struct('<32s1s7xQQ')
+_NO_GID = bytes(16)
+
+
+def _check_byteorder():
+    if sys.byteorder != 'little':
+        raise RuntimeError("edge-list files are little endian only")
+
+
+def _write_section(f, name, data, level):
+    if isinstance(data, array):
+        typecode, raw = data.typecode, data.tobytes()
+    else:
+        typecode, raw = 'B', bytes(data)
+    stored = zlib.compress(raw, level)
+    f.write(_SECTION.pack(name.encode('ascii'), typecode.encode('ascii'), len(raw), len(stored)))
+    f.write(stored)
+
+
+def _read_sections(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not an SDOS edge-list file")
+    sections = {}
+    while True:
+        head = f.read(_SECTION.size)
+        if not head:
+            break
+        name, typecode, raw_len, stored_len = _SECTION.unpack(head)
+        raw = zlib.decompress(f.read(stored_len))
+        if len(raw) != raw_len:
+            raise ValueError(f"corrupt section {name!r}")
+        typecode = typecode.decode('ascii')
+        if typecode == 'B':
+            sections[name.rstrip(b'\0').decode('ascii')] = raw
+        else:
+            col = array(typecode)
+            col.frombytes(raw)
+            sections[name.rstrip(b'\0').decode('ascii')] = col
+    return sections
+
+
+def _unpack_strings(offsets, blob):
+    return [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+
+def export_graph(path, graph, weights=None, artist_cache=None, level=6):
+    """
+    Write graph (dict[artist_id] -> list[(neighbor_id, recording_name)]), optional
+    aligned edge weights and optional artist cache (artist_id -> (name, gid)).
+    Returns the number of undirected edges written.
+    """
+    _check_byteorder()
+    edge_a, edge_b, edge_rec, edge_weight = array('I'), array('I'), array('I'), array('I')
+    rec_index = {}
+    rec_names = []
+
+    for a, neighbors in graph.items():
+        row = weights.get(a) if weights is not None else None
+        for i, (b, rec_name) in enumerate(neighbors):
+            if a >= b:
+                continue
+            idx = rec_index.get(rec_name)
+            if idx is None:
+                idx = rec_index[rec_name] = len(rec_names)
+                rec_names.append(rec_name)
+            edge_a.append(a)
+            edge_b.append(b)
+            edge_rec.append(idx)
+            if weights is not None:
+                edge_weight.append(row[i] if row is not None and i < len(row) else 0)
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        _write_section(f, 'edge_a', edge_a, level)
+        _write_section(f, 'edge_b', edge_b, level)
+        _write_section(f, 'edge_recording', edge_rec, level)
+        if weights is not None:
+            _write_section(f, 'edge_weight', edge_weight, level)
+        rec_offsets, rec_blob = pack_strings(rec_names)
+        _write_section(f, 'recording_offsets', rec_offsets, level)
+        _write_section(f, 'recording_names', rec_blob, level)
+
+        if artist_cache is not None:
+            ids = array('I', sorted(artist_cache))
+            gids = bytearray(16 * len(ids))
+            names = []
+            for i, artist_id in enumerate(ids):
+                name, gid = artist_cache[artist_id]
+                names.append(name)
+                if gid is not None:
+                    gids[16 * i:16 * i + 16] = uuid.UUID(str(gid)).bytes
+            name_offsets, name_blob = pack_strings(names)
+            _write_section(f, 'artist_ids', ids, level)
+            _write_section(f, 'artist_gids', gids, level)
+            _write_section(f, 'artist_name_offsets', name_offsets, level)
+            _write_section(f, 'artist_names', name_blob, level)
+
+    return len(edge_a)
+
+
+def import_graph(path):
+    """
+    Read an edge-list file back into the runtime formats.
+    Returns (graph, weights or None, artist_cache or None).
+    """
+    _check_byteorder()
+    with open(path, 'rb') as f:
+        sections = _read_sections(f)
+
+    rec_names = _unpack_strings(sections['recording_offsets'], sections['recording_names'])
+    edge_weight = sections.get('edge_weight')
+
+    graph = defaultdict(list)
+    for a, b, r in zip(sections['edge_a'], sections['edge_b'], sections['edge_recording']):
+        rec_name = rec_names[r]
+        graph[a].append((b, rec_name))
+        graph[b].append((a, rec_name))
+
+    weights = None
+    if edge_weight is not None:
+        rows = defaultdict(lambda: array('I'))
+        for a, b, w in zip(sections['edge_a'], sections['edge_b'], edge_weight):
+            rows[a].append(w)
+            rows[b].append(w)
+        weights = dict(rows)
+
+    artist_cache = None
+    if 'artist_ids' in sections:
+        names = _unpack_strings(sections['artist_name_offsets'], sections['artist_names'])
+        gids = sections['artist_gids']
+        artist_cache = {}
+        for i, artist_id in enumerate(sections['artist_ids']):
+            raw_gid = gids[16 * i:16 * i + 16]
+            artist_cache[artist_id] = (names[i], str(uuid.UUID(bytes=raw_gid)) if raw_gid != _NO_GID else None)
+
+    return graph, weights, artist_cache
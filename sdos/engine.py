@@ -0,0 +1,679 @@
+# sdos/engine.py
+# The SDOS core as one embeddable object. An Engine owns the collaboration graph,
+# the artist name store, the result caches and the random-pair pool, has an
+# explicit load / warm / close lifecycle, and answers searches from any thread.
+# app.py, terminal_sdos.py and batch scripts all embed an Engine, so every entry
+# point runs the same search code with the same settings.
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+from sdos.db import get_connection, ConnectionPool
+from sdos.graph import (
+    rebuild_graph_cache,
+    load_graph_and_build_id,
+    graph_cache_build_id,
+    load_artist_name_cache,
+    build_artist_name_cache,
+    load_edge_weights,
+)
+from sdos.shared_graph import (
+    open_or_create_shared,
+    shared_dir_lock,
+    write_shared_graph,
+    SharedGraph,
+    SHARED_GRAPH_FILE,
+)
+from sdos.pathfinding import (
+    bidirectional_bfs_with_tracks,
+    ranked_bfs_with_tracks,
+    direction_optimizing_bfs_with_tracks,
+    count_edges,
+    all_shortest_paths_bfs,
+)
+from sdos.prune import prune_leaves, PrunedGraph
+from sdos.search import search_artists
+from sdos.loader import Loader
+from sdos.diskcache import DiskCache, DISK_CACHE_FILE
+from sdos.graphindex import GraphIndex, sorted_neighbor_rows, decode_tracks
+from sdos.landmarks import (
+    LANDMARKS_CACHE_FILE,
+    SHARED_LANDMARKS_FILE,
+    Landmarks,
+    save_landmarks,
+    get_or_build_landmarks,
+)
+from sdos.pathjson import ArtistFragments, encode_hops, encode_object
+from sdos.pairpool import PairPool, PairSampler, TrendingPairs
+from sdos import metrics
+
+# Per-stage latency histograms and cache counters (one set per process, shared by all engines)
+STAGE_SECONDS = {
+    stage: metrics.Histogram("sdos_stage_seconds", "Time spent per request stage",
+                             labels={"stage": stage})
+    for stage in ("db_connect", "search_query", "bfs", "name_resolution", "serialization")
+}
+BFS_NODES_EXPANDED = metrics.Histogram("sdos_bfs_nodes_expanded", "Nodes expanded per path search",
+                                       buckets=metrics.COUNT_BUCKETS)
+BFS_NODES_VISITED = metrics.Histogram("sdos_bfs_nodes_visited", "Nodes reached per path search",
+                                      buckets=metrics.COUNT_BUCKETS)
+SEARCHES_GAVE_UP = {
+    reason: metrics.Counter("sdos_searches_gave_up_total", "Path searches stopped by a limit",
+                            labels={"reason": reason})
+    for reason in ("deadline", "budget", "cancelled")
+}
+ARTIST_CACHE_HITS = metrics.Counter("sdos_artist_cache_hits_total", "Artist names served from the cache")
+ARTIST_CACHE_MISSES = metrics.Counter("sdos_artist_cache_misses_total",
+                                      "Artist names that fell back to the database")
+DISK_CACHE_HITS = {
+    ns: metrics.Counter("sdos_disk_cache_hits_total", "Results served from the disk cache", labels={"namespace": ns})
+    for ns in ("search", "path", "cover")
+}
+DISK_CACHE_MISSES = {
+    ns: metrics.Counter("sdos_disk_cache_misses_total", "Disk cache lookups that had to compute the result",
+                        labels={"namespace": ns})
+    for ns in ("search", "path", "cover")
+}
+
+SEARCH_CACHE_TTL = 24 * 3600
+MAX_ROUTES_PER_PAGE = 50
+# the recent-DAG cache keeps at most this many visited artists (PathDAG.visited) across all DAGs
+DAG_CACHE_VISITED = 200_000
+# sorted collaborator rows of recently listed artists, at most this many rows across all artists
+NEIGHBOR_CACHE_ROWS = 200_000
+PAIR_POOL_SAVE_SECONDS = 60
+
+
+def env_flag(name):
+    return os.environ.get(name, "") not in ("", "0", "false")
+
+
+class Engine:
+    """
+    Graph, names, caches and pools behind one set of query methods.
+
+    Lifecycle: load() reads (or builds) the graph in a background thread and
+    waits for it, warm() pays the remaining one-off costs (lazy artist names,
+    edge count) before the first query, close() stops the pair sampler and
+    releases the cache files. Query methods can be called from any thread: the
+    loaded graph, weights, index and version are published together as one
+    tuple and swapped whole on rebuild, so a query never sees a mix of two graphs.
+    The version is the graph's build id (sdos.graph.new_build_id), stamped when
+    the graph is built or imported; cached paths, the pair pool and the landmark
+    distances are all tagged with it.
+
+    shared_dir: map the graph and names from mmap'd files in this directory
+        (sdos/shared_graph.py) instead of loading private pickle copies
+    lazy_artist_cache: load the artist names on first use instead of at load time
+    prune_leaves: search the 2-core only, splicing degree-1 artists back on (sdos/prune.py);
+        not available with shared_dir (the workers map the full graph), where it is
+        switched off with a warning
+    direction_optimizing: use the direction-optimizing BFS for plain searches
+    disk_cache_file / disk_cache_mb: persistent result cache (0 MB disables it)
+    pair_pool_size: precomputed random pairs to keep (0 disables the sampler)
+    db_pool_size: open database connections kept for reuse by searches and name lookups
+    landmark_count: hub artists whose distances back estimate() (0 disables estimates)
+    """
+
+    def __init__(self, shared_dir=None, lazy_artist_cache=False, prune_leaves=False,
+                 direction_optimizing=False, disk_cache_file=DISK_CACHE_FILE, disk_cache_mb=256,
+                 pair_pool_size=0, pair_min_degrees=3, pair_refresh_seconds=30.0, db_pool_size=4,
+                 landmark_count=16):
+        self.shared_dir = shared_dir
+        self.lazy_artist_cache = lazy_artist_cache
+        if prune_leaves and shared_dir:
+            print("⚠️ Leaf pruning is not available with shared graph files; searching the full graph")
+            prune_leaves = False
+        self.prune_leaves = prune_leaves
+        self.direction_optimizing = direction_optimizing
+        self.landmark_count = landmark_count
+
+        # (graph, weights, index, version, landmarks), replaced as a whole
+        self._state = (None, None, None, None, None)
+        self._artist_cache = None
+        self._rebuild_lock = threading.Lock()
+        self._artist_cache_lock = threading.Lock()
+        self._edge_count = (None, 0)  # (searched graph, total edges) for the direction-optimizing BFS
+
+        self.db_pool = ConnectionPool(lambda: self.connect(), max_idle=db_pool_size)
+        self.disk_cache = DiskCache(disk_cache_file, max_bytes=int(disk_cache_mb * 1024 * 1024)) \
+            if disk_cache_mb > 0 else None
+        # shortest-path DAGs of recent all_routes searches: (source, target, excluded) -> (graph, PathDAG)
+        self._dags = OrderedDict()
+        self._dags_visited = 0
+        self._dags_lock = threading.Lock()
+        # artist -> (graph, rows sorted by sorted_neighbor_rows), least recently listed dropped first
+        self._neighbor_rows = OrderedDict()
+        self._neighbor_rows_total = 0
+        self._neighbors_lock = threading.Lock()
+        # pre-encoded JSON pieces per artist (names are fixed while the process runs)
+        self.fragments = ArtistFragments(self.resolve_artist)
+
+        self.pair_pool = PairPool(pair_pool_size)
+        self.trending = TrendingPairs()
+        self.pair_sampler = PairSampler(self.pair_pool, self._sampler_graph, self._sampled_pair,
+                                        find_path=self.find_path, min_degrees=pair_min_degrees,
+                                        refresh_seconds=pair_refresh_seconds, on_add=self._save_pair_pool)
+        self._pair_pool_saved_at = 0.0
+
+        if shared_dir:
+            phases = ["loading_graph", "indexing", "landmarks"]
+        else:
+            phases = ["loading_artists", "loading_graph", "loading_weights", "indexing", "landmarks", "pruning"]
+            if lazy_artist_cache:
+                phases.remove("loading_artists")
+            if not prune_leaves:
+                phases.remove("pruning")
+        if not landmark_count:
+            phases.remove("landmarks")
+        self.loader = Loader(self._load, phases=phases)
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """Engine configured from the SDOS_* environment variables; keyword arguments take precedence."""
+        settings = {
+            "shared_dir": os.environ.get("SDOS_SHARED_GRAPH_DIR") or None,
+            "lazy_artist_cache": env_flag("SDOS_LAZY_ARTIST_CACHE"),
+            "prune_leaves": env_flag("SDOS_PRUNE_LEAVES"),
+            "direction_optimizing": env_flag("SDOS_DIRECTION_OPTIMIZING"),
+            "disk_cache_file": os.environ.get("SDOS_DISK_CACHE_FILE", DISK_CACHE_FILE),
+            "disk_cache_mb": float(os.environ.get("SDOS_DISK_CACHE_MB", "256")),
+            "pair_pool_size": int(os.environ.get("SDOS_PAIR_POOL_SIZE", "200")),
+            "pair_min_degrees": int(os.environ.get("SDOS_PAIR_MIN_DEGREES", "3")),
+            "pair_refresh_seconds": float(os.environ.get("SDOS_PAIR_REFRESH_SECONDS", "30")),
+            "db_pool_size": int(os.environ.get("SDOS_DB_POOL_SIZE", "4")),
+            "landmark_count": int(os.environ.get("SDOS_LANDMARKS", "16")),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    # --- loaded state ---
+
+    @property
+    def graph(self):
+        return self._state[0]
+
+    @property
+    def weights(self):
+        return self._state[1]
+
+    @property
+    def index(self):
+        """GraphIndex (degree and component per artist) of the unpruned graph."""
+        return self._state[2]
+
+    @property
+    def version(self):
+        return self._state[3]
+
+    @property
+    def landmarks(self):
+        """Landmarks of the unpruned graph, or None when estimates are disabled."""
+        return self._state[4]
+
+    @property
+    def ready(self):
+        return self.loader.ready
+
+    def __contains__(self, artist_id):
+        graph = self.graph
+        return graph is not None and artist_id in graph
+
+    def missing(self, *artist_ids):
+        """The given artist ids that are not in the collaboration graph."""
+        graph = self.graph
+        return [a for a in artist_ids if graph is None or a not in graph]
+
+    # --- lifecycle ---
+
+    def load(self, wait=True, timeout=None):
+        """
+        Start the single background load (if not started yet) and the pair sampler.
+        With wait, block until the graph is ready (or timeout seconds) and return
+        whether it is; without, return immediately.
+        """
+        self.loader.start()
+        if self.pair_pool.size > 0:
+            self.pair_sampler.start()
+        if not wait:
+            return self.loader.ready
+        return self.loader.wait(timeout=timeout)
+
+    def warm(self):
+        """Load, then do the one-off work the first query would otherwise pay for."""
+        if not self.load():
+            raise RuntimeError(f"Collaboration graph failed to load: {self.loader.error}")
+        self.artist_names()
+        if self.direction_optimizing:
+            self._searched_edge_count()
+        return self
+
+    def close(self):
+        """Stop the pair sampler, save the pool, close pooled connections and this thread's cache connection."""
+        self.pair_sampler.stop()
+        if self.pair_pool.size > 0 and len(self.pair_pool) and self.version is not None:
+            self.cache_set("pairs", "pool", self.pair_pool.entries(), version=self.version)
+        self.db_pool.close()
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _load_artist_cache(self):
+        cache = load_artist_name_cache()
+        if cache is None:
+            conn = self.connect()
+            try:
+                cache = build_artist_name_cache(conn)
+            finally:
+                conn.close()
+        return cache
+
+    def _load_graph(self):
+        """(graph, build_id) from the pickle cache, built from the database (and saved) if missing."""
+        graph, build_id = load_graph_and_build_id()
+        if graph is None:
+            # building can be expensive — done in the background load, and saved
+            conn = self.connect()
+            try:
+                graph, build_id = rebuild_graph_cache(conn)
+            finally:
+                conn.close()
+        return graph, build_id
+
+    def _cached_build_id(self):
+        """Build id of the graph pickle (None without one), which the shared files must match."""
+        return graph_cache_build_id()
+
+    def _load_weights(self, build_id):
+        return load_edge_weights(build_id)
+
+    def _load(self, loader):
+        """Loader body: graph, weights, index (and names unless lazy), published at the end."""
+        if self.shared_dir:
+            # first worker to get here writes the shared files, the others just map them
+            loader.set_phase("loading_graph")
+            graph, self._artist_cache = open_or_create_shared(self.shared_dir, self._load_graph,
+                                                              self._load_artist_cache, self._load_weights,
+                                                              build_id=self._cached_build_id())
+            loader.set_phase("indexing")
+            index = GraphIndex(graph)
+            version = graph.build_id
+            landmarks = self._load_landmarks(loader, graph, index, version)
+            self._state = (graph, graph.weights, index, version, landmarks)
+            self._restore_pair_pool()
+            return
+
+        if not self.lazy_artist_cache:
+            loader.set_phase("loading_artists")
+            self.artist_names()
+        loader.set_phase("loading_graph")
+        graph, version = self._load_graph()
+        loader.set_phase("loading_weights")
+        weights = self._load_weights(version)
+        loader.set_phase("indexing")
+        index = GraphIndex(graph)
+        landmarks = self._load_landmarks(loader, graph, index, version)
+        if self.prune_leaves:
+            loader.set_phase("pruning")
+            graph = prune_leaves(graph, weights)
+            weights = graph.weights
+        self._state = (graph, weights, index, version, landmarks)
+        self._restore_pair_pool()
+
+    def _load_landmarks(self, loader, graph, index, version):
+        """Landmark distances saved for this graph build, or computed (and saved) now."""
+        if not self.landmark_count:
+            return None
+        loader.set_phase("landmarks")
+        return get_or_build_landmarks(graph, count=self.landmark_count, index=index, version=version,
+                                      path=self._landmarks_path())
+
+    def _landmarks_path(self):
+        """Landmarks file: next to the shared graph in shared mode, so all workers map one copy."""
+        return os.path.join(self.shared_dir, SHARED_LANDMARKS_FILE) if self.shared_dir else LANDMARKS_CACHE_FILE
+
+    def rebuild(self):
+        """
+        Rebuild the graph (and edge weights) from the database. Once loaded, the
+        new graph is swapped in, republished to the shared files in shared mode
+        and pruned if configured; before the load, only the cache files are
+        rewritten for the load to read.
+        Returns True when other processes must be restarted to see the new graph:
+        in shared mode the other workers keep the files they mapped (the new file
+        is renamed over the old one under the shared directory's lock) and go on
+        answering from the old graph until they restart.
+        """
+        with self._rebuild_lock:
+            conn = self.connect()
+            try:
+                graph, version = rebuild_graph_cache(conn)
+            finally:
+                conn.close()
+            if not self.loader.ready:
+                return False
+            index = GraphIndex(graph)
+            landmarks = None
+            if self.landmark_count:
+                landmarks = Landmarks.build(graph, count=self.landmark_count, index=index, version=version)
+                path = self._landmarks_path()
+                with shared_dir_lock(os.path.dirname(path)):
+                    save_landmarks(landmarks, path)
+            weights = load_edge_weights(version)
+            if self.shared_dir:
+                shared_path = os.path.join(self.shared_dir, SHARED_GRAPH_FILE)
+                with shared_dir_lock(self.shared_dir):
+                    write_shared_graph(shared_path, graph, weights, version)
+                graph = SharedGraph(shared_path)
+                weights = graph.weights
+            elif self.prune_leaves:
+                graph = prune_leaves(graph, weights)
+                weights = graph.weights
+            self._state = (graph, weights, index, version, landmarks)
+            return bool(self.shared_dir)
+
+    # --- database and result cache ---
+
+    def connect(self):
+        """A new database connection (caller closes it); queries should use connection()."""
+        with STAGE_SECONDS["db_connect"].time():
+            return get_connection()
+
+    def connection(self):
+        """Context manager lending a pooled database connection."""
+        return self.db_pool.connection()
+
+    def cache_get(self, namespace, key, version=None):
+        if self.disk_cache is None:
+            return None
+        value = self.disk_cache.get(namespace, key, version=version)
+        if namespace in DISK_CACHE_HITS:
+            (DISK_CACHE_MISSES if value is None else DISK_CACHE_HITS)[namespace].inc()
+        return value
+
+    def cache_set(self, namespace, key, value, version=None, ttl=None):
+        if self.disk_cache is not None:
+            self.disk_cache.set(namespace, key, value, version=version, ttl=ttl)
+
+    # --- artists ---
+
+    def artist_names(self):
+        """Artist name store (id -> (name, gid)), loaded once on first use."""
+        if self._artist_cache is None:
+            with self._artist_cache_lock:
+                if self._artist_cache is None:
+                    self._artist_cache = self._load_artist_cache()
+        return self._artist_cache
+
+    def _lookup_artist(self, artist_id):
+        """(name, gid) from the database for artists missing in the cache."""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT name, gid FROM artist WHERE id = %s", (artist_id,))
+                row = cur.fetchone()
+        if row:
+            return row[0], row[1]
+        return f"<id:{artist_id}>", None
+
+    def resolve_artist(self, artist_id):
+        """(name, gid) from the artist cache, falling back to the database."""
+        name, gid = self.artist_names().get(artist_id, (None, None))
+        if name is None:
+            ARTIST_CACHE_MISSES.inc()
+            return self._lookup_artist(artist_id)
+        ARTIST_CACHE_HITS.inc()
+        return name, gid
+
+    def search(self, q, limit=10):
+        """
+        Artist search rows ({"id", "name", "gid", "release_count"}), read through
+        the disk cache and annotated with graph membership (see annotate).
+        """
+        # the query compares names case-insensitively, but surrounding spaces would change
+        # its matches: strip them once, for the cache key and the query alike
+        q = q.strip()
+        cache_key = f"{q.lower()}|{limit}"
+        result = self.cache_get("search", cache_key)
+        if result is None:
+            with self.connection() as conn, STAGE_SECONDS["search_query"].time():
+                rows = search_artists(conn, q, limit=limit)
+            result = [{
+                "id": int(aid),
+                "name": name,
+                "gid": str(gid) if gid is not None else None,
+                "release_count": int(release_count),
+            } for aid, name, gid, release_count in rows]
+            self.cache_set("search", cache_key, result, ttl=SEARCH_CACHE_TTL)
+        return self.annotate(result)
+
+    def annotate(self, rows):
+        """Add in_graph / degree / component / component_size to search rows (None until the graph is loaded)."""
+        index = self.index
+        for row in rows:
+            if index is not None:
+                row.update(index.describe(row["id"]))
+            else:
+                row.update({"in_graph": None, "degree": None, "component": None, "component_size": None})
+        return rows
+
+    def neighbors(self, artist_id, offset=0, limit=None):
+        """
+        (total, [(neighbor_id, track, weight), ...]): one page of an artist's
+        collaborators, heaviest collaborations first. The sorted row is kept (see
+        NEIGHBOR_CACHE_ROWS), so paging through a hub sorts it once; track names
+        are resolved for the returned page only.
+        """
+        graph, weights, index, _, _ = self._state
+        rows = None
+        with self._neighbors_lock:
+            cached = self._neighbor_rows.get(artist_id)
+            if cached is not None and cached[0] is graph:
+                self._neighbor_rows.move_to_end(artist_id)
+                rows = cached[1]
+        if rows is None:
+            rows = sorted_neighbor_rows(graph, weights, artist_id, degree=index.degree)
+            if len(rows) <= NEIGHBOR_CACHE_ROWS:
+                with self._neighbors_lock:
+                    dropped = self._neighbor_rows.pop(artist_id, None)
+                    if dropped is not None:
+                        self._neighbor_rows_total -= len(dropped[1])
+                    self._neighbor_rows[artist_id] = (graph, rows)
+                    self._neighbor_rows_total += len(rows)
+                    while self._neighbor_rows_total > NEIGHBOR_CACHE_ROWS:
+                        _, (_, old) = self._neighbor_rows.popitem(last=False)
+                        self._neighbor_rows_total -= len(old)
+        stop = len(rows) if limit is None else offset + limit
+        return len(rows), decode_tracks(graph, rows[offset:stop])
+
+    # --- paths ---
+
+    def estimate(self, source_id, target_id):
+        """
+        Instant bounds on the degrees of separation from landmark distances,
+        before any search: {"connected", "lower", "upper", "exact"}. connected is
+        False when the artists are in different components (no path exists);
+        upper is None when no landmark bounds the pair.
+        """
+        _, _, index, _, landmarks = self._state
+        if index.component(source_id) != index.component(target_id):
+            return {"connected": False, "lower": None, "upper": None, "exact": True}
+        lower, upper = landmarks.estimate(source_id, target_id) if landmarks is not None else \
+            ((0, 0) if source_id == target_id else (1, None))
+        if lower is None:
+            return {"connected": False, "lower": None, "upper": None, "exact": True}
+        return {"connected": True, "lower": lower, "upper": upper, "exact": lower == upper}
+
+    def _searched_edge_count(self):
+        graph = self.graph
+        searched = graph.core if isinstance(graph, PrunedGraph) else graph
+        if self._edge_count[0] is not searched:
+            self._edge_count = (searched, count_edges(searched))
+        return self._edge_count[1]
+
+    def find_path(self, source_id, target_id, ranked=False, **kwargs):
+        """
+        One shortest path [(artist_id, track), ...] with the configured search on the
+        loaded graph (plain dict, shared mmap or leaf-pruned). kwargs go to the
+        search: excluded_edges, stats, limits.
+        """
+        graph, weights, _, _, _ = self._state
+        if ranked:
+            search = ranked_bfs_with_tracks
+            kwargs["weights"] = weights
+        elif self.direction_optimizing:
+            search = direction_optimizing_bfs_with_tracks
+            kwargs["total_edges"] = self._searched_edge_count()
+        else:
+            search = bidirectional_bfs_with_tracks
+        if isinstance(graph, PrunedGraph):
+            return graph.find_path(source_id, target_id, search=search, **kwargs)
+        return search(graph, source_id, target_id, **kwargs)
+
+    def find_all_paths(self, source_id, target_id, excluded_edges=None, **kwargs):
+        """
+        PathDAG of every shortest route, reused from the recent-DAG cache when possible.
+        The cache holds DAGs up to DAG_CACHE_VISITED visited artists in total, least
+        recently used dropped first; a DAG bigger than that is not cached.
+        """
+        graph = self.graph
+        key = (source_id, target_id, frozenset(frozenset(e) for e in excluded_edges or ()))
+        with self._dags_lock:
+            cached = self._dags.get(key)
+            if cached is not None and cached[0] is graph:
+                self._dags.move_to_end(key)
+                return cached[1]
+        if isinstance(graph, PrunedGraph):
+            dag = graph.find_all_paths(source_id, target_id, excluded_edges=excluded_edges, **kwargs)
+        else:
+            dag = all_shortest_paths_bfs(graph, source_id, target_id, excluded_edges=excluded_edges, **kwargs)
+        if dag is not None and dag.visited <= DAG_CACHE_VISITED:
+            with self._dags_lock:
+                replaced = self._dags.pop(key, None)
+                if replaced is not None:
+                    self._dags_visited -= replaced[1].visited
+                self._dags[key] = (graph, dag)
+                self._dags_visited += dag.visited
+                while self._dags_visited > DAG_CACHE_VISITED:
+                    _, (_, dropped) = self._dags.popitem(last=False)
+                    self._dags_visited -= dropped.visited
+        return dag
+
+    def path(self, source_id, target_id, excluded_edges=None, ranked=False, all_routes=False,
+             route_offset=0, route_limit=10, limits=None):
+        """
+        Path result as a dict of raw (artist_id, track) routes: found, seconds,
+        degrees and path; with all_routes also route_count, route_offset and a page
+        of routes; gave_up and stats when a limit stopped the search. all_routes
+        always runs all_shortest_paths_bfs: ranked and the direction-optimizing
+        setting do not apply, and routes come in PathDAG order. Read through
+        the disk cache: hits have cached=True, seconds is the time the cache
+        lookup took and search_seconds the time of the original search. Searches
+        cut short are not cached. Found pairs without exclusions are counted as
+        trending.
+        """
+        version = self.version
+        route_offset = max(route_offset or 0, 0)
+        route_limit = max(1, min(route_limit or 1, MAX_ROUTES_PER_PAGE))
+        edges = sorted((min(a, b), max(a, b)) for a, b in excluded_edges or ())
+        if all_routes:
+            cache_key = json.dumps([source_id, target_id, edges, "all", route_offset, route_limit])
+        else:
+            cache_key = json.dumps([source_id, target_id, edges, "ranked" if ranked else "bfs"])
+
+        lookup_start = time.time()
+        result = self.cache_get("path", cache_key, version=version)
+        if result is not None:
+            result["search_seconds"] = result["seconds"]
+            result["seconds"] = time.time() - lookup_start
+            result["cached"] = True
+        else:
+            result = self._search_path(source_id, target_id, excluded_edges, ranked, all_routes,
+                                       route_offset, route_limit, limits)
+            if "gave_up" not in result:
+                self.cache_set("path", cache_key, result, version=version)
+        if result["found"] and not excluded_edges:
+            self.trending.record(source_id, target_id, result["path"])
+        return result
+
+    def _search_path(self, source_id, target_id, excluded_edges, ranked, all_routes,
+                     route_offset, route_limit, limits):
+        stats = {}
+        start = time.time()
+        if all_routes:
+            dag = self.find_all_paths(source_id, target_id, excluded_edges=excluded_edges, stats=stats,
+                                      limits=limits)
+            routes = list(dag.routes(route_offset, route_limit)) if dag is not None else []
+            path = dag.route(0) if dag is not None else None
+        else:
+            path = self.find_path(source_id, target_id, ranked=ranked, excluded_edges=excluded_edges,
+                                  stats=stats, limits=limits)
+        elapsed = time.time() - start
+        STAGE_SECONDS["bfs"].observe(elapsed)
+        BFS_NODES_EXPANDED.observe(stats.get("expanded", 0))
+        BFS_NODES_VISITED.observe(stats.get("visited", 0))
+
+        if not path:
+            result = {"found": False, "seconds": elapsed}
+            if "gave_up" in stats:
+                SEARCHES_GAVE_UP[stats["gave_up"]].inc()
+                result["gave_up"] = stats["gave_up"]
+                result["stats"] = stats
+            return result
+
+        result = {"found": True, "seconds": elapsed, "degrees": len(path), "path": path}
+        if all_routes:
+            result.update({"route_count": dag.route_count, "route_offset": route_offset, "routes": routes})
+        return result
+
+    # --- random and trending pairs ---
+
+    def pair_entry(self, source_id, target_id, path, **fields):
+        """JSON bytes of one random / trending pair: source, target, degrees and the full-format path."""
+        return encode_object(dict(fields, degrees=len(path)), {
+            "source": self.fragments.get(source_id)[2],
+            "target": self.fragments.get(target_id)[2],
+            "path": encode_hops(self.fragments, source_id, path),
+        })
+
+    def random_pair(self):
+        """A precomputed pair entry (JSON bytes), or None while the pool is empty."""
+        return self.pair_pool.random()
+
+    def trending_pairs(self, limit=10):
+        """JSON bytes entries of the most requested pairs, with a requests count each."""
+        return [self.pair_entry(source_id, target_id, path, requests=count)
+                for source_id, target_id, path, count in self.trending.top(limit)]
+
+    def _sampler_graph(self):
+        if not self.loader.ready:
+            return None
+        graph = self.graph
+        return graph.core if isinstance(graph, PrunedGraph) else graph
+
+    def _sampled_pair(self, source_id, target_id, path):
+        artist_cache = self._artist_cache
+        if artist_cache is None:
+            return None  # lazy mode: do not force the artist cache load from the sampler
+        # only pairs whose names are all cached, so the sampler never queries the database
+        if artist_cache.get(source_id) is None or any(artist_cache.get(n) is None for n, _ in path):
+            return None
+        return self.pair_entry(source_id, target_id, path)
+
+    def _restore_pair_pool(self):
+        """Start from the pool saved for this graph build, if any."""
+        saved = self.cache_get("pairs", "pool", version=self.version)
+        if saved:
+            self.pair_pool.extend(saved[:self.pair_pool.size])
+
+    def _save_pair_pool(self, pool):
+        now = time.time()
+        if now - self._pair_pool_saved_at >= PAIR_POOL_SAVE_SECONDS:
+            self._pair_pool_saved_at = now
+            self.cache_set("pairs", "pool", pool.entries(), version=self.version)
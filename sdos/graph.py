@@ -1,25 +1,37 @@
 import os
+import uuid
 import pickle
+import struct
+from array import array
 from collections import defaultdict
 
 GRAPH_CACHE_FILE = 'data/processed/collaboration_graph.pkl'
 ARTIST_CACHE_FILE = 'data/processed/artist_lookup.pkl'
+EDGE_WEIGHT_CACHE_FILE = 'data/processed/edge_weights.pkl'
 
-def build_collaboration_graph(conn):
-    """Build graph of collaborations with filtering logic."""
+# Filter rules for the graph build (shared by the Postgres and the dump builder, sdos/mbdump.py)
+UNWANTED_TYPES = ['Compilation', 'DJ-mix', 'Audiobook', 'Audio drama',
+                  'Field recording', 'Interview', 'Live']
+UNWANTED_STATUSES = ['Bootleg', 'Pseudo-Release']
+VS_JOIN_PHRASE = 'vs'  # matched anywhere in a recording credit's join phrases, case-insensitive
+BAD_RELEASE_ARTISTS = ['various artists', '[unknown]']
+NO_LABEL = '[no label]'
+
+# Cache files start with the build id of their graph (magic + uint16 length + ascii)
+BUILD_ID_MAGIC = b'SDOSBID1'
+
+def build_collaboration_graph(conn, edge_counts=None):
+    """
+    Build graph of collaborations with filtering logic.
+    If an edge_counts dict is given it is filled with the number of distinct
+    recordings shared by each artist pair (keyed by the sorted id tuple).
+    """
     print("Building collaboration graph...")
-    graph = defaultdict(list)
-    edge_seen = set()
-
-    unwanted_types = ['Compilation', 'DJ-mix', 'Audiobook', 'Audio drama',
-                      'Field recording', 'Interview', 'Live']
-    unwanted_types_lower = [t.lower() for t in unwanted_types]
-    
-    unwanted_statuses = ['Bootleg', 'Pseudo-Release']
-    unwanted_statuses_lower = [s.lower() for s in unwanted_statuses]
-    
-    vs_pattern = '%vs%'
-    bad_release_artists = ['various artists', '[unknown]']
+
+    unwanted_types_lower = [t.lower() for t in UNWANTED_TYPES]
+    unwanted_statuses_lower = [s.lower() for s in UNWANTED_STATUSES]
+    vs_pattern = f'%{VS_JOIN_PHRASE}%'
+    bad_release_artists = BAD_RELEASE_ARTISTS
 
     with conn.cursor() as cur:
         cur.itersize = 10000  
@@ -39,7 +51,7 @@ def build_collaboration_graph(conn):
             JOIN release_group rg ON rel.release_group = rg.id
             LEFT JOIN release_status rs ON rel.status = rs.id
             WHERE l.name IS NOT NULL
-              AND LOWER(TRIM(l.name)) != '[no label]'
+              AND LOWER(TRIM(l.name)) != %s
               AND NOT EXISTS (
                 SELECT 1
                 FROM artist_credit_name rc
@@ -70,34 +82,91 @@ def build_collaboration_graph(conn):
             HAVING COUNT(DISTINCT acn.artist) > 1
         """
         
-        cur.execute(sql, (bad_release_artists, unwanted_types_lower,
+        cur.execute(sql, (NO_LABEL, bad_release_artists, unwanted_types_lower,
                           unwanted_types_lower, vs_pattern, unwanted_statuses_lower))
 
-        for rec_id, rec_name, artist_ids in cur:
-            for i in range(len(artist_ids)):
-                for j in range(i + 1, len(artist_ids)):
-                    a1, a2 = artist_ids[i], artist_ids[j]
-                    if a1 == a2:
-                        continue
-                    key = tuple(sorted((a1, a2)))
-                    if key not in edge_seen:
-                        graph[a1].append((a2, rec_name))
-                        graph[a2].append((a1, rec_name))
-                        edge_seen.add(key)
+        graph = build_graph_from_recordings(cur, edge_counts=edge_counts)
 
     print(f"Graph built with {len(graph)} artists")
     return graph
 
-def save_graph_to_cache(graph):
+def build_graph_from_recordings(rows, edge_counts=None):
+    """
+    Turn (recording_id, recording_name, artist_ids) rows into the adjacency dict.
+    The first recording seen for an artist pair labels the edge; edge_counts (if given)
+    receives the number of recordings per pair.
+    """
+    graph = defaultdict(list)
+    edge_seen = {} if edge_counts is None else edge_counts
+
+    for rec_id, rec_name, artist_ids in rows:
+        # artist_ids can repeat (one row per track/release), count each pair once per recording
+        rec_pairs = set()
+        for i in range(len(artist_ids)):
+            for j in range(i + 1, len(artist_ids)):
+                a1, a2 = artist_ids[i], artist_ids[j]
+                if a1 == a2:
+                    continue
+                key = tuple(sorted((a1, a2)))
+                if key in rec_pairs:
+                    continue
+                rec_pairs.add(key)
+                if key not in edge_seen:
+                    graph[a1].append((a2, rec_name))
+                    graph[a2].append((a1, rec_name))
+                    edge_seen[key] = 1
+                else:
+                    edge_seen[key] += 1
+
+    return graph
+
+def new_build_id():
+    """A fresh id for a newly built or imported graph; everything derived from the graph is tagged with it."""
+    return uuid.uuid4().hex
+
+def _write_build_id(f, build_id):
+    raw = build_id.encode('ascii')
+    f.write(BUILD_ID_MAGIC + struct.pack('<H', len(raw)) + raw)
+
+def _read_build_id(f):
+    """Build id at the start of an open cache file (left positioned after it), None for older files."""
+    if f.read(len(BUILD_ID_MAGIC)) != BUILD_ID_MAGIC:
+        f.seek(0)
+        return None
+    (length,) = struct.unpack('<H', f.read(2))
+    return f.read(length).decode('ascii')
+
+def _legacy_build_id(path):
+    """Stand-in id for a graph cache written before build ids: changes whenever the file is rewritten."""
+    st = os.stat(path)
+    return f"legacy-{st.st_size}-{st.st_mtime_ns}"
+
+def save_graph_to_cache(graph, build_id=None):
+    """Pickle the graph behind its build id (a new one unless given); returns the build id."""
+    build_id = build_id or new_build_id()
     os.makedirs('data/processed', exist_ok=True)
     with open(GRAPH_CACHE_FILE, 'wb') as f:
+        _write_build_id(f, build_id)
         pickle.dump(graph, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return build_id
+
+def load_graph_and_build_id():
+    """(graph, build_id) from the cache file, or (None, None) when there is none."""
+    if not os.path.exists(GRAPH_CACHE_FILE):
+        return None, None
+    with open(GRAPH_CACHE_FILE, 'rb') as f:
+        build_id = _read_build_id(f) or _legacy_build_id(GRAPH_CACHE_FILE)
+        return pickle.load(f), build_id
 
 def load_graph_from_cache():
+    return load_graph_and_build_id()[0]
+
+def graph_cache_build_id():
+    """Build id of the cached graph without loading it, or None when there is no cache file."""
     if not os.path.exists(GRAPH_CACHE_FILE):
         return None
     with open(GRAPH_CACHE_FILE, 'rb') as f:
-        return pickle.load(f)
+        return _read_build_id(f) or _legacy_build_id(GRAPH_CACHE_FILE)
 
 def build_artist_name_cache(conn):
     cache = {}
@@ -105,9 +174,13 @@ def build_artist_name_cache(conn):
         cur.execute("SELECT id, name, gid FROM artist")
         for artist_id, name, gid in cur:
             cache[artist_id] = (name, gid)
+    save_artist_name_cache(cache)
+    return cache
+
+def save_artist_name_cache(cache):
+    os.makedirs('data/processed', exist_ok=True)
     with open(ARTIST_CACHE_FILE, 'wb') as f:
         pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
-    return cache
 
 def load_artist_name_cache():
     if not os.path.exists(ARTIST_CACHE_FILE):
@@ -115,11 +188,58 @@ def load_artist_name_cache():
     with open(ARTIST_CACHE_FILE, 'rb') as f:
         return pickle.load(f)
 
+def build_edge_weights(graph, edge_counts=None):
+    """
+    Compact per-edge weights: dict[artist_id] -> array('I') aligned with graph[artist_id].
+    The weight is the number of recordings the pair shares (from edge_counts);
+    without counts the neighbor's degree is used instead.
+    Higher weight means a better known collaboration.
+    """
+    weights = {}
+    for artist_id, neighbors in graph.items():
+        if edge_counts is not None:
+            row = array('I', (edge_counts.get((artist_id, n) if artist_id < n else (n, artist_id), 1)
+                              for n, _ in neighbors))
+        else:
+            row = array('I', (len(graph.get(n, ())) for n, _ in neighbors))
+        weights[artist_id] = row
+    return weights
+
+def save_edge_weights_to_cache(weights, build_id):
+    """Pickle the weights behind the build id of the graph they are aligned with."""
+    os.makedirs('data/processed', exist_ok=True)
+    with open(EDGE_WEIGHT_CACHE_FILE, 'wb') as f:
+        _write_build_id(f, build_id)
+        pickle.dump(weights, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def load_edge_weights(build_id=None):
+    """
+    Cached edge weights, or None. With a build_id, weights saved for another
+    graph are dropped: they are aligned by position only, so a mismatch would
+    give every edge some other edge's weight.
+    """
+    if not os.path.exists(EDGE_WEIGHT_CACHE_FILE):
+        return None
+    with open(EDGE_WEIGHT_CACHE_FILE, 'rb') as f:
+        saved_id = _read_build_id(f)
+        # files from before build ids can only belong to a graph from before build ids
+        if build_id is not None and saved_id != build_id and \
+                not (saved_id is None and build_id.startswith('legacy-')):
+            print(f"⚠️ Ignoring {EDGE_WEIGHT_CACHE_FILE}: saved for graph build {saved_id}, not {build_id}")
+            return None
+        return pickle.load(f)
+
+def rebuild_graph_cache(conn):
+    """Build the graph and its edge weights from the database and save both; returns (graph, build_id)."""
+    edge_counts = {}
+    graph = build_collaboration_graph(conn, edge_counts=edge_counts)
+    build_id = save_graph_to_cache(graph)
+    save_edge_weights_to_cache(build_edge_weights(graph, edge_counts), build_id)
+    return graph, build_id
+
 def get_or_build_graph(conn, force_rebuild=False):
     if not force_rebuild:
         graph = load_graph_from_cache()
         if graph is not None:
             return graph
-    graph = build_collaboration_graph(conn)
-    save_graph_to_cache(graph)
-    return graph
+    return rebuild_graph_cache(conn)[0]
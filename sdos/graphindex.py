@@ -0,0 +1,118 @@
+# sdos/graphindex.py
+# Dense per-artist index over the collaboration graph: degree and connected
+# component of every artist, so search results can be annotated without touching
+# the adjacency lists, plus the weight-sorted neighbor listing.
+
+from array import array
+from collections import deque
+
+from sdos.prune import PrunedGraph
+
+NO_COMPONENT = 0xFFFFFFFF
+
+
+class GraphIndex:
+    """
+    degree and component id per artist id, in arrays indexed directly by id
+    (like the shared graph's offsets). Components are numbered by size, so
+    component 0 is the largest one. Artists that are not in the graph have
+    degree 0 and no component.
+    Build it from the full graph (before leaf pruning) so degrees are the real ones.
+    """
+
+    def __init__(self, graph):
+        n_slots = max(graph, default=-1) + 1
+        self.degrees = array('I', bytes(4 * n_slots))
+        labels = array('I', [NO_COMPONENT]) * n_slots
+        sizes = []
+
+        for start in graph:
+            if labels[start] != NO_COMPONENT:
+                continue
+            label = len(sizes)
+            labels[start] = label
+            size = 0
+            queue = deque([start])
+            while queue:
+                node = queue.popleft()
+                size += 1
+                neighbors = graph.get(node, ())
+                self.degrees[node] = len(neighbors)
+                for neighbor, _ in neighbors:
+                    if labels[neighbor] == NO_COMPONENT:
+                        labels[neighbor] = label
+                        queue.append(neighbor)
+            sizes.append(size)
+
+        # renumber by size (largest first)
+        order = sorted(range(len(sizes)), key=lambda c: -sizes[c])
+        rank = array('I', bytes(4 * len(sizes)))
+        for new, old in enumerate(order):
+            rank[old] = new
+        for i, label in enumerate(labels):
+            if label != NO_COMPONENT:
+                labels[i] = rank[label]
+        self.components = labels
+        self.component_sizes = [sizes[old] for old in order]
+
+    def __contains__(self, artist_id):
+        return 0 <= artist_id < len(self.components) and self.components[artist_id] != NO_COMPONENT
+
+    def degree(self, artist_id):
+        return self.degrees[artist_id] if artist_id in self else 0
+
+    def component(self, artist_id):
+        return self.components[artist_id] if artist_id in self else None
+
+    def describe(self, artist_id):
+        """{"in_graph", "degree", "component", "component_size"} for one artist."""
+        if artist_id not in self:
+            return {"in_graph": False, "degree": 0, "component": None, "component_size": 0}
+        component = self.components[artist_id]
+        return {
+            "in_graph": True,
+            "degree": self.degrees[artist_id],
+            "component": component,
+            "component_size": self.component_sizes[component],
+        }
+
+
+def neighbors_by_weight(graph, weights, artist_id, degree=None):
+    """
+    [(neighbor_id, track, weight), ...] for one artist, heaviest collaboration
+    first (ties by neighbor id). Without weights the neighbor's degree is used,
+    as in build_edge_weights; degree(artist_id) overrides the adjacency length
+    (needed for a PrunedGraph, whose core rows are shorter).
+    """
+    return decode_tracks(graph, sorted_neighbor_rows(graph, weights, artist_id, degree=degree))
+
+
+def sorted_neighbor_rows(graph, weights, artist_id, degree=None):
+    """
+    The rows of neighbors_by_weight with the tracks still as the graph stores
+    them (track indices for a SharedGraph), so a page of them can be decoded
+    with decode_tracks without resolving every name of a hub.
+    """
+    if degree is None:
+        degree = lambda n: len(graph.get(n, ()))
+    if isinstance(graph, PrunedGraph):
+        rows = graph.neighbors(artist_id)
+    else:
+        neighbors = graph.get(artist_id, ())
+        row = weights.get(artist_id) if weights is not None else None
+        if row is not None and len(row) != len(neighbors):
+            row = None
+        rows = [(neighbor, track, row[i] if row is not None else None)
+                for i, (neighbor, track) in enumerate(neighbors)]
+    rows = [(neighbor, track, weight if weight is not None else degree(neighbor))
+            for neighbor, track, weight in rows]
+    rows.sort(key=lambda r: (-r[2], r[0]))
+    return rows
+
+
+def decode_tracks(graph, rows):
+    """rows from sorted_neighbor_rows with track names (SharedGraph rows hold track indices)."""
+    track_name = getattr(graph, 'track_name', None)
+    if track_name is None:
+        return rows
+    return [(neighbor, track_name(track), weight) for neighbor, track, weight in rows]
@@ -0,0 +1,190 @@
+# sdos/landmarks.py
+# Landmark distance estimates: hop distances from a few hub artists to every
+# artist, precomputed once per graph, give instant lower and upper bounds on the
+# degrees of separation of any pair before the real search runs. By the triangle
+# inequality, for every landmark L
+#     |d(s, L) - d(t, L)| <= d(s, t) <= d(s, L) + d(L, t)
+#
+# The distances are saved to a file that every worker maps read-only, so the OS
+# page cache holds one copy for all of them (like sdos/shared_graph.py).
+# File layout (little endian):
+#   header   : magic + count asked for, n_landmarks, n_slots, build id (zero padded to 64 bytes)
+#   landmarks: uint32[n_landmarks], padded to 8 bytes
+#   distances: n_landmarks rows of uint8[n_slots]
+
+import os
+import mmap
+import struct
+from array import array
+
+from sdos.shared_graph import shared_dir_lock
+
+LANDMARKS_CACHE_FILE = 'data/processed/landmarks.bin'
+SHARED_LANDMARKS_FILE = 'landmarks.bin'
+LANDMARKS_MAGIC = b'SDOSL001'
+
+UNREACHED = 255  # distances are stored in one byte; collaboration paths are far shorter
+
+_HEADER = struct.Struct('<8s3Q64s')
+
+
+def _bfs_distances(graph, source, n_slots):
+    """array('B') of hop distances from source, indexed by artist id (UNREACHED if not connected)."""
+    distances = array('B', [UNREACHED]) * n_slots
+    distances[source] = 0
+    frontier = [source]
+    depth = 0
+    while frontier and depth < UNREACHED - 1:
+        depth += 1
+        next_frontier = []
+        for node in frontier:
+            for neighbor, _ in graph.get(node, ()):
+                if distances[neighbor] == UNREACHED:
+                    distances[neighbor] = depth
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return distances
+
+
+def pick_landmarks(graph, count, index=None):
+    """
+    The count highest-degree artists, skipping direct collaborators of hubs
+    already picked (they would give nearly the same distances). With a
+    GraphIndex, the largest components (up to half of count) first get their
+    biggest hub each, so pairs outside the main component get bounds too.
+    """
+    degree = index.degree if index is not None else (lambda a: len(graph.get(a, ())))
+    by_degree = sorted(graph, key=lambda a: -degree(a))
+    picked = []
+    if index is not None:
+        n_seeds = min(max(1, count // 2), len(index.component_sizes))
+        seen = set()
+        for artist_id in by_degree:
+            component = index.component(artist_id)
+            if component < n_seeds and component not in seen:
+                seen.add(component)
+                picked.append(artist_id)
+                if len(seen) == n_seeds:
+                    break
+    covered = set(picked)
+    for hub in picked:
+        covered.update(n for n, _ in graph.get(hub, ()))
+    for artist_id in by_degree:
+        if len(picked) >= count:
+            break
+        if artist_id in covered:
+            continue
+        picked.append(artist_id)
+        covered.add(artist_id)
+        covered.update(n for n, _ in graph.get(artist_id, ()))
+    return picked
+
+
+class Landmarks:
+    """
+    Hop distances from each landmark artist to every artist, one dense row of
+    bytes per landmark indexed by artist id (array('B') when built, a view of
+    the mapped file when loaded). estimate() combines them into bounds in a few
+    microseconds.
+    """
+
+    def __init__(self, landmarks, distances, version=None, count=None, mm=None):
+        self.landmarks = list(landmarks)
+        self.distances = list(distances)
+        self.version = version
+        self.count = count if count is not None else len(self.landmarks)  # landmarks asked for
+        self._mm = mm  # keeps the mapped file open while the rows are in use
+
+    @classmethod
+    def build(cls, graph, count=16, index=None, version=None):
+        """One BFS per landmark over the (unpruned) graph."""
+        n_slots = max(graph, default=-1) + 1
+        landmarks = pick_landmarks(graph, count, index=index)
+        return cls(landmarks, [_bfs_distances(graph, l, n_slots) for l in landmarks], version=version, count=count)
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    def estimate(self, source_id, target_id):
+        """
+        (lower, upper) bounds on the hops between two artists. upper is None when
+        no landmark reaches both; (None, None) means some landmark proves they are
+        not connected at all.
+        """
+        if source_id == target_id:
+            return 0, 0
+        lower = 1
+        upper = None
+        for distances in self.distances:
+            if source_id >= len(distances) or target_id >= len(distances):
+                continue
+            ds = distances[source_id]
+            dt = distances[target_id]
+            if ds == UNREACHED and dt == UNREACHED:
+                continue
+            if ds == UNREACHED or dt == UNREACHED:
+                return None, None  # one side is in the landmark's component, the other is not
+            if ds + dt < (upper if upper is not None else UNREACHED * 2):
+                upper = ds + dt
+            if abs(ds - dt) > lower:
+                lower = abs(ds - dt)
+        return lower, upper
+
+
+def save_landmarks(landmarks, path=LANDMARKS_CACHE_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    n_slots = max((len(d) for d in landmarks.distances), default=0)
+    # written aside and renamed, so a worker loading at the same time never reads half a file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(LANDMARKS_MAGIC, landmarks.count, len(landmarks), n_slots,
+                             (landmarks.version or '').encode('ascii')))
+        ids = array('I', landmarks.landmarks)
+        ids.tofile(f)
+        f.write(bytes(-f.tell() % 8))
+        for distances in landmarks.distances:
+            f.write(bytes(distances))
+    os.replace(tmp_path, path)
+
+
+def load_landmarks(version=None, path=LANDMARKS_CACHE_FILE):
+    """Landmarks mapped from the file when it was saved for this graph build, or None."""
+    try:
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):  # missing or empty
+        return None
+    if len(mm) < _HEADER.size or mm[:len(LANDMARKS_MAGIC)] != LANDMARKS_MAGIC:
+        mm.close()
+        return None
+    _, count, n_landmarks, n_slots, saved_version = _HEADER.unpack_from(mm, 0)
+    saved_version = saved_version.rstrip(b'\0').decode('ascii') or None
+    if version is not None and saved_version != version:
+        mm.close()
+        return None
+    view = memoryview(mm)
+    pos = _HEADER.size
+    landmarks = view[pos:pos + 4 * n_landmarks].cast('I').tolist()
+    pos += 4 * n_landmarks
+    pos += -pos % 8
+    distances = [view[pos + i * n_slots:pos + (i + 1) * n_slots] for i in range(n_landmarks)]
+    return Landmarks(landmarks, distances, version=saved_version, count=count, mm=mm)
+
+
+def get_or_build_landmarks(graph, count=16, index=None, version=None, path=LANDMARKS_CACHE_FILE):
+    """
+    Landmarks from the file at path when they match this graph build (and count),
+    else built and saved first. Building happens under the lock of the file's
+    directory, so when several workers start at once one runs the BFSes and the
+    others wait and map its file.
+    """
+    landmarks = load_landmarks(version=version, path=path)
+    if landmarks is not None and landmarks.count == count:
+        return landmarks
+    with shared_dir_lock(os.path.dirname(path) or '.'):
+        landmarks = load_landmarks(version=version, path=path)
+        if landmarks is not None and landmarks.count == count:
+            return landmarks
+        built = Landmarks.build(graph, count=count, index=index, version=version)
+        save_landmarks(built, path)
+    return load_landmarks(version=version, path=path) or built
@@ -0,0 +1,171 @@
+# sdos/loader.py
+# Single-flight background loader with phases, readiness and ETA reporting
+
+import os
+import json
+import time
+import threading
+
+LOAD_TIMINGS_FILE = 'data/processed/load_timings.json'
+
+IDLE = 'idle'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class Loader:
+    """
+    Runs load_fn(loader) in one background thread at a time. Any number of callers
+    can wait() on the in-flight load; a second load is never started while one runs.
+    load_fn reports progress by calling loader.set_phase(name) before each step.
+    Durations of each phase are remembered in LOAD_TIMINGS_FILE to estimate the ETA
+    of the next cold start.
+    After a failed load, start() refuses to retry for retry_seconds, doubling
+    with every failure in a row up to max_retry_seconds, so requests during an
+    outage do not each start another load.
+    """
+
+    def __init__(self, load_fn, phases, timings_file=LOAD_TIMINGS_FILE, retry_seconds=1.0,
+                 max_retry_seconds=60.0):
+        self._load_fn = load_fn
+        self.phases = list(phases)
+        self._timings_file = timings_file
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.failures = 0  # failed loads in a row
+        self._cond = threading.Condition()
+        self._thread = None
+        self.phase = IDLE
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._phase_started_at = None
+        self._durations = {}
+        self._previous = self._read_timings()
+
+    def _read_timings(self):
+        try:
+            with open(self._timings_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_timings(self):
+        try:
+            os.makedirs(os.path.dirname(self._timings_file) or '.', exist_ok=True)
+            with open(self._timings_file, 'w') as f:
+                json.dump(self._durations, f)
+        except OSError:
+            pass
+
+    @property
+    def ready(self):
+        return self.phase == READY
+
+    @property
+    def loading(self):
+        return self._thread is not None and self.phase not in (READY, FAILED)
+
+    @property
+    def retry_at(self):
+        """Time from which a failed load may be retried (None unless failed)."""
+        if self.phase != FAILED:
+            return None
+        delay = min(self.retry_seconds * 2 ** (self.failures - 1), self.max_retry_seconds)
+        return self.finished_at + delay
+
+    def start(self):
+        """
+        Start loading unless a load is running, already done or failed too
+        recently (see retry_at). Returns True if a load was started.
+        """
+        with self._cond:
+            if self.loading or self.phase == READY:
+                return False
+            if self.phase == FAILED and time.time() < self.retry_at:
+                return False
+            self.phase = self.phases[0] if self.phases else IDLE
+            self.error = None
+            self.started_at = self._phase_started_at = time.time()
+            self.finished_at = None
+            self._durations = {}
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self):
+        try:
+            self._load_fn(self)
+        except Exception as e:
+            print("Background loader error:", e)
+            self._finish(FAILED, e)
+        else:
+            self._finish(READY, None)
+
+    def _close_phase(self, now):
+        if self.phase in self.phases:
+            self._durations[self.phase] = now - self._phase_started_at
+
+    def set_phase(self, phase):
+        with self._cond:
+            if phase == self.phase:
+                return
+            now = time.time()
+            self._close_phase(now)
+            self.phase = phase
+            self._phase_started_at = now
+            self._cond.notify_all()
+
+    def _finish(self, phase, error):
+        with self._cond:
+            now = time.time()
+            self._close_phase(now)
+            if phase == READY:
+                # saved before waiters wake up, so a process started right after sees them
+                self._previous = dict(self._durations)
+                self._write_timings()
+            self.phase = phase
+            self.error = error
+            self.finished_at = now
+            self.failures = self.failures + 1 if phase == FAILED else 0
+            self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        """Start the load if needed and block until it finishes. Returns True when ready."""
+        self.start()
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self.loading:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self.phase == READY
+
+    def eta_seconds(self):
+        """Estimated seconds until ready, from the previous load's phase durations (None if unknown)."""
+        if self.phase == READY:
+            return 0.0
+        if not self.loading or self.phase not in self.phases:
+            return None
+        idx = self.phases.index(self.phase)
+        remaining = self.phases[idx:]
+        if any(p not in self._previous for p in remaining):
+            return None
+        in_phase = time.time() - self._phase_started_at
+        eta = sum(self._previous[p] for p in remaining) - in_phase
+        return round(max(eta, 0.0), 1)
+
+    def status(self):
+        now = time.time()
+        end = self.finished_at or now
+        retry_at = self.retry_at
+        return {
+            "phase": self.phase,
+            "ready": self.ready,
+            "error": str(self.error) if self.error else None,
+            "elapsed_seconds": round(end - self.started_at, 3) if self.started_at else None,
+            "eta_seconds": self.eta_seconds(),
+            "phase_seconds": {p: round(d, 3) for p, d in self._durations.items()},
+            "retry_in_seconds": round(max(retry_at - now, 0.0), 1) if retry_at is not None else None,
+        }
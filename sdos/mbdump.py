@@ -0,0 +1,220 @@
+# sdos/mbdump.py
+# Build the collaboration graph straight from the MusicBrainz dump table files
+# (the mbdump/ directory of mbdump.tar.bz2), without importing them into Postgres.
+#
+# The filter rules are the ones of build_collaboration_graph. The join is done as
+# a chain of streaming passes, smallest tables first: each pass reads one table
+# once and keeps only id bit maps (1 bit per id) or small sets, except for the
+# artist lists of multi-artist credits. The big tables (track, recording) are
+# never held in memory.
+
+import os
+import re
+import bz2
+import gzip
+from array import array
+
+from sdos.graph import (
+    build_graph_from_recordings,
+    UNWANTED_TYPES,
+    UNWANTED_STATUSES,
+    VS_JOIN_PHRASE,
+    BAD_RELEASE_ARTISTS,
+    NO_LABEL,
+)
+
+# Column positions in the dump files (PostgreSQL COPY text format, no header),
+# following the MusicBrainz schema's column order.
+COLUMNS = {
+    'artist': {'id': 0, 'gid': 1, 'name': 2},
+    'artist_credit_name': {'artist_credit': 0, 'position': 1, 'artist': 2, 'name': 3, 'join_phrase': 4},
+    'recording': {'id': 0, 'name': 2, 'artist_credit': 3},
+    'track': {'recording': 2, 'medium': 3},
+    'medium': {'id': 0, 'release': 1},
+    'release': {'id': 0, 'artist_credit': 3, 'release_group': 4, 'status': 5},
+    'release_status': {'id': 0, 'name': 1},
+    'release_label': {'release': 1, 'label': 2},
+    'label': {'id': 0, 'name': 2},
+    'release_group': {'id': 0, 'type': 4},
+    'release_group_primary_type': {'id': 0, 'name': 1},
+    'release_group_secondary_type': {'id': 0, 'name': 1},
+    'release_group_secondary_type_join': {'release_group': 0, 'secondary_type': 1},
+}
+
+_ESCAPES = {'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v', '\\': '\\'}
+_ESCAPE_RE = re.compile(r'\\(.)')
+
+
+def _unescape(field):
+    if field == '\\N':
+        return None
+    if '\\' in field:
+        return _ESCAPE_RE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), field)
+    return field
+
+
+def _open_table(dump_dir, table):
+    """Open mbdump/<table>, or a .gz / .bz2 compressed copy of it, as text."""
+    path = os.path.join(dump_dir, table)
+    if os.path.exists(path):
+        return open(path, encoding='utf-8', newline='\n')
+    if os.path.exists(path + '.bz2'):
+        return bz2.open(path + '.bz2', 'rt', encoding='utf-8', newline='\n')
+    if os.path.exists(path + '.gz'):
+        return gzip.open(path + '.gz', 'rt', encoding='utf-8', newline='\n')
+    raise FileNotFoundError(f"dump table {table!r} not found in {dump_dir}")
+
+
+def read_table(dump_dir, table, *columns):
+    """Yield a tuple of the named columns (str or None, unescaped) for every row of a dump table."""
+    positions = [COLUMNS[table][c] for c in columns]
+    max_split = max(positions) + 1
+    with _open_table(dump_dir, table) as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t', max_split)
+            yield tuple(_unescape(fields[p]) for p in positions)
+
+
+class IdSet:
+    """Set of non-negative integer ids stored as a growable bit map."""
+
+    def __init__(self):
+        self._bits = bytearray()
+
+    def add(self, i):
+        byte = i >> 3
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(byte + 1 - len(self._bits) + (len(self._bits) >> 1)))
+        self._bits[byte] |= 1 << (i & 7)
+
+    def __contains__(self, i):
+        byte = i >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] >> (i & 7) & 1)
+
+    def __len__(self):
+        return bin(int.from_bytes(self._bits, 'little')).count('1')
+
+
+def _norm(name):
+    # LOWER(TRIM(name)) as in the SQL filters
+    return name.strip(' ').lower() if name is not None else None
+
+
+def _ids_with_names(dump_dir, table, names):
+    names = {n.lower() for n in names}
+    return {int(i) for i, name in read_table(dump_dir, table, 'id', 'name')
+            if name is not None and name.lower() in names}
+
+
+def iter_dump_recordings(dump_dir, log=print):
+    """
+    Yield (recording_id, recording_name, artist_ids) for every recording that
+    passes the build filters, like the rows of build_collaboration_graph's query.
+    """
+    unwanted_types = [t.lower() for t in UNWANTED_TYPES]
+
+    log("  release groups...")
+    bad_primary = _ids_with_names(dump_dir, 'release_group_primary_type', unwanted_types)
+    bad_secondary = _ids_with_names(dump_dir, 'release_group_secondary_type', unwanted_types)
+    bad_statuses = _ids_with_names(dump_dir, 'release_status', UNWANTED_STATUSES)
+    bad_groups = IdSet()
+    for group, secondary in read_table(dump_dir, 'release_group_secondary_type_join',
+                                       'release_group', 'secondary_type'):
+        if int(secondary) in bad_secondary:
+            bad_groups.add(int(group))
+    for group, group_type in read_table(dump_dir, 'release_group', 'id', 'type'):
+        if group_type is not None and int(group_type) in bad_primary:
+            bad_groups.add(int(group))
+
+    log("  labels...")
+    good_labels = IdSet()
+    for label, name in read_table(dump_dir, 'label', 'id', 'name'):
+        if name is not None and _norm(name) != NO_LABEL:
+            good_labels.add(int(label))
+    labelled_releases = IdSet()
+    for release, label in read_table(dump_dir, 'release_label', 'release', 'label'):
+        if label is not None and int(label) in good_labels:
+            labelled_releases.add(int(release))
+    del good_labels
+
+    log("  artist credits...")
+    bad_release_artists = set(BAD_RELEASE_ARTISTS)
+    bad_credits = IdSet()  # credits naming e.g. "Various Artists"
+    vs_credits = IdSet()
+    # the first credited artist of every credit goes in dense arrays indexed by credit id;
+    # only credits with a second name get a (position, artist) list
+    first_artist = array('I')
+    first_position = array('I')
+    members = {}
+    for credit, position, artist, name, join_phrase in read_table(
+            dump_dir, 'artist_credit_name', 'artist_credit', 'position', 'artist', 'name', 'join_phrase'):
+        credit, position, artist = int(credit), int(position), int(artist)
+        if _norm(name) in bad_release_artists:
+            bad_credits.add(credit)
+        if join_phrase and VS_JOIN_PHRASE in join_phrase.lower():
+            vs_credits.add(credit)
+        if credit >= len(first_artist):
+            grow = credit + 1 - len(first_artist) + (len(first_artist) >> 1)
+            first_artist.extend(array('I', bytes(4 * grow)))
+            first_position.extend(array('I', bytes(4 * grow)))
+        if not first_artist[credit]:
+            first_artist[credit] = artist
+            first_position[credit] = position
+        elif credit in members:
+            members[credit].append((position, artist))
+        else:
+            members[credit] = [(first_position[credit], first_artist[credit]), (position, artist)]
+    del first_artist, first_position
+    # only credits with more than one distinct artist can produce edges
+    multi_artist = {}
+    for credit, credited in members.items():
+        if len({a for _, a in credited}) > 1:
+            multi_artist[credit] = [a for _, a in sorted(credited)]
+    del members
+
+    log("  releases...")
+    good_releases = IdSet()
+    for release, credit, group, status in read_table(dump_dir, 'release', 'id', 'artist_credit',
+                                                     'release_group', 'status'):
+        release = int(release)
+        if release not in labelled_releases:
+            continue
+        if int(credit) in bad_credits or int(group) in bad_groups:
+            continue
+        if status is not None and int(status) in bad_statuses:
+            continue
+        good_releases.add(release)
+    del labelled_releases, bad_groups
+
+    log("  media and tracks...")
+    good_media = IdSet()
+    for medium, release in read_table(dump_dir, 'medium', 'id', 'release'):
+        if int(release) in good_releases:
+            good_media.add(int(medium))
+    del good_releases
+    good_recordings = IdSet()
+    for recording, medium in read_table(dump_dir, 'track', 'recording', 'medium'):
+        if int(medium) in good_media:
+            good_recordings.add(int(recording))
+    del good_media
+
+    log("  recordings...")
+    for recording, name, credit in read_table(dump_dir, 'recording', 'id', 'name', 'artist_credit'):
+        recording, credit = int(recording), int(credit)
+        artists = multi_artist.get(credit)
+        if artists is None or credit in vs_credits or recording not in good_recordings:
+            continue
+        yield recording, name, artists
+
+
+def build_graph_from_dump(dump_dir, edge_counts=None):
+    """Same graph as build_collaboration_graph, read from an extracted mbdump directory."""
+    print(f"Building collaboration graph from {dump_dir}...")
+    graph = build_graph_from_recordings(iter_dump_recordings(dump_dir), edge_counts=edge_counts)
+    print(f"Graph built with {len(graph)} artists")
+    return graph
+
+
+def build_artist_name_cache_from_dump(dump_dir):
+    """artist_id -> (name, gid) from the artist table, like build_artist_name_cache."""
+    return {int(artist_id): (name, gid) for artist_id, gid, name in read_table(dump_dir, 'artist', 'id', 'gid', 'name')}
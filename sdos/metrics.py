@@ -0,0 +1,109 @@
+# sdos/metrics.py
+# Minimal in-process counters and histograms rendered in the Prometheus text format
+# (per process: with several web workers each one reports only its own requests)
+
+import time
+import threading
+from contextlib import contextmanager
+
+# seconds: 100us .. 30s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# node / edge counts: 1 .. 10M
+COUNT_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+_LOCK = threading.Lock()
+_METRICS = []
+
+
+def _label_str(labels):
+    if not labels:
+        return ''
+    parts = ','.join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    return '{' + parts + '}'
+
+
+def _fmt(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=None):
+        self.name = name
+        self.help = help
+        self.labels = labels or {}
+        self.value = 0
+        with _LOCK:
+            _METRICS.append(self)
+
+    def inc(self, amount=1):
+        with _LOCK:
+            self.value += amount
+
+    def samples(self):
+        yield self.name, self.labels, self.value
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS, labels=None):
+        self.name = name
+        self.help = help
+        self.labels = labels or {}
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        with _LOCK:
+            _METRICS.append(self)
+
+    def observe(self, value):
+        idx = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                idx = i
+                break
+        with _LOCK:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self):
+        cumulative = 0
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += n
+            yield self.name + '_bucket', dict(self.labels, le=_fmt(float(bound))), cumulative
+        yield self.name + '_sum', self.labels, self.sum
+        yield self.name + '_count', self.labels, self.count
+
+
+def render():
+    """All registered metrics in the Prometheus text exposition format."""
+    families = {}
+    # one snapshot of every value, so a histogram's buckets, _sum and _count agree
+    with _LOCK:
+        for metric in _METRICS:
+            families.setdefault(metric.name, []).append((metric, list(metric.samples())))
+    lines = []
+    for name, metrics in families.items():
+        lines.append(f'# HELP {name} {metrics[0][0].help}')
+        lines.append(f'# TYPE {name} {metrics[0][0].kind}')
+        for _, samples in metrics:
+            for sample, labels, value in samples:
+                lines.append(f'{sample}{_label_str(labels)} {_fmt(value)}')
+    return '\n'.join(lines) + '\n'
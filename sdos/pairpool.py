@@ -0,0 +1,190 @@
+# sdos/pairpool.py
+# Precomputed "random interesting pair" pool and a small trending-pairs counter.
+# A background sampler picks artist pairs from the largest connected component,
+# runs the regular BFS on them and keeps the far-apart ones in a rotating pool,
+# so a random connection can be served without a search.
+
+import random
+import threading
+from collections import deque
+
+from sdos.pathfinding import bidirectional_bfs_with_tracks, SearchLimits
+
+
+def largest_component(graph):
+    """Artist ids of the largest connected component (plain BFS over graph.get)."""
+    seen = set()
+    best = []
+    for start in graph:
+        if start in seen:
+            continue
+        seen.add(start)
+        component = [start]
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for neighbor, _ in graph.get(node, ()):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    component.append(neighbor)
+                    queue.append(neighbor)
+        if len(component) > len(best):
+            best = component
+    return best
+
+
+class PairPool:
+    """
+    Fixed-size ring of precomputed entries. Once full, each add() replaces the
+    oldest entry, so the pool keeps rotating; random() is O(1).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = []
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def full(self):
+        return len(self._entries) >= self.size
+
+    def add(self, entry):
+        with self._lock:
+            if len(self._entries) < self.size:
+                self._entries.append(entry)
+            else:
+                self._entries[self._next] = entry
+                self._next = (self._next + 1) % self.size
+
+    def entries(self):
+        with self._lock:
+            return list(self._entries)
+
+    def extend(self, entries):
+        for entry in entries:
+            self.add(entry)
+
+    def random(self):
+        entries = self._entries
+        return random.choice(entries) if entries else None
+
+
+class PairSampler:
+    """
+    Background thread filling a PairPool. get_graph() returns the graph to sample
+    from (the component is recomputed when it returns a different object);
+    find_path(source, target, limits=...) is the search to run, and
+    describe(source, target, path) turns a result into a pool entry (or None to
+    skip the pair). Pairs closer than min_degrees are skipped as uninteresting.
+    The pool is filled as fast as possible, then one entry is replaced every
+    refresh_seconds; on_add(pool), if given, is called after each new entry.
+    After an attempt that adds nothing (graph not loaded yet, component too small,
+    pair too close or not describable) the thread waits, starting at idle_seconds
+    and doubling per further empty attempt up to refresh_seconds.
+    """
+
+    def __init__(self, pool, get_graph, describe, find_path=None, min_degrees=3,
+                 refresh_seconds=30.0, search_seconds=2.0, seed=None, on_add=None, idle_seconds=0.05):
+        self.pool = pool
+        self._on_add = on_add
+        self._get_graph = get_graph
+        self._describe = describe
+        self._find_path = find_path
+        self.min_degrees = min_degrees
+        self.refresh_seconds = refresh_seconds
+        self.search_seconds = search_seconds
+        self.idle_seconds = idle_seconds
+        self._rng = random.Random(seed)
+        self._stop = threading.Event()
+        self._thread = None
+        self._graph = None
+        self._component = []
+        self.sampled = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pair-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        idle = self.idle_seconds
+        while not self._stop.is_set():
+            try:
+                entry = self.sample_one()
+            except Exception as e:
+                print(f"⚠️ Pair sampler error: {e}")
+                self._stop.wait(self.refresh_seconds)
+                continue
+            if entry is None:
+                self._stop.wait(idle)
+                idle = min(idle * 2, self.refresh_seconds)
+                continue
+            idle = self.idle_seconds
+            if self.pool.full:
+                self._stop.wait(self.refresh_seconds)
+
+    def sample_one(self):
+        """Try one random pair; returns the entry added to the pool or None."""
+        graph = self._get_graph()
+        if graph is None:
+            return None
+        if graph is not self._graph:
+            self._graph = graph
+            self._component = largest_component(graph)
+        if len(self._component) < 2:
+            return None
+
+        source, target = self._rng.sample(self._component, 2)
+        self.sampled += 1
+        limits = SearchLimits.after(self.search_seconds)
+        if self._find_path is not None:
+            path = self._find_path(source, target, limits=limits)
+        else:
+            path = bidirectional_bfs_with_tracks(graph, source, target, limits=limits)
+        if not path or len(path) < self.min_degrees:
+            return None
+        entry = self._describe(source, target, path)
+        if entry is not None:
+            self.pool.add(entry)
+            if self._on_add is not None:
+                self._on_add(self.pool)
+        return entry
+
+
+class TrendingPairs:
+    """
+    Request counts for recently searched pairs with the last path found for each.
+    When more than max_pairs are tracked, all counts are halved and pairs that
+    drop to zero are forgotten, so old popularity decays away.
+    """
+
+    def __init__(self, max_pairs=1000):
+        self.max_pairs = max_pairs
+        self._counts = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def record(self, source_id, target_id, path):
+        key = (source_id, target_id)
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+            self._entries[key] = path
+            if len(self._counts) > self.max_pairs:
+                for k in list(self._counts):
+                    self._counts[k] //= 2
+                    if self._counts[k] == 0:
+                        del self._counts[k]
+                        del self._entries[k]
+
+    def top(self, n=10):
+        """[(source_id, target_id, path, requests), ...], most requested first."""
+        with self._lock:
+            ranked = sorted(self._counts.items(), key=lambda kv: kv[1], reverse=True)[:n]
+            return [(k[0], k[1], self._entries[k], count) for k, count in ranked]
@@ -1,52 +1,410 @@
 # sdos/pathfinding.py
 # Bidirectional BFS with optional excluded edges support
+# and a ranked variant that breaks shortest-path ties by edge weight,
+# and a direction-optimizing (top-down / bottom-up) variant for hub-heavy frontiers,
+# and an all-shortest-paths variant that returns the shortest-path DAG.
+# All searches accept SearchLimits (deadline, node budget, cancellation).
 
+import time
 from collections import deque
 from typing import Optional, Set, Iterable, Tuple
 
-def bidirectional_bfs_with_tracks(graph, start_id, end_id, excluded_edges: Optional[Iterable[Tuple[int,int]]] = None):
+class SearchLimits:
+    """
+    Bounds for one path search. deadline is an absolute time.monotonic() value,
+    max_expanded caps the number of nodes expanded, cancel is anything with
+    is_set() (e.g. a threading.Event set when the client disconnects).
+    A search that hits a limit returns None and reports stats["gave_up"]
+    ("deadline", "budget" or "cancelled") plus stats["min_degrees"], a lower
+    bound on the distance proven so far.
+    """
+
+    def __init__(self, deadline: Optional[float] = None, max_expanded: Optional[int] = None, cancel=None):
+        self.deadline = deadline
+        self.max_expanded = max_expanded
+        self.cancel = cancel
+        self.expanded = 0
+
+    @classmethod
+    def after(cls, seconds: Optional[float] = None, max_expanded: Optional[int] = None, cancel=None):
+        return cls(None if seconds is None else time.monotonic() + seconds, max_expanded, cancel)
+
+    def poll(self):
+        if self.cancel is not None and self.cancel.is_set():
+            raise _GaveUp("cancelled")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise _GaveUp("deadline")
+
+    def expand(self):
+        """
+        Charge one node about to be expanded; raises once the budget is used up, and
+        checks the deadline and cancellation on the first node and every _POLL_EVERY after.
+        """
+        self.expanded += 1
+        if self.max_expanded is not None and self.expanded > self.max_expanded:
+            raise _GaveUp("budget")
+        if self.expanded % _POLL_EVERY == 1:
+            self.poll()
+
+class _GaveUp(Exception):
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+# how many nodes are expanded between deadline / cancellation checks
+_POLL_EVERY = 256
+
+def bidirectional_bfs_with_tracks(graph, start_id, end_id, excluded_edges: Optional[Iterable[Tuple[int,int]]] = None,
+                                  stats: Optional[dict] = None, limits: Optional[SearchLimits] = None):
     """
     Bidirectional BFS that returns a path as a list of (artist_id, track)
     The graph is expected to be: dict[artist_id] -> list[(neighbor_id, track_name)]
+    (or a graph with track_name(), whose rows hold track indices, see SharedGraph).
     excluded_edges: iterable of (a,b) pairs (unordered) that should be ignored when traversing.
+    stats: optional dict filled with "expanded" (nodes popped) and "visited" (nodes reached).
+    limits: optional SearchLimits; when one is hit the search returns None with stats["gave_up"] set.
     """
     if start_id == end_id:
         return [(end_id, None)]
 
-    # Normalize excluded edges into a set of frozenset pairs for O(1) checks
-    excluded_set = set()
-    if excluded_edges:
-        for e in excluded_edges:
-            try:
-                a, b = int(e[0]), int(e[1])
-                excluded_set.add(frozenset((a, b)))
-            except Exception:
-                continue
+    excluded_set = _normalize_excluded(excluded_edges)
 
     visited_from_start = {start_id: (None, None)}
     visited_from_end = {end_id: (None, None)}
 
     queue_start = deque([start_id])
     queue_end = deque([end_id])
+    expanded = 0
+    depths = [0, 0]
 
-    while queue_start and queue_end:
-        # expand the smaller frontier
-        if len(queue_start) <= len(queue_end):
-            meet = _expand_frontier(graph, queue_start, visited_from_start, visited_from_end, excluded_set)
-        else:
-            meet = _expand_frontier(graph, queue_end, visited_from_end, visited_from_start, excluded_set)
+    try:
+        while queue_start and queue_end:
+            # expand the smaller frontier
+            if len(queue_start) <= len(queue_end):
+                expanded += len(queue_start)
+                meet = _expand_frontier(graph, queue_start, visited_from_start, visited_from_end, excluded_set, limits)
+                depths[0] += 1
+            else:
+                expanded += len(queue_end)
+                meet = _expand_frontier(graph, queue_end, visited_from_end, visited_from_start, excluded_set, limits)
+                depths[1] += 1
+
+            if meet is not None:
+                _fill_stats(stats, expanded, visited_from_start, visited_from_end)
+                return _reconstruct_path(meet, visited_from_start, visited_from_end, _track_names(graph))
+    except _GaveUp as e:
+        _fill_stats(stats, expanded, visited_from_start, visited_from_end, e.reason, depths)
+        return None
+
+    _fill_stats(stats, expanded, visited_from_start, visited_from_end)
+    return None
+
+def ranked_bfs_with_tracks(graph, start_id, end_id, weights=None,
+                           excluded_edges: Optional[Iterable[Tuple[int,int]]] = None,
+                           stats: Optional[dict] = None, limits: Optional[SearchLimits] = None):
+    """
+    Lexicographic bidirectional BFS: keeps the minimum hop count but, among all
+    equally short paths, returns the one through the best known collaborations.
+    weights: dict[artist_id] -> sequence aligned with graph[artist_id] (see
+    sdos.graph.build_edge_weights); a hop costs 1/weight. When None the
+    neighbor's degree is used as the weight.
+    Returns the same list of (artist_id, track) as bidirectional_bfs_with_tracks.
+    """
+    if start_id == end_id:
+        return [(end_id, None)]
+
+    excluded_set = _normalize_excluded(excluded_edges)
+
+    # visited[id] = (parent_id, track, cost_from_this_side)
+    visited_from_start = {start_id: (None, None, 0.0)}
+    visited_from_end = {end_id: (None, None, 0.0)}
+
+    frontier_start = [start_id]
+    frontier_end = [end_id]
+    expanded = 0
+    depths = [0, 0]
+
+    try:
+        while frontier_start and frontier_end:
+            # whole layers are expanded so every meeting node has its final cost
+            if len(frontier_start) <= len(frontier_end):
+                expanded += len(frontier_start)
+                frontier_start, meets = _expand_layer_ranked(graph, weights, frontier_start, visited_from_start,
+                                                             visited_from_end, excluded_set, limits)
+                depths[0] += 1
+            else:
+                expanded += len(frontier_end)
+                frontier_end, meets = _expand_layer_ranked(graph, weights, frontier_end, visited_from_end,
+                                                           visited_from_start, excluded_set, limits)
+                depths[1] += 1
+
+            if meets:
+                # every meeting node lies on a shortest path; pick the cheapest (ties by id for stable output)
+                best = min(meets, key=lambda n: (visited_from_start[n][2] + visited_from_end[n][2], n))
+                _fill_stats(stats, expanded, visited_from_start, visited_from_end)
+                return _reconstruct_path(best, visited_from_start, visited_from_end, _track_names(graph))
+    except _GaveUp as e:
+        _fill_stats(stats, expanded, visited_from_start, visited_from_end, e.reason, depths)
+        return None
+
+    _fill_stats(stats, expanded, visited_from_start, visited_from_end)
+    return None
+
+def direction_optimizing_bfs_with_tracks(graph, start_id, end_id,
+                                         excluded_edges: Optional[Iterable[Tuple[int,int]]] = None,
+                                         stats: Optional[dict] = None, total_edges: Optional[int] = None,
+                                         alpha: float = 14.0, beta: float = 24.0,
+                                         limits: Optional[SearchLimits] = None):
+    """
+    Bidirectional BFS that picks the side whose frontier touches fewer edges (total
+    degree, not node count) and expands it either top-down (scan the frontier's
+    edges) or bottom-up (unvisited artists look for any parent in the frontier,
+    stopping at the first one). Bottom-up is used while the frontier's edges exceed
+    the unexplored edges / alpha and the frontier holds more than 1/beta of all
+    artists, i.e. once a hub has been reached. Each side lists its unvisited artists
+    on its first bottom-up step and only rescans the ones still unvisited after that.
+    stats["expanded"] counts frontier artists on top-down steps and scanned
+    unvisited artists on bottom-up steps.
+    total_edges: sum of all degrees (see count_edges); pass it in to avoid an O(V) count.
+    Returns the same list of (artist_id, track) as bidirectional_bfs_with_tracks.
+    """
+    if start_id == end_id:
+        return [(end_id, None)]
+
+    excluded_set = _normalize_excluded(excluded_edges)
+    if total_edges is None:
+        total_edges = count_edges(graph)
+    n_nodes = len(graph)
+    degree = _degree_function(graph)
+
+    # side = [visited, frontier, frontier_edges, visited_edges, depth, unvisited (listed on first bottom-up step)]
+    start_degree, end_degree = degree(start_id), degree(end_id)
+    side_start = [{start_id: (None, None)}, [start_id], start_degree, start_degree, 0, None]
+    side_end = [{end_id: (None, None)}, [end_id], end_degree, end_degree, 0, None]
+    expanded = 0
+    bottom_up_steps = 0
+    meet = None
+    gave_up = None
+
+    try:
+        while side_start[1] and side_end[1]:
+            this, other = (side_start, side_end) if side_start[2] <= side_end[2] else (side_end, side_start)
+            visited, frontier, frontier_edges, visited_edges, _, unvisited = this
+
+            if frontier_edges * alpha > total_edges - visited_edges and len(frontier) * beta > n_nodes:
+                bottom_up_steps += 1
+                if unvisited is None:
+                    unvisited = [node for node in graph if node not in visited]
+                scanned = len(unvisited)
+                frontier, frontier_edges, meet, this[5] = _bottom_up_step(graph, degree, frontier, unvisited,
+                                                                          visited, other[0], excluded_set, limits)
+                expanded += scanned
+            else:
+                expanded += len(frontier)
+                frontier, frontier_edges, meet = _top_down_step(graph, degree, frontier, visited, other[0],
+                                                                excluded_set, limits)
+
+            if meet is not None:
+                break
+            this[1], this[2], this[3] = frontier, frontier_edges, visited_edges + frontier_edges
+            this[4] += 1
+    except _GaveUp as e:
+        gave_up = e.reason
+
+    _fill_stats(stats, expanded, side_start[0], side_end[0], gave_up, (side_start[4], side_end[4]))
+    if stats is not None:
+        stats["bottom_up_steps"] = bottom_up_steps
+    if meet is None:
+        return None
+    return _reconstruct_path(meet, side_start[0], side_end[0], _track_names(graph))
+
+def all_shortest_paths_bfs(graph, start_id, end_id, excluded_edges: Optional[Iterable[Tuple[int,int]]] = None,
+                           stats: Optional[dict] = None, limits: Optional[SearchLimits] = None):
+    """
+    Bidirectional BFS that keeps every parent one layer up instead of the first one,
+    so all shortest paths survive as a DAG. Layers are always expanded completely;
+    the first layer that touches the other side holds every meeting node.
+    Returns a PathDAG (see route_count / routes()) or None, same arguments as
+    bidirectional_bfs_with_tracks.
+    """
+    if start_id == end_id:
+        return PathDAG(start_id, end_id, {start_id: []}, {end_id: []}, [start_id], track_name=_track_names(graph))
+
+    excluded_set = _normalize_excluded(excluded_edges)
 
-        if meet is not None:
-            return _reconstruct_path(meet, visited_from_start, visited_from_end)
+    parents_start = {start_id: []}
+    parents_end = {end_id: []}
+    frontier_start = [start_id]
+    frontier_end = [end_id]
+    expanded = 0
+    depths = [0, 0]
 
+    try:
+        while frontier_start and frontier_end:
+            if len(frontier_start) <= len(frontier_end):
+                expanded += len(frontier_start)
+                frontier_start, meets = _expand_layer_all_parents(graph, frontier_start, parents_start, parents_end,
+                                                                  excluded_set, limits)
+                depths[0] += 1
+            else:
+                expanded += len(frontier_end)
+                frontier_end, meets = _expand_layer_all_parents(graph, frontier_end, parents_end, parents_start,
+                                                                excluded_set, limits)
+                depths[1] += 1
+
+            if meets:
+                _fill_stats(stats, expanded, parents_start, parents_end)
+                return PathDAG(start_id, end_id, parents_start, parents_end, meets,
+                               track_name=_track_names(graph))
+    except _GaveUp as e:
+        _fill_stats(stats, expanded, parents_start, parents_end, e.reason, depths)
+        return None
+
+    _fill_stats(stats, expanded, parents_start, parents_end)
     return None
 
-def _expand_frontier(graph, queue, visited_this_side, visited_other_side, excluded_set: Set[frozenset]):
+class PathDAG:
+    """
+    All shortest paths between two artists. parents_*[node] lists every
+    (parent, track) one layer closer to that side's root; every shortest path runs
+    through exactly one of the meeting nodes. Routes are numbered
+    0 .. route_count - 1 in a fixed order and unranked on demand, so they can be
+    paged through without materializing them. prefix / suffix are forced hops
+    spliced on around every route (pendant chains of a PrunedGraph); track_name
+    decodes the track indices of a SharedGraph as routes are unranked.
+    """
+
+    def __init__(self, start_id, end_id, parents_start, parents_end, meets, prefix=(), suffix=(),
+                 track_name=None):
+        self.start_id = start_id
+        self.end_id = end_id
+        self._parents_start = parents_start
+        self._parents_end = parents_end
+        self.meets = sorted(meets)
+        self.prefix = list(prefix)
+        self.suffix = list(suffix)
+        self._track_name = track_name
+        # artists with parent lists kept alive by this DAG (what a cache of DAGs should be bounded by)
+        self.visited = len(parents_start) + len(parents_end)
+        self._counts_start = {}
+        self._counts_end = {}
+        self._meet_counts = [self._count(self._parents_start, self._counts_start, m) *
+                             self._count(self._parents_end, self._counts_end, m) for m in self.meets]
+        self.route_count = sum(self._meet_counts)
+
+    def __len__(self):
+        return self.route_count
+
+    @property
+    def degrees(self):
+        return len(self.route(0))
+
+    @staticmethod
+    def _count(parents, counts, node):
+        """Number of shortest paths from the side's root to node (memoized, iterative)."""
+        stack = [node]
+        while stack:
+            current = stack[-1]
+            if current in counts:
+                stack.pop()
+                continue
+            missing = [p for p, _ in parents[current] if p not in counts]
+            if missing:
+                stack.extend(missing)
+                continue
+            counts[current] = sum(counts[p] for p, _ in parents[current]) if parents[current] else 1
+            stack.pop()
+        return counts[node]
+
+    def _unrank_side(self, parents, counts, node, index):
+        """The index-th chain from node back to the root: [(node, track_to_parent), ..., (root, None)]."""
+        chain = []
+        while parents[node]:
+            # each parent appears once, so its id alone fixes the order
+            for parent, track in sorted(parents[node], key=lambda p: p[0]):
+                n = counts[parent]
+                if index < n:
+                    chain.append((node, track))
+                    node = parent
+                    break
+                index -= n
+        chain.append((node, None))
+        return chain
+
+    def route(self, index):
+        """The index-th shortest route, as a list of (artist_id, track) like the BFS functions."""
+        if not 0 <= index < self.route_count:
+            raise IndexError(index)
+        for meet, n in zip(self.meets, self._meet_counts):
+            if index < n:
+                break
+            index -= n
+        n_end = self._counts_end[meet]
+        up = self._unrank_side(self._parents_start, self._counts_start, meet, index // n_end)
+        down = self._unrank_side(self._parents_end, self._counts_end, meet, index % n_end)
+
+        # up is meet -> ... -> start, each entry holding the track to its parent
+        hops = [(up[k][0], up[k][1]) for k in range(len(up) - 2, -1, -1)]
+        # down is meet -> ... -> end, the track to the parent is the hop into the parent
+        hops.extend((down[k + 1][0], down[k][1]) for k in range(len(down) - 1))
+        if self._track_name is not None:
+            hops = [(node, self._track_name(track)) for node, track in hops]
+        path = list(self.prefix)
+        path.extend(hops)
+        path.extend(self.suffix)
+        return path or [(self.end_id, None)]
+
+    def routes(self, offset=0, limit=None):
+        """Generator over routes offset .. offset + limit - 1 (to the end if limit is None)."""
+        stop = self.route_count if limit is None else min(self.route_count, offset + limit)
+        for index in range(max(offset, 0), stop):
+            yield self.route(index)
+
+def count_edges(graph):
+    """Sum of all adjacency-list lengths (each undirected edge counts twice)."""
+    n_edges = getattr(graph, 'n_edges', None)
+    if n_edges is not None:
+        return n_edges
+    return sum(len(neighbors) for neighbors in graph.values())
+
+def _degree_function(graph):
+    """degree(artist_id): read from the offsets of a SharedGraph, the adjacency length otherwise."""
+    return graph.degree if hasattr(graph, 'degree') else (lambda n: len(graph.get(n, ())))
+
+def _track_names(graph):
+    """track_name(index) for graphs whose rows hold track indices (SharedGraph), else None."""
+    return getattr(graph, 'track_name', None)
+
+def _fill_stats(stats, expanded, visited_from_start, visited_from_end, gave_up=None, depths=None):
+    if stats is not None:
+        stats["expanded"] = expanded
+        stats["visited"] = len(visited_from_start) + len(visited_from_end)
+        if gave_up is not None:
+            stats["gave_up"] = gave_up
+            # the two sides have not met after these many complete layers
+            stats["min_degrees"] = depths[0] + depths[1] + 1
+
+def _normalize_excluded(excluded_edges):
+    """Normalize excluded edges into a set of frozenset pairs for O(1) checks."""
+    excluded_set = set()
+    if excluded_edges:
+        for e in excluded_edges:
+            try:
+                a, b = int(e[0]), int(e[1])
+                excluded_set.add(frozenset((a, b)))
+            except Exception:
+                continue
+    return excluded_set
+
+def _expand_frontier(graph, queue, visited_this_side, visited_other_side, excluded_set: Set[frozenset],
+                     limits: Optional[SearchLimits] = None):
     """
     Expand nodes in 'queue' one level. Skip edges present in excluded_set (frozenset pairs).
     Return meeting node id if found, else None.
     """
     for _ in range(len(queue)):
+        if limits is not None:
+            limits.expand()
         current = queue.popleft()
         neighbors = graph.get(current, [])
         for neighbor, track in neighbors:
@@ -60,16 +418,130 @@ def _expand_frontier(graph, queue, visited_this_side, visited_other_side, exclud
                 queue.append(neighbor)
     return None
 
-def _reconstruct_path(meeting_node, visited_from_start, visited_from_end):
+def _expand_layer_ranked(graph, weights, frontier, visited_this_side, visited_other_side, excluded_set: Set[frozenset],
+                         limits: Optional[SearchLimits] = None):
+    """
+    Expand one full BFS layer. A node first reached in this layer keeps the
+    cheapest parent among all parents in the previous layer.
+    Once the layer has met the other side the search ends with it, so the rest
+    of the layer only scores edges into the other side (next_frontier is then
+    incomplete).
+    Return (next_frontier, meeting_nodes).
+    """
+    next_frontier = []
+    meets = []
+    layer = set()
+    degree = _degree_function(graph)
+    for current in frontier:
+        if limits is not None:
+            limits.expand()
+        base = visited_this_side[current][2]
+        neighbors = graph.get(current, [])
+        row = weights.get(current) if weights is not None else None
+        if row is not None and len(row) != len(neighbors):
+            row = None  # not aligned with this adjacency row: rank by degree instead
+        for i, (neighbor, track) in enumerate(neighbors):
+            if meets and neighbor not in visited_other_side:
+                continue
+            if excluded_set and frozenset((current, neighbor)) in excluded_set:
+                continue
+            seen = visited_this_side.get(neighbor)
+            if seen is not None and neighbor not in layer:
+                continue
+            weight = row[i] if row is not None else degree(neighbor)
+            cost = base + 1.0 / (weight or 1)
+            if seen is None:
+                visited_this_side[neighbor] = (current, track, cost)
+                layer.add(neighbor)
+                next_frontier.append(neighbor)
+                if neighbor in visited_other_side:
+                    meets.append(neighbor)
+            elif cost < seen[2]:
+                visited_this_side[neighbor] = (current, track, cost)
+    return next_frontier, meets
+
+def _expand_layer_all_parents(graph, frontier, parents_this_side, parents_other_side, excluded_set: Set[frozenset],
+                              limits: Optional[SearchLimits] = None):
+    """
+    Expand one full BFS layer, recording every frontier node as a parent of each
+    node first reached in this layer. Return (next_frontier, meeting_nodes).
+    """
+    next_frontier = []
+    layer = set()
+    for current in frontier:
+        if limits is not None:
+            limits.expand()
+        for neighbor, track in graph.get(current, []):
+            if excluded_set and frozenset((current, neighbor)) in excluded_set:
+                continue
+            if neighbor not in parents_this_side:
+                parents_this_side[neighbor] = [(current, track)]
+                layer.add(neighbor)
+                next_frontier.append(neighbor)
+            elif neighbor in layer:
+                parents_this_side[neighbor].append((current, track))
+    return next_frontier, [n for n in next_frontier if n in parents_other_side]
+
+def _top_down_step(graph, degree, frontier, visited_this_side, visited_other_side, excluded_set: Set[frozenset],
+                   limits: Optional[SearchLimits] = None):
+    """Classic expansion of every frontier edge. Return (next_frontier, next_frontier_edges, meeting_node)."""
+    next_frontier = []
+    next_edges = 0
+    for current in frontier:
+        if limits is not None:
+            limits.expand()
+        for neighbor, track in graph.get(current, []):
+            if excluded_set and frozenset((current, neighbor)) in excluded_set:
+                continue
+            if neighbor not in visited_this_side:
+                visited_this_side[neighbor] = (current, track)
+                if neighbor in visited_other_side:
+                    return next_frontier, next_edges, neighbor
+                next_frontier.append(neighbor)
+                next_edges += degree(neighbor)
+    return next_frontier, next_edges, None
+
+def _bottom_up_step(graph, degree, frontier, unvisited, visited_this_side, visited_other_side,
+                    excluded_set: Set[frozenset], limits: Optional[SearchLimits] = None):
+    """
+    Every artist in unvisited (this side's unvisited list, which may also hold artists
+    a top-down step has reached since) scans its own neighbors until it finds one in
+    the frontier. Return (next_frontier, next_frontier_edges, meeting_node, still_unvisited).
+    """
+    frontier_set = set(frontier)
+    next_frontier = []
+    next_edges = 0
+    still_unvisited = []
+    for node in unvisited:
+        if limits is not None:
+            limits.expand()
+        if node in visited_this_side:
+            continue
+        for neighbor, track in graph.get(node, ()):
+            if neighbor in frontier_set:
+                if excluded_set and frozenset((node, neighbor)) in excluded_set:
+                    continue
+                visited_this_side[node] = (neighbor, track)
+                if node in visited_other_side:
+                    return next_frontier, next_edges, node, None
+                next_frontier.append(node)
+                next_edges += degree(node)
+                break
+        else:
+            still_unvisited.append(node)
+    return next_frontier, next_edges, None, still_unvisited
+
+def _reconstruct_path(meeting_node, visited_from_start, visited_from_end, track_name=None):
     """
     Reconstruct path from start to end given visited dictionaries:
     visited[id] = (parent_id, track_used_to_get_here_from_parent)
     Returns list of (artist_id, track) where track is the track connecting previous artist -> this artist.
+    track_name, if given, turns the stored track indices into names (only the path's hops are decoded).
     """
     path_start = []
     node = meeting_node
     while node is not None:
-        parent, track = visited_from_start[node]
+        parent, track = visited_from_start[node][:2]
         if parent is not None:
             path_start.append((node, track))
         node = parent
@@ -78,9 +550,12 @@ def _reconstruct_path(meeting_node, visited_from_start, visited_from_end):
     path_end = []
     node = meeting_node
     while node is not None:
-        parent, track = visited_from_end[node]
+        parent, track = visited_from_end[node][:2]
         if parent is not None:
             path_end.append((parent, track))
         node = parent
 
-    return path_start + path_end
+    path = path_start + path_end
+    if track_name is not None:
+        path = [(node, track_name(track)) for node, track in path]
+    return path
@@ -0,0 +1,106 @@
+# sdos/pathjson.py
+# Direct-to-bytes JSON for path responses. Every artist's JSON pieces are encoded
+# once and reused, and responses are assembled by joining bytes instead of
+# building dicts and running them through an encoder.
+#
+# Full format (same shape as before): "path": [{"from_id", "from_name", "to_id",
+#   "to_name", "to_mbid", "track"}, ...]
+# Compact format: "artists": [{"id", "name", "mbid"}, ...] lists every artist once,
+#   "path": [[artist_index, track], ...] starting with [source_index, null]
+
+import json
+from json.encoder import encode_basestring
+
+_encode_str = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+def dumps(value):
+    """Compact UTF-8 JSON bytes for plain values."""
+    return _encode_str(value).encode('utf-8')
+
+
+def _dumps_track(track):
+    # hot path: strings straight through the C string encoder
+    return b'null' if track is None else encode_basestring(track).encode('utf-8')
+
+
+class ArtistFragments:
+    """
+    Pre-encoded JSON fragments per artist, built on first use from
+    resolve(artist_id) -> (name, gid). get() returns (from_part, to_part, artist):
+        b'"from_id":1,"from_name":"A"'
+        b'"to_id":1,"to_name":"A","to_mbid":"..."'
+        b'{"id":1,"name":"A","mbid":"..."}'
+    The table is dropped and refilled once it holds max_entries artists.
+    """
+
+    def __init__(self, resolve, max_entries=500000):
+        self._resolve = resolve
+        self.max_entries = max_entries
+        self._fragments = {}
+
+    def __len__(self):
+        return len(self._fragments)
+
+    def get(self, artist_id):
+        fragment = self._fragments.get(artist_id)
+        if fragment is None:
+            name, gid = self._resolve(artist_id)
+            id_part = dumps(int(artist_id))
+            name_part = dumps(name)
+            mbid_part = dumps(str(gid) if gid else None)
+            fragment = (
+                b'"from_id":' + id_part + b',"from_name":' + name_part,
+                b'"to_id":' + id_part + b',"to_name":' + name_part + b',"to_mbid":' + mbid_part,
+                b'{"id":' + id_part + b',"name":' + name_part + b',"mbid":' + mbid_part + b'}',
+            )
+            if len(self._fragments) >= self.max_entries:
+                self._fragments = {}
+            self._fragments[artist_id] = fragment
+        return fragment
+
+
+def encode_hops(fragments, source_id, path):
+    """The full-format hop list of one route as JSON bytes."""
+    parts = []
+    prev = fragments.get(source_id)[0]
+    for node_id, track in path:
+        from_part, to_part, _ = fragments.get(node_id)
+        parts.append(b'{' + prev + b',' + to_part + b',"track":' + _dumps_track(track) + b'}')
+        prev = from_part
+    return b'[' + b','.join(parts) + b']'
+
+
+def encode_compact(fragments, source_id, routes):
+    """
+    (artists, [route, ...]) as JSON bytes for the compact format: the shared
+    artist list and one [[artist_index, track], ...] list per route.
+    """
+    index = {}
+    artists = []
+
+    def artist_index(artist_id):
+        i = index.get(artist_id)
+        if i is None:
+            i = index[artist_id] = len(artists)
+            artists.append(fragments.get(artist_id)[2])
+        return b'%d' % i
+
+    encoded = []
+    for path in routes:
+        hops = [b'[' + artist_index(source_id) + b',null]']
+        hops.extend(b'[' + artist_index(node_id) + b',' + _dumps_track(track) + b']' for node_id, track in path)
+        encoded.append(b'[' + b','.join(hops) + b']')
+    return b'[' + b','.join(artists) + b']', encoded
+
+
+def encode_object(fields, raw=None):
+    """
+    JSON object bytes from plain fields plus already-encoded values in raw. A raw
+    value whose key is also in fields takes that field's place (so keys keep the
+    order json.dumps would give them); the other raw values come last.
+    """
+    raw = raw or {}
+    parts = [dumps(key) + b':' + (raw[key] if key in raw else dumps(value)) for key, value in fields.items()]
+    parts.extend(dumps(key) + b':' + value for key, value in raw.items() if key not in fields)
+    return b'{' + b','.join(parts) + b'}'
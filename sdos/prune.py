@@ -0,0 +1,218 @@
+# sdos/prune.py
+# Leaf pruning: peel degree-1 artists off the collaboration graph so BFS runs on
+# the (much smaller) 2-core, and re-attach the pendant hops at query time.
+
+from array import array
+from typing import Optional, Iterable, Tuple
+
+from sdos.pathfinding import bidirectional_bfs_with_tracks, all_shortest_paths_bfs, _normalize_excluded
+
+
+def prune_leaves(graph, weights=None):
+    """
+    Repeatedly strip degree-1 vertices (so whole pendant chains and trees go, not
+    just the outermost leaves). Every stripped artist is stored as
+    hanging[artist] = (parent, track), where parent is the neighbor that was left
+    when it was stripped; following parents always ends at a core artist, or at a
+    root (parent None) for components that are trees with no core at all.
+    Leaves can never be interior nodes of a shortest path, so shortest paths
+    between core artists are unchanged.
+    Returns a PrunedGraph; weights (aligned with graph rows) are filtered the same way.
+    Every edge at a stripped artist is the parent edge of exactly one of its ends,
+    so the full adjacency stays recoverable (PrunedGraph.neighbors).
+    """
+    degree = {n: len(neighbors) for n, neighbors in graph.items()}
+    hanging = {}
+    hanging_weights = {} if weights is not None else None
+    stack = [n for n, d in degree.items() if d <= 1]
+
+    while stack:
+        node = stack.pop()
+        if node in hanging:
+            continue
+        parent = track = None
+        for i, (neighbor, rec) in enumerate(graph.get(node, ())):
+            if neighbor not in hanging:
+                parent, track = neighbor, rec
+                if hanging_weights is not None:
+                    row = weights.get(node)
+                    hanging_weights[node] = row[i] if row is not None else None
+                break
+        hanging[node] = (parent, track)
+        if parent is None:
+            continue
+        degree[parent] -= 1
+        if degree[parent] == 1:
+            stack.append(parent)
+        elif degree[parent] == 0:
+            # everything around it is gone: the last artist of a tree component
+            hanging[parent] = (None, None)
+
+    core = {}
+    core_weights = {} if weights is not None else None
+    for n, neighbors in graph.items():
+        if n in hanging:
+            continue
+        row = weights.get(n) if weights is not None else None
+        kept = []
+        kept_weights = []
+        for i, (neighbor, rec) in enumerate(neighbors):
+            if neighbor not in hanging:
+                kept.append((neighbor, rec))
+                if row is not None:
+                    kept_weights.append(row[i])
+        core[n] = kept
+        if core_weights is not None:
+            core_weights[n] = array('I', kept_weights)
+
+    return PrunedGraph(core, hanging, core_weights, hanging_weights)
+
+
+class PrunedGraph:
+    """
+    2-core adjacency (`core`, same format as the full graph) plus the side table of
+    stripped artists. `in` and len() cover all artists of the original graph;
+    `weights` are the core's edge weights for ranked_bfs_with_tracks,
+    `hanging_weights` the weight of each stripped artist's edge to its parent.
+    """
+
+    def __init__(self, core, hanging, weights=None, hanging_weights=None):
+        self.core = core
+        self.hanging = hanging
+        self.weights = weights
+        self.hanging_weights = hanging_weights
+        self._children = None
+
+    def __contains__(self, artist_id):
+        return artist_id in self.core or artist_id in self.hanging
+
+    def __len__(self):
+        return len(self.core) + len(self.hanging)
+
+    def neighbors(self, artist_id):
+        """
+        Full adjacency of any artist as [(neighbor_id, track, weight or None), ...]:
+        its core row, the stripped artists hanging off it and its own parent edge.
+        """
+        if self._children is None:
+            children = {}
+            for node, (parent, track) in self.hanging.items():
+                if parent is not None:
+                    children.setdefault(parent, []).append(node)
+            self._children = children
+
+        rows = []
+        if artist_id in self.core:
+            row = self.weights.get(artist_id) if self.weights is not None else None
+            rows.extend((neighbor, track, row[i] if row is not None else None)
+                        for i, (neighbor, track) in enumerate(self.core[artist_id]))
+        elif artist_id in self.hanging:
+            parent, track = self.hanging[artist_id]
+            if parent is not None:
+                rows.append((parent, track, self._hanging_weight(artist_id)))
+        for child in self._children.get(artist_id, ()):
+            rows.append((child, self.hanging[child][1], self._hanging_weight(child)))
+        return rows
+
+    def _hanging_weight(self, artist_id):
+        return self.hanging_weights.get(artist_id) if self.hanging_weights is not None else None
+
+    def _climb(self, artist_id):
+        """[(node, track_to_parent), ...] from artist_id up to (and including) its anchor."""
+        chain = []
+        node = artist_id
+        while node in self.hanging:
+            parent, track = self.hanging[node]
+            chain.append((node, track))
+            if parent is None:
+                break
+            node = parent
+        else:
+            chain.append((node, None))  # core anchor
+        return chain
+
+    def _pendant_hops(self, start_id, end_id):
+        """
+        (prefix, suffix, anchor_up, anchor_down): the forced hops from start_id up to
+        its core anchor and from end_id's anchor down to end_id. When both ends hang
+        off the same anchor the anchors are their lowest common ancestor, so nothing
+        is left to search. None when the ends are in different components.
+        """
+        up = self._climb(start_id)
+        down = self._climb(end_id)
+        anchor_up, anchor_down = up[-1][0], down[-1][0]
+
+        if anchor_up == anchor_down:
+            # same hanging tree (or same core anchor): meet at the lowest common ancestor
+            down_index = {node: i for i, (node, _) in enumerate(down)}
+            i = next(i for i, (node, _) in enumerate(up) if node in down_index)
+            up, down = up[:i + 1], down[:down_index[up[i][0]] + 1]
+        elif anchor_up not in self.core or anchor_down not in self.core:
+            return None  # different components
+
+        # up: start -> ... -> anchor, each entry holding the track to its parent
+        prefix = [(up[k + 1][0], up[k][1]) for k in range(len(up) - 1)]
+        # down is end -> ... -> anchor, walk it backwards
+        suffix = [(down[k][0], down[k][1]) for k in range(len(down) - 2, -1, -1)]
+        return prefix, suffix, up[-1][0], down[-1][0]
+
+    @staticmethod
+    def _crosses_excluded(start_id, hops, excluded_edges):
+        excluded_set = _normalize_excluded(excluded_edges)
+        if excluded_set:
+            # pendant hops are bridges: excluding one disconnects the pair
+            prev = start_id
+            for node, _ in hops:
+                if frozenset((prev, node)) in excluded_set:
+                    return True
+                prev = node
+        return False
+
+    def find_path(self, start_id, end_id, search=bidirectional_bfs_with_tracks,
+                  excluded_edges: Optional[Iterable[Tuple[int, int]]] = None, **kwargs):
+        """
+        Same result format as the BFS functions: list of (artist_id, track) or None.
+        `search` runs on the core between the two anchors (extra kwargs are passed on);
+        the pendant hops at either end are forced, so they are spliced on around it.
+        """
+        if start_id == end_id:
+            return [(end_id, None)]
+
+        hops = self._pendant_hops(start_id, end_id)
+        if hops is None:
+            return None
+        prefix, suffix, anchor_up, anchor_down = hops
+
+        middle = []
+        if anchor_up != anchor_down:
+            middle = search(self.core, anchor_up, anchor_down, excluded_edges=excluded_edges, **kwargs)
+            if middle is None:
+                return None
+
+        path = prefix + middle + suffix
+        if self._crosses_excluded(start_id, path, excluded_edges):
+            return None
+        return path
+
+    def find_all_paths(self, start_id, end_id, excluded_edges: Optional[Iterable[Tuple[int, int]]] = None, **kwargs):
+        """all_shortest_paths_bfs on the core, with the pendant hops as the PathDAG's prefix / suffix."""
+        if start_id == end_id:
+            return all_shortest_paths_bfs(self.core, start_id, end_id)
+
+        hops = self._pendant_hops(start_id, end_id)
+        if hops is None:
+            return None
+        prefix, suffix, anchor_up, anchor_down = hops
+        if self._crosses_excluded(start_id, prefix, excluded_edges) or \
+                self._crosses_excluded(anchor_down, suffix, excluded_edges):
+            return None
+
+        if anchor_up == anchor_down:
+            dag = all_shortest_paths_bfs({}, anchor_up, anchor_down)
+        else:
+            dag = all_shortest_paths_bfs(self.core, anchor_up, anchor_down, excluded_edges=excluded_edges, **kwargs)
+            if dag is None:
+                return None
+        dag.start_id, dag.end_id = start_id, end_id
+        dag.prefix, dag.suffix = prefix, suffix
+        return dag
@@ -0,0 +1,400 @@
+# sdos/shared_graph.py
+# Read-only, mmap'd graph and artist-name files that several worker processes
+# can open at once. The OS page cache holds a single copy, so N uvicorn workers
+# cost roughly the RAM of one.
+#
+# Graph file layout (little endian, every section 8-byte aligned):
+#   header   : magic + n_slots, n_nodes, n_edges, n_tracks, track_blob_len, has_weights,
+#              build id of the source graph (ascii, zero padded to 64 bytes)
+#   offsets  : uint64[n_slots + 1]   CSR row offsets indexed directly by artist id
+#   neighbors: uint32[n_edges]
+#   tracks   : uint32[n_edges]       index into the track string table
+#   weights  : uint32[n_edges]       (only if has_weights)
+#   track_offsets: uint64[n_tracks + 1], track_blob: utf-8 bytes
+#
+# Artist-name file layout:
+#   header   : magic + n_slots, n_names, name_blob_len
+#   name_offsets: uint64[n_slots + 1], gids: 16 bytes per slot, name_blob
+
+import os
+import sys
+import mmap
+import fcntl
+import struct
+import uuid
+from array import array
+from contextlib import contextmanager
+
+GRAPH_MAGIC = b'SDOSG002'
+NAMES_MAGIC = b'SDOSN001'
+SHARED_GRAPH_FILE = 'collaboration_graph.bin'
+SHARED_NAMES_FILE = 'artist_names.bin'
+
+_GRAPH_HEADER = struct.Struct('<8s6Q64s')
+_NAMES_HEADER = struct.Struct('<8s3Q')
+_NO_GID = bytes(16)
+
+
+def _check_byteorder():
+    if sys.byteorder != 'little':
+        raise RuntimeError("shared graph files are little endian only")
+
+
+def _pad(f):
+    rem = f.tell() % 8
+    if rem:
+        f.write(bytes(8 - rem))
+
+
+def _aligned(pos):
+    return (pos + 7) & ~7
+
+
+def pack_strings(strings):
+    """Pack a sequence of str into (uint64 offsets array, utf-8 blob)."""
+    offsets = array('Q', [0])
+    chunks = []
+    pos = 0
+    for s in strings:
+        b = (s or '').encode('utf-8')
+        chunks.append(b)
+        pos += len(b)
+        offsets.append(pos)
+    return offsets, b''.join(chunks)
+
+
+def write_shared_graph(path, graph, weights=None, build_id=None):
+    """
+    Write graph (dict[artist_id] -> list[(neighbor_id, track)]) and optional
+    aligned weights (see sdos.graph.build_edge_weights) to a shared graph file,
+    stamped with the graph's build id.
+    The file is written to a temp name and renamed, so readers never see a partial file.
+    """
+    _check_byteorder()
+    n_slots = (max(graph) + 1) if graph else 0
+    offsets = array('Q', bytes(8 * (n_slots + 1)))
+    neighbors = array('I')
+    tracks = array('I')
+    edge_weights = array('I')
+    track_index = {}
+    track_names = []
+
+    pos = 0
+    for artist_id in range(n_slots):
+        row = graph.get(artist_id)
+        if row:
+            for neighbor, track in row:
+                neighbors.append(neighbor)
+                idx = track_index.get(track)
+                if idx is None:
+                    idx = track_index[track] = len(track_names)
+                    track_names.append(track)
+                tracks.append(idx)
+            if weights is not None:
+                w = weights.get(artist_id)
+                if w is None or len(w) != len(row):
+                    w = array('I', bytes(4 * len(row)))
+                edge_weights.extend(w)
+            pos += len(row)
+        offsets[artist_id + 1] = pos
+
+    track_offsets, track_blob = pack_strings(track_names)
+    n_nodes = sum(1 for row in graph.values() if row)
+
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, 'wb') as f:
+        f.write(_GRAPH_HEADER.pack(GRAPH_MAGIC, n_slots, n_nodes, len(neighbors),
+                                   len(track_names), len(track_blob), int(weights is not None),
+                                   (build_id or '').encode('ascii')))
+        for section in (offsets, neighbors, tracks):
+            section.tofile(f)
+            _pad(f)
+        if weights is not None:
+            edge_weights.tofile(f)
+            _pad(f)
+        track_offsets.tofile(f)
+        f.write(track_blob)
+    os.replace(tmp, path)
+
+
+def write_shared_artist_names(path, artist_cache):
+    """Write the artist cache (dict[artist_id] -> (name, gid)) to a shared names file."""
+    _check_byteorder()
+    n_slots = (max(artist_cache) + 1) if artist_cache else 0
+    gids = bytearray(16 * n_slots)
+
+    def names():
+        for artist_id in range(n_slots):
+            entry = artist_cache.get(artist_id)
+            if entry is None:
+                yield ''
+                continue
+            name, gid = entry
+            if gid is not None:
+                gids[16 * artist_id:16 * artist_id + 16] = uuid.UUID(str(gid)).bytes
+            yield name
+
+    name_offsets, name_blob = pack_strings(names())
+
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, 'wb') as f:
+        f.write(_NAMES_HEADER.pack(NAMES_MAGIC, n_slots, len(artist_cache), len(name_blob)))
+        name_offsets.tofile(f)
+        f.write(gids)
+        _pad(f)
+        f.write(name_blob)
+    os.replace(tmp, path)
+
+
+def shared_graph_build_id(path):
+    """Build id stamped in a shared graph file, or None when it is missing or in an older format."""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(_GRAPH_HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(header) < _GRAPH_HEADER.size or header[:len(GRAPH_MAGIC)] != GRAPH_MAGIC:
+        return None
+    return _GRAPH_HEADER.unpack(header)[7].rstrip(b'\0').decode('ascii')
+
+
+def _open_mmap(path):
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class _EdgeWeights:
+    """dict-like view: artist_id -> weights aligned with SharedGraph.get(artist_id)."""
+
+    def __init__(self, shared):
+        self._shared = shared
+
+    def get(self, artist_id, default=None):
+        lo, hi = self._shared._row(artist_id)
+        if lo == hi:
+            return default
+        return self._shared._weights[lo:hi]
+
+
+class SharedGraph:
+    """
+    Read-only collaboration graph backed by an mmap'd file.
+    Supports the subset of the dict interface the pathfinding code uses:
+    get(), [], `in`, len(), iteration over artist ids and items(). Rows hold
+    (neighbor_id, track_index) so a search never decodes track names; the
+    searches turn the indices of the path they return into names with
+    track_name(), and degree() is read straight from the offsets.
+    """
+
+    def __init__(self, path):
+        _check_byteorder()
+        self.path = path
+        self._mm = _open_mmap(path)
+        magic, n_slots, n_nodes, n_edges, n_tracks, blob_len, has_weights, build_id = \
+            _GRAPH_HEADER.unpack_from(self._mm, 0)
+        if magic != GRAPH_MAGIC:
+            raise ValueError(f"{path} is not a shared graph file")
+        self._n_slots = n_slots
+        self._n_nodes = n_nodes
+        self.n_edges = n_edges
+        self.build_id = build_id.rstrip(b'\0').decode('ascii') or None
+
+        view = memoryview(self._mm)
+        pos = _GRAPH_HEADER.size
+        self._offsets = view[pos:pos + 8 * (n_slots + 1)].cast('Q')
+        pos = _aligned(pos + 8 * (n_slots + 1))
+        self._neighbors = view[pos:pos + 4 * n_edges].cast('I')
+        pos = _aligned(pos + 4 * n_edges)
+        self._tracks = view[pos:pos + 4 * n_edges].cast('I')
+        pos = _aligned(pos + 4 * n_edges)
+        self._weights = None
+        if has_weights:
+            self._weights = view[pos:pos + 4 * n_edges].cast('I')
+            pos = _aligned(pos + 4 * n_edges)
+        self._track_offsets = view[pos:pos + 8 * (n_tracks + 1)].cast('Q')
+        pos += 8 * (n_tracks + 1)
+        self._track_blob = view[pos:pos + blob_len]
+
+        self.weights = _EdgeWeights(self) if has_weights else None
+
+    def _row(self, artist_id):
+        if not isinstance(artist_id, int) or artist_id < 0 or artist_id >= self._n_slots:
+            return 0, 0
+        return self._offsets[artist_id], self._offsets[artist_id + 1]
+
+    def track_name(self, idx):
+        return str(self._track_blob[self._track_offsets[idx]:self._track_offsets[idx + 1]], 'utf-8')
+
+    def degree(self, artist_id):
+        lo, hi = self._row(artist_id)
+        return hi - lo
+
+    def get(self, artist_id, default=None):
+        lo, hi = self._row(artist_id)
+        if lo == hi:
+            return default
+        return list(zip(self._neighbors[lo:hi].tolist(), self._tracks[lo:hi].tolist()))
+
+    def __getitem__(self, artist_id):
+        row = self.get(artist_id)
+        if row is None:
+            raise KeyError(artist_id)
+        return row
+
+    def __contains__(self, artist_id):
+        lo, hi = self._row(artist_id)
+        return hi > lo
+
+    def __len__(self):
+        return self._n_nodes
+
+    def __iter__(self):
+        offsets = self._offsets
+        for artist_id in range(self._n_slots):
+            if offsets[artist_id + 1] > offsets[artist_id]:
+                yield artist_id
+
+    def keys(self):
+        return iter(self)
+
+    def items(self):
+        for artist_id in self:
+            yield artist_id, self.get(artist_id)
+
+    def close(self):
+        self._offsets = self._neighbors = self._tracks = self._weights = None
+        self._track_offsets = self._track_blob = None
+        self._mm.close()
+
+
+class SharedArtistNames:
+    """Read-only artist_id -> (name, gid) lookup backed by an mmap'd file."""
+
+    def __init__(self, path):
+        _check_byteorder()
+        self.path = path
+        self._mm = _open_mmap(path)
+        magic, n_slots, n_names, blob_len = _NAMES_HEADER.unpack_from(self._mm, 0)
+        if magic != NAMES_MAGIC:
+            raise ValueError(f"{path} is not a shared artist names file")
+        self._n_slots = n_slots
+        self._n_names = n_names
+
+        view = memoryview(self._mm)
+        pos = _NAMES_HEADER.size
+        self._offsets = view[pos:pos + 8 * (n_slots + 1)].cast('Q')
+        pos += 8 * (n_slots + 1)
+        self._gids = view[pos:pos + 16 * n_slots]
+        pos = _aligned(pos + 16 * n_slots)
+        self._blob = view[pos:pos + blob_len]
+
+    def get(self, artist_id, default=None):
+        if not isinstance(artist_id, int) or artist_id < 0 or artist_id >= self._n_slots:
+            return default
+        raw_gid = bytes(self._gids[16 * artist_id:16 * artist_id + 16])
+        lo, hi = self._offsets[artist_id], self._offsets[artist_id + 1]
+        if lo == hi and raw_gid == _NO_GID:
+            return default
+        gid = str(uuid.UUID(bytes=raw_gid)) if raw_gid != _NO_GID else None
+        return str(self._blob[lo:hi], 'utf-8'), gid
+
+    def __getitem__(self, artist_id):
+        entry = self.get(artist_id)
+        if entry is None:
+            raise KeyError(artist_id)
+        return entry
+
+    def __contains__(self, artist_id):
+        return self.get(artist_id) is not None
+
+    def __len__(self):
+        return self._n_names
+
+    def close(self):
+        self._offsets = self._gids = self._blob = None
+        self._mm.close()
+
+
+@contextmanager
+def shared_dir_lock(directory):
+    """Exclusive lock on a shared directory, held by whoever writes its files."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def open_or_create_shared(directory, load_graph, load_artist_cache, load_weights=None, build_id=None):
+    """
+    Open the shared graph and artist-name files in `directory`, creating them first
+    if needed. An exclusive file lock makes sure only one process (e.g. the first
+    uvicorn worker) builds them; the others block on the lock and then just map the result.
+    load_graph / load_artist_cache / load_weights are callables returning the
+    in-process structures used as the source; load_graph returns (graph, build_id)
+    and load_weights(build_id) the weights saved for that build (or None).
+    build_id is the build the files should hold (sdos.graph.graph_cache_build_id());
+    files stamped with another build, or in an older format, are rewritten
+    together with the names. Workers that mapped the old files keep reading them
+    (the new ones are renamed over them) until they are restarted.
+    Returns (SharedGraph, SharedArtistNames).
+    """
+    graph_path = os.path.join(directory, SHARED_GRAPH_FILE)
+    names_path = os.path.join(directory, SHARED_NAMES_FILE)
+
+    with shared_dir_lock(directory):
+        shared_id = shared_graph_build_id(graph_path)
+        stale = shared_id is None or (build_id is not None and shared_id != build_id)
+        if stale or not os.path.exists(names_path):
+            write_shared_artist_names(names_path, load_artist_cache())
+        if stale:
+            graph, graph_build_id = load_graph()
+            weights = load_weights(graph_build_id) if load_weights is not None else None
+            write_shared_graph(graph_path, graph, weights, graph_build_id)
+
+    return SharedGraph(graph_path), SharedArtistNames(names_path)
+
+
+def main():
+    """Build the shared files from the pickle caches (or the database) ahead of time."""
+    from sdos.db import get_connection
+    from sdos.graph import (
+        rebuild_graph_cache,
+        load_graph_and_build_id,
+        graph_cache_build_id,
+        load_artist_name_cache,
+        build_artist_name_cache,
+        load_edge_weights,
+    )
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else os.environ.get('SDOS_SHARED_GRAPH_DIR', 'data/shared')
+
+    def load_graph():
+        graph, build_id = load_graph_and_build_id()
+        if graph is not None:
+            return graph, build_id
+        conn = get_connection()
+        try:
+            return rebuild_graph_cache(conn)
+        finally:
+            conn.close()
+
+    def load_artist_cache():
+        cache = load_artist_name_cache()
+        if cache is None:
+            conn = get_connection()
+            try:
+                cache = build_artist_name_cache(conn)
+            finally:
+                conn.close()
+        return cache
+
+    graph, names = open_or_create_shared(directory, load_graph, load_artist_cache, load_edge_weights,
+                                         build_id=graph_cache_build_id())
+    print(f"Shared graph ready in {directory}: {len(graph)} artists, {len(names)} names")
+
+
+if __name__ == '__main__':
+    main()
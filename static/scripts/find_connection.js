@@ -107,6 +107,22 @@ console.log('SDOS main.js starting...');
     const key = `${trackName}||${artistName || ''}`;
     if (coverCache.has(key)) return coverCache.get(key);
 
+    // server lookup first (cached on disk and shared by everyone), iTunes directly as a fallback
+    try {
+      const proxy = '/api/cover?track=' + encodeURIComponent(trackName) + (artistName ? '&artist=' + encodeURIComponent(artistName) : '');
+      const r = await fetch(proxy);
+      if (r.ok) {
+        const j = await r.json();
+        const out = { cover: j.cover || null, preview: j.preview || null };
+        coverCache.set(key, out);
+        return out;
+      } else {
+        console.debug('/api/cover returned', r.status);
+      }
+    } catch (err) {
+      console.debug('Server /api/cover failed:', err);
+    }
+
     try {
       const q = encodeURIComponent(`${trackName} ${artistName || ''}`);
       const url = `https://itunes.apple.com/search?term=${q}&entity=song&limit=1&country=US`;
@@ -131,21 +147,6 @@ console.log('SDOS main.js starting...');
       console.debug('iTunes search fetch error (likely CORS):', err);
     }
 
-    try {
-      const proxy = '/api/cover?track=' + encodeURIComponent(trackName) + (artistName ? '&artist=' + encodeURIComponent(artistName) : '');
-      const r = await fetch(proxy);
-      if (r.ok) {
-        const j = await r.json();
-        const out = { cover: j.cover || null, preview: j.preview || null };
-        coverCache.set(key, out);
-        return out;
-      } else {
-        console.debug('/api/cover returned', r.status);
-      }
-    } catch (err) {
-      console.debug('Server /api/cover failed:', err);
-    }
-
     const none = { cover: null, preview: null };
     coverCache.set(key, none);
     return none;
@@ -177,10 +178,13 @@ console.log('SDOS main.js starting...');
       const div = document.createElement('div');
       div.className = 'autocomplete-item';
       const mbidText = it.gid ? ('MBID: ' + escapeHtml(String(it.gid))) : ('ID: ' + escapeHtml(String(it.id)));
+      let graphText = '';
+      if (it.in_graph === false) graphText = ' · no collaborations';
+      else if (it.degree) graphText = ` · ${it.degree} collaborators`;
       div.innerHTML = `
         <div class="artist-info">
           <div class="artist-name">${escapeHtml(it.name)}</div>
-          <div class="artist-details">${it.release_count} releases</div>
+          <div class="artist-details">${it.release_count} releases${graphText}</div>
           <div class="artist-mbid">${mbidText}</div>
         </div>
       `;
@@ -246,6 +250,62 @@ console.log('SDOS main.js starting...');
   const foundRoutes = [];
   let cycleIndex = 0;
 
+  // instant landmark estimate, shown until the real path arrives
+  function estimateText(est) {
+    if (!est.connected) return 'These artists do not seem to be connected…';
+    if (est.exact) return `${est.lower} degree${est.lower === 1 ? '' : 's'} of separation, finding the path…`;
+    if (est.upper === null) return `At least ${est.lower} degrees apart, searching…`;
+    return `About ${est.upper} degrees apart (at least ${est.lower}), searching…`;
+  }
+
+  async function showEstimate(source, target, isCurrent) {
+    try {
+      const r = await fetch(`/api/path/estimate?source_id=${source}&target_id=${target}`);
+      if (!r.ok) return;
+      const est = await r.json();
+      // only while this search is still running and nothing else has been shown
+      if (isCurrent() && resultsEl && resultsEl.innerHTML === '') {
+        resultsEl.innerHTML = `<div class="results-header estimate">${escapeHtml(estimateText(est))}</div>`;
+      }
+    } catch (e) {
+      console.debug('estimate failed', e);
+    }
+  }
+  // equally short routes from the server's shortest-path DAG, fetched a page at a time
+  const equalRoutes = { pending: [], offset: 0, count: null };
+
+  function resetEqualRoutes() {
+    equalRoutes.pending.length = 0;
+    equalRoutes.offset = 0;
+    equalRoutes.count = null;
+  }
+
+  async function nextEqualRoute(source, target) {
+    while (true) {
+      while (equalRoutes.pending.length > 0) {
+        const route = equalRoutes.pending.shift();
+        const pairs = pathToPairsString(route);
+        if (!foundRoutes.some(r => pathToPairsString(r.path) === pairs)) return route;
+      }
+      if (equalRoutes.count !== null && equalRoutes.offset >= equalRoutes.count) return null;
+
+      const body = { source_id: source, target_id: target, all_routes: true,
+                     route_offset: equalRoutes.offset, route_limit: 10 };
+      const resp = await fetch('/api/path', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body)
+      });
+      if (!resp.ok) return null;
+      const data = await resp.json();
+      const routes = data.found ? (data.routes || []) : [];
+      equalRoutes.count = data.found ? data.route_count : 0;
+      equalRoutes.offset += routes.length;
+      if (routes.length === 0) equalRoutes.count = equalRoutes.offset;
+      equalRoutes.pending.push(...routes);
+    }
+  }
+
   function pathToPairsString(path) {
     if (!Array.isArray(path) || path.length === 0) return '';
     return path.map(s => `${s.from_id || ''}->${s.to_id || ''}`).join('|');
@@ -600,6 +660,17 @@ console.log('SDOS main.js starting...');
       const source = parseInt(last.path[0].from_id, 10);
       const target = parseInt(last.path[last.path.length - 1].to_id, 10);
 
+      // other routes of the same length first, then longer ones around the edges seen so far
+      const equal = await nextEqualRoute(source, target);
+      if (equal) {
+        foundRoutes.push({ path: equal });
+        cycleIndex = foundRoutes.length - 1;
+        await renderPathWithCovers(equal, false);
+        await forceSmoothScrollToTop(500);
+        animateFadeIn();
+        return;
+      }
+
       const body = { source_id: source, target_id: target, exclude_edges: union };
       const resp = await fetch('/api/path', {
         method: 'POST',
@@ -684,10 +755,12 @@ console.log('SDOS main.js starting...');
       startLoadingAnimation();
       if (findBtn) findBtn.disabled = true;
 
+      let searching = true;
       try {
         const source = parseInt(hid1.value, 10);
         const target = parseInt(hid2.value, 10);
 
+        showEstimate(source, target, () => searching);
         const payload = { source_id: source, target_id: target };
         const resp = await fetch('/api/path', {
           method: 'POST',
@@ -706,14 +779,18 @@ console.log('SDOS main.js starting...');
         }
 
         const data = await resp.json();
+        searching = false;
+        if (resultsEl) resultsEl.innerHTML = '';
 
         if (!data.found) {
-          if (resultsEl) resultsEl.innerHTML = `<div class="results-header">No connection found!</div>`;
+          const msg = data.gave_up ? 'The search took too long, please try again.' : 'No connection found!';
+          if (resultsEl) resultsEl.innerHTML = `<div class="results-header">${msg}</div>`;
           return;
         }
 
         foundRoutes.length = 0;
         cycleIndex = 0;
+        resetEqualRoutes();
         const normalized = data.path.map(step => ({
           from_id: step.from_id,
           to_id: step.to_id,
@@ -731,6 +808,7 @@ console.log('SDOS main.js starting...');
         console.error('Submit error', err);
         if (resultsEl) resultsEl.innerHTML = '<div class="results-header">Unexpected error - check console</div>';
       } finally {
+        searching = false;
         stopLoadingAnimation();
         if (findBtn) findBtn.disabled = false;
       }
@@ -1,30 +1,36 @@
 #!/usr/bin/env python3
 """
-main.py
+terminal_sdos.py
 
-Run the SDOS CLI (now modular) which:
- - lets the user pick two artists (ranked results shown)
- - builds or loads a cached collaboration graph
- - finds a shortest path between artists using bidirectional BFS
- - prints the path with MBIDs and the recording used per hop
+Run the SDOS CLI, which:
+ - loads (or builds) the cached collaboration graph once
+ - answers any number of artist pairs against it, interactively or in batch
+ - finds a shortest path per pair with the same engine as the web app
+ - prints each path with MBIDs, the recording used per hop and timings
+
+An artist is given by name (the best search match is used, preferring artists
+that are in the graph) or by database id as id:<number>. A pair is one CSV
+line, e.g.  Daft Punk, Pharrell Williams  or  "Earth, Wind & Fire",id:1234
 
 Usage:
-    python main.py            # normal run (uses cache if present)
-    python main.py --rebuild  # force rebuild of the collaboration graph
+    python terminal_sdos.py                   # interactive prompt (one pair per line)
+    python terminal_sdos.py --batch pairs.csv # answer every line of a file ("-" for stdin)
+    python terminal_sdos.py --batch - --jsonl # one JSON object per pair, streamed
+    python terminal_sdos.py --rebuild         # force rebuild of the collaboration graph first
+
+At the prompt, "search <name>" lists the matches for a name and "quit" exits.
 """
 
-import os
 import sys
-from datetime import datetime
+import csv
+import json
+import time
+import argparse
 
-from sdos.db import get_connection
-from sdos.graph import (
-    get_or_build_graph,
-    load_artist_name_cache,
-    build_artist_name_cache,
-)
-from sdos.search import select_artist
-from sdos.pathfinding import bidirectional_bfs_with_tracks
+from sdos.engine import Engine
+from sdos.pathfinding import SearchLimits
+
+ID_PREFIX = "id:"
 
 
 def print_intro():
@@ -32,111 +38,195 @@ def print_intro():
     print("--------------------------------------------------")
 
 
-def format_seconds(td):
-    return f"{td.total_seconds():.3f}s"
-
-
-def main():
-    # CLI arg: --rebuild to force graph rebuild
-    force_rebuild = False
-    if len(sys.argv) > 1 and sys.argv[1] == "--rebuild":
-        force_rebuild = True
-
-    conn = None
-    try:
-        conn = get_connection()
-        print("✅ Connected to database")
-
-        # Load or create artist name cache (id -> (name, gid))
-        artist_cache = load_artist_name_cache()
-        if artist_cache is None:
-            print("Artist name cache not found; building...")
-            artist_cache = build_artist_name_cache(conn)
-
-        # Build or load the collaboration graph (may be large; cached to disk)
-        start_build = datetime.now()
-        graph = get_or_build_graph(conn, force_rebuild=force_rebuild)
-        build_time = datetime.now() - start_build
-        print(f"Graph ready (artists in graph: {len(graph)}) — build/load took {format_seconds(build_time)}")
-
-        # Select first artist
-        a1_input = input("Enter first artist name: ").strip()
-        a1_result = select_artist(conn, a1_input)
-        if not a1_result:
-            print(f"❌ First artist '{a1_input}' not found.")
+def parse_pair(line):
+    """The two artist fields of a query line, or None for blank / comment / malformed lines."""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    fields = [f.strip() for f in next(csv.reader([line], skipinitialspace=True)) if f.strip()]
+    if len(fields) != 2:
+        return None
+    return fields[0], fields[1]
+
+
+def find_artist(engine, text):
+    """(artist_id, name, mbid) for an id:<n> or a name (best match, in-graph first), or None."""
+    if text.lower().startswith(ID_PREFIX) and text[len(ID_PREFIX):].strip().isdigit():
+        artist_id = int(text[len(ID_PREFIX):])
+        name, gid = engine.resolve_artist(artist_id)
+        return artist_id, name, str(gid) if gid else None
+    rows = engine.search(text, limit=10)
+    if not rows:
+        return None
+    best = next((r for r in rows if r["in_graph"]), rows[0])
+    return best["id"], best["name"], best["gid"]
+
+
+def answer(engine, source_text, target_text, timeout=None):
+    """Resolve both artists and search the path; a dict ready to print or dump as JSON."""
+    record = {"source_query": source_text, "target_query": target_text}
+    start = time.perf_counter()
+    source = find_artist(engine, source_text)
+    target = find_artist(engine, target_text)
+    resolved = time.perf_counter()
+    record["resolve_seconds"] = round(resolved - start, 6)
+
+    for key, text, found in (("source", source_text, source), ("target", target_text, target)):
+        if found is None:
+            record["error"] = f"artist '{text}' not found"
+            return record
+        record[key] = {"id": found[0], "name": found[1], "mbid": found[2]}
+    missing = engine.missing(source[0], target[0])
+    if missing:
+        record["error"] = "not in the collaboration graph: " + ", ".join(
+            record[k]["name"] for k in ("source", "target") if record[k]["id"] in missing)
+        return record
+
+    limits = SearchLimits.after(timeout) if timeout else None
+    result = engine.path(source[0], target[0], limits=limits)
+    record["found"] = result["found"]
+    if "gave_up" in result:
+        record["gave_up"] = result["gave_up"]
+    if result["found"]:
+        record["degrees"] = result["degrees"]
+        record["path"] = []
+        for artist_id, track in result["path"]:
+            name, gid = engine.resolve_artist(artist_id)
+            record["path"].append({"id": artist_id, "name": name, "mbid": str(gid) if gid else None,
+                                   "track": track})
+    record["cached"] = result.get("cached", False)
+    record["path_seconds"] = round(time.perf_counter() - resolved, 6)
+    record["total_seconds"] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def format_seconds(seconds):
+    return f"{seconds:.3f}s"
+
+
+def print_record(n, record):
+    if "error" in record:
+        print(f"[{n}] ❌ {record['source_query']} / {record['target_query']}: {record['error']} "
+              f"(lookup {format_seconds(record['resolve_seconds'])})")
+        return
+    source, target = record["source"], record["target"]
+    timing = (f"lookup {format_seconds(record['resolve_seconds'])}, path {format_seconds(record['path_seconds'])}"
+              f"{' (cached)' if record['cached'] else ''}, total {format_seconds(record['total_seconds'])}")
+    if not record["found"]:
+        reason = f"search stopped ({record['gave_up']})" if "gave_up" in record else "no connection"
+        print(f"[{n}] ❌ {source['name']} / {target['name']}: {reason} ({timing})")
+        return
+    degrees = record["degrees"]
+    print(f"[{n}] ✅ {source['name']} → {target['name']}: {degrees} degree{'s' if degrees != 1 else ''} ({timing})")
+    current_name = source["name"]
+    for step, hop in enumerate(record["path"], 1):
+        print(f"    {step}. {current_name}  <-->  {hop['name']} (MBID: {hop['mbid']})")
+        print(f"       via: '{hop['track']}'")
+        current_name = hop["name"]
+
+
+def run_queries(engine, lines, jsonl=False, timeout=None, interactive=False):
+    """
+    Answer each pair line as it arrives, printing (and flushing) every result right
+    away. interactive also accepts the prompt commands (search, quit).
+    """
+    n = 0
+    answered = 0
+    started = time.perf_counter()
+    for line in lines:
+        stripped = line.strip()
+        if interactive:
+            if stripped.lower() in ("quit", "exit", "q"):
+                break
+            if stripped.lower().startswith("search "):
+                print_matches(engine, stripped[len("search "):].strip())
+                continue
+        pair = parse_pair(line)
+        if pair is None:
+            if stripped and not stripped.startswith("#"):
+                print(f"⚠️ Expected two artists separated by a comma: {stripped}", file=sys.stderr)
+            continue
+        n += 1
+        try:
+            record = answer(engine, pair[0], pair[1], timeout=timeout)
+        except Exception as e:
+            record = {"source_query": pair[0], "target_query": pair[1], "error": f"{type(e).__name__}: {e}",
+                      "resolve_seconds": 0.0}
+        answered += "error" not in record
+        if jsonl:
+            print(json.dumps(record, ensure_ascii=False))
+        else:
+            print_record(n, record)
+        sys.stdout.flush()
+    if not jsonl and n:
+        elapsed = time.perf_counter() - started
+        print(f"Answered {answered}/{n} pairs in {format_seconds(elapsed)}", file=sys.stderr)
+
+
+def print_matches(engine, name):
+    rows = engine.search(name, limit=10)
+    if not rows:
+        print(f"No artists found for '{name}'.")
+    for row in rows:
+        where = f"{row['degree']} collaborators" if row["in_graph"] else "not in graph"
+        print(f"  id:{row['id']}  {row['name']} (MBID: {row['gid']}) - {row['release_count']} releases, {where}")
+
+
+def prompt_lines(prompt):
+    while True:
+        try:
+            yield input(prompt)
+        except EOFError:
+            print()
             return
-        a1_id, a1_name, search_time_1 = a1_result
 
-        # Select second artist
-        a2_input = input("Enter second artist name: ").strip()
-        a2_result = select_artist(conn, a2_input)
-        if not a2_result:
-            print(f"❌ Second artist '{a2_input}' not found.")
-            return
-        a2_id, a2_name, search_time_2 = a2_result
-
-        print("\nSearch Performance:")
-        print(f"  First artist lookup : {format_seconds(search_time_1)}")
-        print(f"  Second artist lookup: {format_seconds(search_time_2)}")
-        print(f"  Total artist lookup : {format_seconds(search_time_1 + search_time_2)}")
-
-        print(f"\nSearching for connection between '{a1_name}' and '{a2_name}'...")
-
-        # Make sure both artists exist in the built graph
-        if a1_id not in graph or a2_id not in graph:
-            print("❌ One or both artists have no collaborations in the graph (or were filtered).")
-            if a1_id not in graph:
-                print(f"   - {a1_name} (id={a1_id}) not in graph")
-            if a2_id not in graph:
-                print(f"   - {a2_name} (id={a2_id}) not in graph")
-            return
-
-        # Run pathfinding (bidirectional BFS)
-        path_start = datetime.now()
-        path = bidirectional_bfs_with_tracks(graph, a1_id, a2_id)
-        path_time = datetime.now() - path_start
 
-        if not path:
-            print(f"❌ No connection path found between '{a1_name}' and '{a2_name}'.")
-            print(f"Path search completed in {format_seconds(path_time)}")
-            return
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SDOS: shortest collaboration paths between artists")
+    parser.add_argument("--batch", metavar="FILE", help="answer every pair in FILE (CSV lines, '-' for stdin)")
+    parser.add_argument("--jsonl", action="store_true", help="print one JSON object per pair")
+    parser.add_argument("--timeout", type=float, default=None, help="give up a single search after this many seconds")
+    parser.add_argument("--rebuild", action="store_true", help="force rebuild of the collaboration graph")
+    args = parser.parse_args(argv)
+    if not args.batch and sys.stdin.isatty():
+        print_intro()
 
-        # Print the path
-        print(f"\n✅ Connection path found ({len(path)} degrees of separation) in {format_seconds(path_time)}:\n")
-        current_name = a1_name
-        step = 0
-        for artist_id, track in path:
-            step += 1
-            # Prefer cached name+gid
-            if artist_id in artist_cache:
-                next_name, gid = artist_cache[artist_id]
+    # same engine and settings as the web app, minus the random-pair sampler
+    engine = Engine.from_env(pair_pool_size=0)
+    try:
+        if args.rebuild:
+            # rewrites the graph cache files, which the load below then reads
+            print("Rebuilding collaboration graph...", file=sys.stderr)
+            engine.rebuild()
+
+        # Load the artist names and the collaboration graph once for all queries
+        start = time.perf_counter()
+        engine.warm()
+        print(f"Graph ready (artists in graph: {len(engine.graph)}) — build/load took "
+              f"{format_seconds(time.perf_counter() - start)}", file=sys.stderr)
+
+        if args.batch:
+            if args.batch == "-":
+                run_queries(engine, sys.stdin, jsonl=args.jsonl, timeout=args.timeout)
             else:
-                # Fallback: query DB
-                with conn.cursor() as cur:
-                    cur.execute("SELECT name, gid FROM artist WHERE id = %s", (artist_id,))
-                    row = cur.fetchone()
-                    if row:
-                        next_name, gid = row
-                    else:
-                        next_name, gid = f"<artist {artist_id}>", None
-
-            print(f"{step}. {current_name}  <-->  {next_name} (MBID: {gid})")
-            print(f"    via: '{track}'\n")
-            current_name = next_name
-
-        # final artist confirmation
-        print(f"Final artist: {current_name}")
-
+                with open(args.batch, encoding="utf-8") as f:
+                    run_queries(engine, f, jsonl=args.jsonl, timeout=args.timeout)
+        elif sys.stdin.isatty():
+            print("Enter two artists per line (names or id:<n>, comma separated); "
+                  "'search <name>' lists matches, 'quit' exits.")
+            run_queries(engine, prompt_lines("sdos> "), jsonl=args.jsonl, timeout=args.timeout, interactive=True)
+        else:
+            run_queries(engine, sys.stdin, jsonl=args.jsonl, timeout=args.timeout)
+    except KeyboardInterrupt:
+        print()
     except Exception as e:
         print("❌ Error running SDOS:")
         print(e)
         import traceback
         traceback.print_exc()
     finally:
-        if conn:
-            conn.close()
+        engine.close()
 
 
 if __name__ == "__main__":
-    print_intro()
     main()
@@ -0,0 +1,18 @@
+# tests/conftest.py
+import os
+import importlib
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def sdos_app(monkeypatch, tmp_path):
+    """The app module, imported without the disk cache, pair sampler or landmarks; runs in tmp_path."""
+    for name, value in (("SDOS_DISK_CACHE_MB", "0"), ("SDOS_PAIR_POOL_SIZE", "0"), ("SDOS_LANDMARKS", "0")):
+        monkeypatch.setenv(name, value)
+    monkeypatch.chdir(ROOT)  # static/ is mounted relative to the working directory
+    app = importlib.import_module("app")
+    monkeypatch.chdir(tmp_path)
+    return app
@@ -0,0 +1,108 @@
+# tests/graph_helpers.py
+# Small hand-built graphs and brute-force reference answers shared by the tests.
+
+import random
+from collections import deque
+
+from sdos.engine import Engine
+
+
+def random_graph(n, n_edges, seed):
+    """Small random collaboration graph (tracks named after the pair) plus a few hubs."""
+    rng = random.Random(seed)
+    graph = {i: [] for i in range(n)}
+    edges = set()
+    hubs = range(3)
+    while len(edges) < n_edges:
+        a = rng.choice(hubs) if rng.random() < 0.3 else rng.randrange(n)
+        b = rng.randrange(n)
+        if a != b and (min(a, b), max(a, b)) not in edges:
+            edges.add((min(a, b), max(a, b)))
+            graph[a].append((b, f"{min(a, b)}-{max(a, b)}"))
+            graph[b].append((a, f"{min(a, b)}-{max(a, b)}"))
+    return {a: row for a, row in graph.items() if row}
+
+
+def brute_force_distance(graph, start, end, excluded=()):
+    excluded = {frozenset(e) for e in excluded}
+    distances = {start: 0}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for neighbor, _ in graph.get(node, ()):
+            if neighbor not in distances and frozenset((node, neighbor)) not in excluded:
+                distances[neighbor] = distances[node] + 1
+                queue.append(neighbor)
+    return distances.get(end)
+
+
+def brute_force_shortest_paths(graph, start, end, excluded=()):
+    """Every shortest path from start to end as a list of (artist_id, track), by plain enumeration."""
+    excluded = {frozenset(e) for e in excluded}
+    to_end = {end: 0}
+    queue = deque([end])
+    while queue:
+        node = queue.popleft()
+        for neighbor, _ in graph.get(node, ()):
+            if neighbor not in to_end and frozenset((node, neighbor)) not in excluded:
+                to_end[neighbor] = to_end[node] + 1
+                queue.append(neighbor)
+    if start not in to_end:
+        return []
+    paths = []
+
+    def walk(node, path):
+        if node == end:
+            paths.append(path)
+            return
+        for neighbor, track in graph[node]:
+            if to_end.get(neighbor) == to_end[node] - 1 and frozenset((node, neighbor)) not in excluded:
+                walk(neighbor, path + [(neighbor, track)])
+
+    walk(start, [])
+    return paths
+
+
+def assert_valid_path(graph, start, path, excluded=()):
+    excluded = {frozenset(e) for e in excluded}
+    node = start
+    for artist_id, track in path:
+        assert (artist_id, track) in graph[node]
+        assert frozenset((node, artist_id)) not in excluded
+        node = artist_id
+
+
+def add_edge(graph, a, b, track):
+    graph.setdefault(a, []).append((b, track))
+    graph.setdefault(b, []).append((a, track))
+
+
+def grid_graph(width, height):
+    """width x height grid: C(width + height - 2, width - 1) shortest paths between opposite corners."""
+    graph = {}
+    for x in range(width):
+        for y in range(height):
+            node = x * height + y
+            for other in ((x + 1) * height + y if x + 1 < width else None, node + 1 if y + 1 < height else None):
+                if other is not None:
+                    graph.setdefault(node, []).append((other, f"{node}-{other}"))
+                    graph.setdefault(other, []).append((node, f"{node}-{other}"))
+    return graph
+
+
+class GraphEngine(Engine):
+    """Engine over a given graph, without the database; artist n is named "Artist n" unless names say otherwise."""
+
+    def __init__(self, graph, names=None, **kwargs):
+        self.test_graph = graph
+        self.test_names = names if names is not None else {n: (f"Artist {n}", None) for n in graph}
+        super().__init__(**kwargs)
+
+    def _load_graph(self):
+        return self.test_graph, "test-build"
+
+    def _load_artist_cache(self):
+        return self.test_names
+
+    def _load_weights(self, build_id):
+        return None
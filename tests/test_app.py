@@ -0,0 +1,75 @@
+# tests/test_app.py
+import pytest
+from fastapi.testclient import TestClient
+
+from sdos import engine as sdos_engine
+
+from graph_helpers import GraphEngine
+
+# artist 1 collaborates with 100..159; neighbor 100 + k has k + 1 collaborators of its own
+GRAPH = {1: []}
+for k in range(60):
+    GRAPH[1].append((100 + k, f"track {k}"))
+    GRAPH[100 + k] = [(1, f"track {k}")] + [(1000 + j, "x") for j in range(k)]
+for j in range(59):
+    GRAPH[1000 + j] = [(100 + k, "x") for k in range(j + 1, 60)]
+
+
+@pytest.fixture
+def client(sdos_app, monkeypatch):
+    engine = GraphEngine(GRAPH, disk_cache_mb=0, landmark_count=0)
+    monkeypatch.setattr(sdos_app, "ENGINE", engine)
+    with TestClient(sdos_app.app) as client:
+        yield client
+
+
+def test_neighbors_pages_heaviest_first(client):
+    first = client.get("/api/neighbors/1", params={"limit": 25}).json()
+    assert first["total"] == 60 and first["offset"] == 0
+    assert [n["id"] for n in first["neighbors"]] == [159 - k for k in range(25)]
+    assert first["neighbors"][0] == {"id": 159, "name": "Artist 159", "mbid": None, "track": "track 59",
+                                     "weight": 60}
+    rest = client.get("/api/neighbors/1", params={"offset": 25, "limit": 200}).json()
+    assert [n["id"] for n in rest["neighbors"]] == [159 - k for k in range(25, 60)]
+    assert client.get("/api/neighbors/1", params={"offset": 60}).json()["neighbors"] == []
+
+
+def test_neighbors_of_unknown_artist_is_404(client):
+    response = client.get("/api/neighbors/99999")
+    assert response.status_code == 404
+    assert client.get("/api/neighbors/1", params={"limit": 0}).status_code == 422
+
+
+def test_neighbor_rows_are_sorted_once_per_artist(client, sdos_app, monkeypatch):
+    calls = []
+    sort = sdos_engine.sorted_neighbor_rows
+    monkeypatch.setattr(sdos_engine, "sorted_neighbor_rows", lambda *a, **kw: calls.append(a[2]) or sort(*a, **kw))
+    for offset in (0, 10, 20):
+        client.get("/api/neighbors/1", params={"offset": offset, "limit": 10})
+    client.get("/api/neighbors/100")
+    assert calls == [1, 100]
+
+    # the cache is bounded by rows: listing 1 again after a small bound sorts it again
+    monkeypatch.setattr(sdos_engine, "NEIGHBOR_CACHE_ROWS", 10)
+    sdos_app.ENGINE._neighbor_rows.clear()
+    sdos_app.ENGINE._neighbor_rows_total = 0
+    client.get("/api/neighbors/1")
+    client.get("/api/neighbors/1")
+    assert calls == [1, 100, 1, 1] and not sdos_app.ENGINE._neighbor_rows
+
+
+class BrokenEngine(GraphEngine):
+    def _load_graph(self):
+        raise RuntimeError("database is down")
+
+
+def test_failed_load_answers_503_until_the_retry(sdos_app, monkeypatch):
+    engine = BrokenEngine(GRAPH, disk_cache_mb=0, landmark_count=0)
+    engine.loader.retry_seconds = 30
+    monkeypatch.setattr(sdos_app, "ENGINE", engine)
+    with TestClient(sdos_app.app) as client:
+        engine.load(timeout=5)
+        response = client.get("/api/neighbors/1")
+        assert response.status_code == 503 and 25 <= int(response.headers["Retry-After"]) <= 31
+        client.get("/api/neighbors/1")
+    assert engine.loader.failures == 1
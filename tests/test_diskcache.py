@@ -0,0 +1,88 @@
+# tests/test_diskcache.py
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from sdos import diskcache
+from sdos.diskcache import DiskCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite"))
+    yield cache
+    cache.close()
+
+
+def _accessed(cache, key):
+    return cache._conn().execute("SELECT accessed FROM entries WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_other_version_is_a_miss_that_keeps_the_entry(cache):
+    cache.set("path", "k", [1, 2], version="build-a")
+    assert cache.get("path", "k", version="build-b") is None
+    assert cache.get("path", "k", version="build-a") == [1, 2]
+
+
+def test_expired_entry_is_dropped(cache):
+    cache.set("cover", "k", "v", ttl=-1)
+    assert cache.get("cover", "k") is None
+    assert cache.stats() == {}
+
+
+def test_hits_only_refresh_stale_access_times(cache, monkeypatch):
+    cache.set("search", "k", "v")
+    stored = _accessed(cache, "k")
+    assert cache.get("search", "k") == "v"
+    assert _accessed(cache, "k") == stored
+
+    now = time.time() + diskcache.ACCESS_UPDATE_SECONDS + 1
+    monkeypatch.setattr(diskcache.time, "time", lambda: now)
+    assert cache.get("search", "k") == "v"
+    assert _accessed(cache, "k") == now
+
+
+def _store_raw(cache, key, blob):
+    cache._conn().execute("INSERT OR REPLACE INTO entries (namespace, key, version, expires, accessed, size, value) "
+                          "VALUES ('path', ?, NULL, NULL, ?, ?, ?)", (key, time.time(), len(blob), blob))
+
+
+@pytest.mark.parametrize("blob", [
+    b"",                                       # EOFError
+    b"\x80\x04not a pickle",                   # UnpicklingError
+    b"cno_such_module_sdos\nThing\n.",         # ModuleNotFoundError (an ImportError)
+    b"cos\nno_such_function_sdos\n.",          # AttributeError
+])
+def test_unreadable_entry_is_a_miss_and_deleted(cache, blob):
+    _store_raw(cache, "k", blob)
+    assert cache.get("path", "k") is None
+    assert cache.stats() == {}
+    cache.set("path", "k", "v")
+    assert cache.get("path", "k") == "v"
+
+
+def test_close_closes_every_threads_connection(cache):
+    cache.set("search", "k", "v")
+    conns = []
+
+    def read():
+        assert cache.get("search", "k") == "v"
+        conns.append(cache._conn())
+
+    threads = [threading.Thread(target=read) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    cache.close()
+    for conn in conns:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    # threads (and this one) reconnect on their next call
+    assert cache.get("search", "k") == "v"
+    thread = threading.Thread(target=read)
+    thread.start()
+    thread.join()
+    assert len(conns) == 4 and conns[-1] not in conns[:3]
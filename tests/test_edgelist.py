@@ -0,0 +1,44 @@
+# tests/test_edgelist.py
+import pytest
+
+from sdos.edgelist import export_graph, import_graph
+
+GRAPH = {
+    1: [(2, "Song A"), (3, "Song B"), (4, "Song A")],
+    2: [(1, "Song A"), (3, "Ünïcode")],
+    3: [(1, "Song B"), (2, "Ünïcode")],
+    4: [(1, "Song A")],
+    70000: [(70001, "")],
+    70001: [(70000, "")],
+}
+WEIGHTS = {1: [5, 1, 2], 2: [5, 7], 3: [1, 7], 4: [2], 70000: [3], 70001: [3]}
+ARTISTS = {1: ("One", "8e66ea2b-b57b-47d9-8df0-df4630aeb8e5"), 2: ("Twö", None), 5: ("Not in graph", None)}
+
+
+def rows(graph, weights=None):
+    """Adjacency as sorted (neighbor, track, weight) rows, independent of row order."""
+    return {a: sorted((b, track, weights[a][i] if weights else None) for i, (b, track) in enumerate(row))
+            for a, row in graph.items()}
+
+
+def test_round_trip_keeps_edges_weights_and_names(tmp_path):
+    path = str(tmp_path / "graph.sdosel")
+    assert export_graph(path, GRAPH, WEIGHTS, ARTISTS) == 5
+    graph, weights, artists = import_graph(path)
+    assert rows(graph, weights) == rows(GRAPH, WEIGHTS)
+    assert artists == ARTISTS
+
+
+def test_round_trip_without_weights_or_names(tmp_path):
+    path = str(tmp_path / "graph.sdosel")
+    export_graph(path, GRAPH)
+    graph, weights, artists = import_graph(path)
+    assert rows(graph) == rows(GRAPH)
+    assert weights is None and artists is None
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "graph.sdosel"
+    path.write_bytes(b"PK\x03\x04 not an edge list")
+    with pytest.raises(ValueError):
+        import_graph(str(path))
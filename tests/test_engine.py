@@ -0,0 +1,84 @@
+# tests/test_engine.py
+import contextlib
+
+import pytest
+
+from sdos import engine as sdos_engine
+
+from graph_helpers import GraphEngine
+
+# artists 1 and 10 + k are joined through every k in 2..5: four 2-hop routes per pair
+GRAPH = {1: [(k, f"1-{k}") for k in range(2, 6)]}
+for k in range(2, 6):
+    GRAPH[k] = [(1, f"1-{k}")] + [(10 + j, f"{k}-{10 + j}") for j in range(5)]
+for j in range(5):
+    GRAPH[10 + j] = [(k, f"{k}-{10 + j}") for k in range(2, 6)]
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with GraphEngine(GRAPH, disk_cache_mb=0, landmark_count=0) as engine:
+        engine.warm()
+        yield engine
+
+
+def test_all_routes(engine):
+    result = engine.path(1, 10, all_routes=True, route_limit=10)
+    assert result["found"] and result["degrees"] == 2 and result["route_count"] == 4
+    assert [[n for n, _ in route] for route in result["routes"]] == [[k, 10] for k in range(2, 6)]
+
+
+def test_dag_cache_is_bounded_by_visited_artists(engine, monkeypatch):
+    dag = engine.find_all_paths(1, 10)
+    monkeypatch.setattr(sdos_engine, "DAG_CACHE_VISITED", 2 * dag.visited)
+    engine._dags.clear()
+    engine._dags_visited = 0
+
+    for target in range(10, 15):
+        engine.find_all_paths(1, target)
+    assert len(engine._dags) == 2 and engine._dags_visited <= 2 * dag.visited
+    assert list(engine._dags) == [(1, t, frozenset()) for t in (13, 14)]
+    # a hit is served from the cache and becomes the most recent entry
+    assert engine.find_all_paths(1, 13) is engine._dags[(1, 13, frozenset())][1]
+    assert list(engine._dags)[-1] == (1, 13, frozenset())
+
+    # a DAG bigger than the whole bound is not cached at all
+    monkeypatch.setattr(sdos_engine, "DAG_CACHE_VISITED", 1)
+    assert engine.find_all_paths(2, 14).route_count == 1
+    assert (2, 14, frozenset()) not in engine._dags
+
+
+def test_cache_hit_reports_lookup_time(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with GraphEngine(GRAPH, disk_cache_file=str(tmp_path / "cache.sqlite"), landmark_count=0) as engine:
+        engine.warm()
+        first = engine.path(1, 10)
+        hit = engine.path(1, 10)
+    assert "cached" not in first and hit["cached"]
+    assert hit["search_seconds"] == first["seconds"]
+    assert hit["path"] == first["path"] and hit["seconds"] >= 0
+
+
+def test_pruning_is_switched_off_with_shared_files(tmp_path, capsys):
+    engine = GraphEngine(GRAPH, shared_dir=str(tmp_path / "shared"), prune_leaves=True, disk_cache_mb=0,
+                         landmark_count=0)
+    assert not engine.prune_leaves and "pruning" not in engine.loader.phases
+    assert "Leaf pruning is not available with shared graph files" in capsys.readouterr().out
+    engine.close()
+
+
+def test_search_strips_the_query_for_key_and_database(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    queries = []
+
+    def search_artists(conn, name, limit=10):
+        queries.append(name)
+        return [(1, "ABBA", None, 10)] if name.lower() == "abba" else []
+
+    monkeypatch.setattr(sdos_engine, "search_artists", search_artists)
+    with GraphEngine(GRAPH, disk_cache_file=str(tmp_path / "cache.sqlite"), landmark_count=0) as engine:
+        monkeypatch.setattr(engine, "connection", contextlib.nullcontext)
+        first = engine.search("  abba ")
+        assert engine.search("ABBA") == first and first[0]["name"] == "ABBA"
+    assert queries == ["abba"]
@@ -0,0 +1,45 @@
+# tests/test_graph_cache.py
+import os
+import pickle
+from array import array
+
+import pytest
+
+from sdos import graph as graph_cache
+
+GRAPH = {1: [(2, "a")], 2: [(1, "a")]}
+
+
+@pytest.fixture(autouse=True)
+def in_tmp(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def test_build_id_is_saved_with_the_graph():
+    build_id = graph_cache.save_graph_to_cache(GRAPH)
+    assert graph_cache.load_graph_and_build_id() == (GRAPH, build_id)
+    assert graph_cache.graph_cache_build_id() == build_id
+    # same artists and edge count, still a different build
+    assert graph_cache.save_graph_to_cache({1: [(3, "b")], 3: [(1, "b")]}) != build_id
+
+
+def test_graph_cache_without_build_id_still_loads():
+    os.makedirs('data/processed')
+    with open(graph_cache.GRAPH_CACHE_FILE, 'wb') as f:
+        pickle.dump(GRAPH, f)
+    graph, build_id = graph_cache.load_graph_and_build_id()
+    assert graph == GRAPH
+    assert build_id.startswith("legacy-") and graph_cache.graph_cache_build_id() == build_id
+
+
+def test_missing_graph_cache():
+    assert graph_cache.load_graph_and_build_id() == (None, None)
+    assert graph_cache.graph_cache_build_id() is None
+
+
+def test_edge_weights_are_dropped_for_another_build():
+    weights = {1: array('I', [3]), 2: array('I', [3])}
+    build_id = graph_cache.save_graph_to_cache(GRAPH)
+    graph_cache.save_edge_weights_to_cache(weights, build_id)
+    assert graph_cache.load_edge_weights(build_id) == weights
+    assert graph_cache.load_edge_weights(graph_cache.new_build_id()) is None
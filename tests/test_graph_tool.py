@@ -0,0 +1,35 @@
+# tests/test_graph_tool.py
+import os
+
+import pytest
+
+import graph_tool
+from sdos import graph as graph_cache
+from sdos.shared_graph import SHARED_GRAPH_FILE, SharedGraph
+
+GRAPH = {1: [(2, "a")], 2: [(1, "a"), (3, "b")], 3: [(2, "b")]}
+WEIGHTS = {1: [4], 2: [4, 1], 3: [1]}
+
+
+@pytest.fixture(autouse=True)
+def in_tmp(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SDOS_LANDMARKS", "0")
+
+
+def test_import_without_weights_drops_the_previous_weights():
+    graph_tool.write_runtime_caches(GRAPH, WEIGHTS, None)
+    build_id = graph_cache.graph_cache_build_id()
+    assert graph_cache.load_edge_weights(build_id) == WEIGHTS
+
+    graph_tool.write_runtime_caches({1: [(3, "c")], 3: [(1, "c")]}, None, None)
+    assert not os.path.exists(graph_cache.EDGE_WEIGHT_CACHE_FILE)
+    assert graph_cache.load_edge_weights(graph_cache.graph_cache_build_id()) is None
+
+
+def test_shared_files_carry_the_new_build_id(tmp_path):
+    shared_dir = str(tmp_path / "shared")
+    graph_tool.write_runtime_caches(GRAPH, WEIGHTS, None, shared_dir=shared_dir)
+    shared = SharedGraph(os.path.join(shared_dir, SHARED_GRAPH_FILE))
+    assert shared.build_id == graph_cache.graph_cache_build_id()
+    assert os.path.exists(os.path.join(shared_dir, ".lock"))
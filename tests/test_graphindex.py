@@ -0,0 +1,62 @@
+# tests/test_graphindex.py
+import pytest
+
+from sdos.graphindex import GraphIndex, neighbors_by_weight
+from sdos.prune import prune_leaves
+
+from graph_helpers import add_edge, brute_force_distance, random_graph
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_degrees_and_components_match_brute_force(seed):
+    graph = random_graph(150, 120, seed)  # sparse: several components
+    index = GraphIndex(graph)
+    components = []
+    for artist_id in sorted(graph):
+        if not any(brute_force_distance(graph, c[0], artist_id) is not None for c in components):
+            components.append([a for a in graph if brute_force_distance(graph, artist_id, a) is not None])
+    components.sort(key=len, reverse=True)
+    assert index.component_sizes == [len(c) for c in components]
+    for artist_id, row in graph.items():
+        assert artist_id in index and index.degree(artist_id) == len(row)
+        members = next(c for c in components if artist_id in c)
+        assert index.describe(artist_id)["component_size"] == len(members)
+        assert all(index.component(a) == index.component(artist_id) for a in members)
+    missing = max(graph) + 5
+    assert missing not in index and index.degree(missing) == 0 and index.component(missing) is None
+    assert index.describe(missing) == {"in_graph": False, "degree": 0, "component": None, "component_size": 0}
+
+
+# artist 1 collaborates with 2..5; 2 and 3 have the most collaborators of their own
+GRAPH = {}
+for a, b in [(1, 2), (1, 3), (1, 4), (1, 5), (2, 6), (2, 7), (3, 8), (3, 9), (4, 10)]:
+    add_edge(GRAPH, a, b, f"{a}-{b}")
+
+
+def test_weighted_rows_heaviest_first_ties_by_id():
+    weights = {a: [1] * len(row) for a, row in GRAPH.items()}
+    weights[1] = [2, 7, 2, 7]  # neighbors 2, 3, 4, 5
+    assert neighbors_by_weight(GRAPH, weights, 1) == [(3, "1-3", 7), (5, "1-5", 7), (2, "1-2", 2), (4, "1-4", 2)]
+
+
+def test_unweighted_rows_rank_by_neighbor_degree():
+    # degrees: 2 and 3 -> 3, 4 -> 2, 5 -> 1
+    assert neighbors_by_weight(GRAPH, None, 1) == [(2, "1-2", 3), (3, "1-3", 3), (4, "1-4", 2), (5, "1-5", 1)]
+    # a weight row that does not line up with the adjacency row is ignored
+    assert neighbors_by_weight(GRAPH, {1: [9]}, 1) == neighbors_by_weight(GRAPH, None, 1)
+
+
+def test_pruned_rows_list_the_stripped_collaborators_too():
+    graph = dict(GRAPH)
+    add_edge(graph, 2, 3, "2-3")  # a cycle 1 - 2 - 3 keeps a core
+    # symmetric, as build_edge_weights makes them
+    pair_weights = {frozenset((1, 2)): 5, frozenset((1, 4)): 3, frozenset((1, 5)): 3}
+    weights = {a: [pair_weights.get(frozenset((a, b)), 1) for b, _ in row] for a, row in graph.items()}
+    pruned = prune_leaves(graph, weights)
+    assert 4 not in pruned.core and 5 not in pruned.core
+    index = GraphIndex(graph)
+    assert neighbors_by_weight(pruned, pruned.weights, 1, degree=index.degree) == \
+        neighbors_by_weight(graph, weights, 1) == [(2, "1-2", 5), (4, "1-4", 3), (5, "1-5", 3), (3, "1-3", 1)]
+    # without weights, degrees of the full graph, not of the shorter core rows
+    assert neighbors_by_weight(prune_leaves(graph), None, 1, degree=index.degree) == \
+        neighbors_by_weight(graph, None, 1)
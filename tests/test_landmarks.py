@@ -0,0 +1,61 @@
+# tests/test_landmarks.py
+import os
+
+import pytest
+
+from sdos.graphindex import GraphIndex
+from sdos.landmarks import Landmarks, get_or_build_landmarks, load_landmarks, save_landmarks
+
+from graph_helpers import add_edge, brute_force_distance, random_graph
+
+
+@pytest.fixture
+def graph():
+    """A random component plus a separate chain, so some pairs are not connected."""
+    graph = random_graph(120, 150, 3)
+    add_edge(graph, 500, 501, "x")
+    add_edge(graph, 501, 502, "y")
+    return graph
+
+
+def test_estimate_bounds_the_true_distance(graph, tmp_path):
+    built = Landmarks.build(graph, count=4, index=GraphIndex(graph), version="b1")
+    save_landmarks(built, str(tmp_path / "landmarks.bin"))
+    mapped = load_landmarks("b1", str(tmp_path / "landmarks.bin"))
+    assert mapped.landmarks == built.landmarks and mapped.count == 4
+    nodes = sorted(graph)
+    for source in nodes[::7] + [500]:
+        for target in nodes[::5] + [502]:
+            expected = built.estimate(source, target)
+            assert mapped.estimate(source, target) == expected
+            distance = brute_force_distance(graph, source, target)
+            lower, upper = expected
+            if lower is None:
+                assert distance is None
+            elif distance is not None:
+                assert lower <= distance and (upper is None or distance <= upper)
+
+
+def test_file_of_another_build_is_rebuilt(graph, tmp_path, monkeypatch):
+    path = str(tmp_path / "landmarks.bin")
+    first = get_or_build_landmarks(graph, count=2, version="b1", path=path)
+    assert load_landmarks("b1", path) is not None and load_landmarks("b2", path) is None
+
+    builds = []
+    build = Landmarks.build.__func__
+    monkeypatch.setattr(Landmarks, "build", classmethod(lambda cls, *a, **kw: builds.append(1) or build(cls, *a, **kw)))
+    assert get_or_build_landmarks(graph, count=2, version="b1", path=path).landmarks == first.landmarks
+    assert not builds
+    assert get_or_build_landmarks(graph, count=2, version="b2", path=path).version == "b2"
+    assert get_or_build_landmarks(graph, count=3, version="b2", path=path).count == 3
+    assert len(builds) == 2
+    assert os.path.exists(os.path.join(str(tmp_path), ".lock"))
+
+
+def test_missing_or_foreign_file_is_a_miss(tmp_path):
+    path = tmp_path / "landmarks.bin"
+    assert load_landmarks(None, str(path)) is None
+    path.write_bytes(b"")
+    assert load_landmarks(None, str(path)) is None
+    path.write_bytes(b"not a landmarks file" * 10)
+    assert load_landmarks(None, str(path)) is None
@@ -0,0 +1,96 @@
+# tests/test_loader.py
+import threading
+import time
+
+import pytest
+
+from sdos.loader import FAILED, IDLE, READY, Loader
+
+
+class FakeLoad:
+    """load_fn that walks through the phases, blocking in the last one until released; can be told to fail."""
+
+    def __init__(self, phases):
+        self.phases = phases
+        self.calls = 0
+        self.fail = False
+        self.release = threading.Event()
+        self.in_last_phase = threading.Event()
+
+    def __call__(self, loader):
+        self.calls += 1
+        for phase in self.phases:
+            loader.set_phase(phase)
+        self.in_last_phase.set()
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("database is down")
+
+
+@pytest.fixture
+def timings(tmp_path):
+    return str(tmp_path / "timings.json")
+
+
+def test_concurrent_starts_run_one_load(timings):
+    load = FakeLoad(["a", "b"])
+    loader = Loader(load, ["a", "b"], timings_file=timings)
+    assert loader.phase == IDLE and not loader.ready
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(loader.start())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results.count(True) == 1
+    waiters = [threading.Thread(target=loader.wait) for _ in range(4)]
+    for t in waiters:
+        t.start()
+    assert load.in_last_phase.wait(5) and loader.phase == "b" and loader.loading
+    load.release.set()
+    for t in waiters:
+        t.join(5)
+    assert loader.wait(timeout=5) and loader.ready and load.calls == 1
+    assert not loader.start() and load.calls == 1
+
+
+def test_phase_durations_give_the_next_eta(timings):
+    load = FakeLoad(["a", "b"])
+    load.release.set()
+    first = Loader(load, ["a", "b"], timings_file=timings)
+    assert first.eta_seconds() is None
+    assert first.wait(timeout=5)
+    status = first.status()
+    assert status["phase"] == READY and status["eta_seconds"] == 0.0 and set(status["phase_seconds"]) == {"a", "b"}
+
+    # a new process reads the saved durations: the whole load is estimated at about their sum
+    load = FakeLoad(["a", "b"])
+    second = Loader(load, ["a", "b"], timings_file=timings)
+    second.start()
+    assert load.in_last_phase.wait(5)
+    assert second.status()["phase"] == "b" and second.eta_seconds() is not None
+    load.release.set()
+    assert second.wait(timeout=5)
+
+
+def test_failed_load_backs_off_before_retrying(timings):
+    load = FakeLoad(["a"])
+    load.fail = True
+    load.release.set()
+    loader = Loader(load, ["a"], timings_file=timings, retry_seconds=0.2, max_retry_seconds=0.3)
+    assert not loader.wait(timeout=5)
+    status = loader.status()
+    assert status["phase"] == FAILED and status["error"] == "database is down"
+    assert 0 < status["retry_in_seconds"] <= 0.2
+
+    # requests during the back-off do not start another load
+    assert not loader.start() and not loader.wait(timeout=1) and load.calls == 1
+    time.sleep(0.25)
+    assert not loader.wait(timeout=5) and load.calls == 2 and loader.failures == 2
+    # the delay doubles, up to max_retry_seconds
+    assert loader.retry_at - loader.finished_at == pytest.approx(0.3)
+
+    time.sleep(0.35)
+    load.fail = False
+    assert loader.wait(timeout=5) and load.calls == 3
+    assert loader.failures == 0 and loader.status()["retry_in_seconds"] is None
@@ -0,0 +1,113 @@
+# tests/test_mbdump.py
+import bz2
+import gzip
+import os
+
+import pytest
+
+from sdos.mbdump import (
+    _unescape,
+    build_artist_name_cache_from_dump,
+    build_graph_from_dump,
+    read_table,
+)
+
+GID = "8e66ea2b-b57b-47d9-8df0-df4630aeb8e5"
+
+# rows in the full column layout of the MusicBrainz schema (COPY text format)
+TABLES = {
+    'artist': [
+        [1, GID, "Ann", "Ann", r"\N", r"\N", r"\N", r"\N", r"\N", r"\N", r"\N", r"\N", 1, r"\N", "", 0,
+         "2020-01-01", "f", 0],
+        [2, r"\N", r"B\\side", "B", r"\N"],
+        [3, r"\N", "Cee", "Cee", r"\N"],
+        [4, r"\N", "Dee", "Dee", r"\N"],
+        [5, r"\N", "Various Artists", "Various Artists", r"\N"],
+    ],
+    'artist_credit_name': [
+        [10, 0, 1, "Ann", " feat. "], [10, 1, 2, "B", ""],
+        [11, 0, 3, "Cee", " vs. "], [11, 1, 4, "Dee", ""],
+        [12, 0, 5, " Various Artists ", ""],
+        [13, 0, 1, "Ann", ""],
+        [14, 0, 2, "B", " & "], [14, 1, 3, "Cee", ""],
+    ],
+    # id, gid, name, artist_credit, length, comment, edits_pending, last_updated, video
+    'recording': [
+        [100, "g", r"Song\tOne", 10, 180000, "", 0, r"\N", "f"],
+        [101, "g", "Versus", 11, r"\N", "", 0, r"\N", "f"],
+        [102, "g", "Live One", 14, r"\N", "", 0, r"\N", "f"],
+        [103, "g", "Other", 14, r"\N", "", 0, r"\N", "f"],
+        [104, "g", "Unlabelled", 14, r"\N", "", 0, r"\N", "f"],
+        [105, "g", "On a compilation", 10, r"\N", "", 0, r"\N", "f"],
+    ],
+    # id, gid, recording, medium, position, number, name, artist_credit, ...
+    'track': [
+        [1, "g", 100, 1, 1, "1", "Song", 10, r"\N", 0, r"\N", "f"],
+        [2, "g", 101, 1, 2, "2", "Versus", 11, r"\N", 0, r"\N", "f"],
+        [3, "g", 102, 2, 1, "1", "Live One", 14, r"\N", 0, r"\N", "f"],
+        [4, "g", 103, 1, 3, "3", "Other", 14, r"\N", 0, r"\N", "f"],
+        [5, "g", 104, 3, 1, "1", "Unlabelled", 14, r"\N", 0, r"\N", "f"],
+        [6, "g", 105, 4, 1, "1", "On a compilation", 10, r"\N", 0, r"\N", "f"],
+    ],
+    'medium': [[1, 1000, 1, 1, ""], [2, 1001, 1, 1, ""], [3, 1002, 1, 1, ""], [4, 1003, 1, 1, ""]],
+    # id, gid, name, artist_credit, release_group, status, packaging, ...
+    'release': [
+        [1000, "g", "Album", 13, 500, 1, r"\N", r"\N", r"\N", r"\N", "", 0, -1, r"\N"],
+        [1001, "g", "Live", 13, 501, 1, r"\N", r"\N", r"\N", r"\N", "", 0, -1, r"\N"],
+        [1002, "g", "No label", 13, 500, r"\N", r"\N", r"\N", r"\N", r"\N", "", 0, -1, r"\N"],
+        [1003, "g", "Compilation", 12, 500, 1, r"\N", r"\N", r"\N", r"\N", "", 0, -1, r"\N"],
+    ],
+    'release_status': [[1, "Official", r"\N", 0, r"\N", "g"], [3, "Bootleg", r"\N", 2, r"\N", "g"]],
+    'release_label': [[1, 1000, 7, "CAT1", r"\N"], [2, 1001, 7, r"\N", r"\N"], [3, 1002, 8, r"\N", r"\N"],
+                      [4, 1003, 7, r"\N", r"\N"]],
+    'label': [[7, "g", "Label", r"\N"], [8, "g", " [No Label] ", r"\N"]],
+    'release_group': [[500, "g", "Album", 13, 1, "", 0, r"\N"], [501, "g", "Live", 13, 1, "", 0, r"\N"]],
+    'release_group_primary_type': [[1, "Album", r"\N", 1, r"\N", "g"], [2, "Single", r"\N", 2, r"\N", "g"]],
+    'release_group_secondary_type': [[6, "Live", r"\N", 0, r"\N", "g"]],
+    'release_group_secondary_type_join': [[501, 6, "2020-01-01"]],
+}
+
+
+def write_dump(directory):
+    for table, rows in TABLES.items():
+        text = "".join("\t".join(str(v) for v in row) + "\n" for row in rows)
+        path = os.path.join(directory, table)
+        # compressed copies are read the same way
+        if table == 'track':
+            with gzip.open(path + '.gz', 'wt', encoding='utf-8') as f:
+                f.write(text)
+        elif table == 'recording':
+            with bz2.open(path + '.bz2', 'wt', encoding='utf-8') as f:
+                f.write(text)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+    return directory
+
+
+@pytest.mark.parametrize("field, value", [
+    (r"\N", None), ("plain", "plain"), (r"a\tb", "a\tb"), (r"a\\b", "a\\b"), (r"line\nbreak", "line\nbreak"),
+    (r"\\N", "\\N"), ("", ""),
+])
+def test_unescape(field, value):
+    assert _unescape(field) == value
+
+
+def test_read_table_picks_schema_columns(tmp_path):
+    dump_dir = write_dump(str(tmp_path))
+    assert list(read_table(dump_dir, 'artist', 'id', 'gid', 'name'))[:2] == [("1", GID, "Ann"), ("2", None, "B\\side")]
+    assert list(read_table(dump_dir, 'recording', 'name', 'id'))[0] == ("Song\tOne", "100")
+    assert list(read_table(dump_dir, 'track', 'medium', 'recording'))[-1] == ("4", "105")
+    assert list(read_table(dump_dir, 'release', 'status'))[2] == (None,)
+    with pytest.raises(FileNotFoundError):
+        list(read_table(str(tmp_path / "missing"), 'artist', 'id'))
+
+
+def test_graph_from_dump_applies_the_build_filters(tmp_path):
+    dump_dir = write_dump(str(tmp_path))
+    edge_counts = {}
+    graph = build_graph_from_dump(dump_dir, edge_counts=edge_counts)
+    # vs credits, live release groups, unlabelled releases and various-artists releases add nothing
+    assert dict(graph) == {1: [(2, "Song\tOne")], 2: [(1, "Song\tOne"), (3, "Other")], 3: [(2, "Other")]}
+    assert edge_counts == {(1, 2): 1, (2, 3): 1}
+    assert build_artist_name_cache_from_dump(dump_dir)[1] == ("Ann", GID)
@@ -0,0 +1,85 @@
+# tests/test_metrics.py
+import re
+
+from sdos import metrics
+
+SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})? (\S+)$')
+
+
+def parse(text):
+    """{family: {"help", "type", "samples": [(name, labels, value)]}} from the exposition text, checking every line."""
+    assert text.endswith('\n')
+    families = {}
+    current = None
+    for line in text.splitlines():
+        if line.startswith('# HELP '):
+            current = line.split(' ', 3)[2]
+            assert current not in families, f"family {current} listed twice"
+            families[current] = {"help": line.split(' ', 3)[3], "samples": []}
+        elif line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            assert name == current and kind in ('counter', 'histogram')
+            families[name]["type"] = kind
+        else:
+            match = SAMPLE_RE.match(line)
+            assert match, line
+            name, labels, value = match.groups()
+            assert name.startswith(current)
+            labels = dict(re.findall(r'(\w+)="([^"]*)"', labels or ''))
+            families[current]["samples"].append((name, labels, float(value)))
+    return families
+
+
+def test_labelled_counters_share_one_family():
+    hits = metrics.Counter("test_lookups_total", "Lookups by result", labels={"result": "hit"})
+    misses = metrics.Counter("test_lookups_total", "Lookups by result", labels={"result": "miss"})
+    hits.inc()
+    hits.inc(2)
+    misses.inc()
+    family = parse(metrics.render())["test_lookups_total"]
+    assert family["type"] == "counter" and family["help"] == "Lookups by result"
+    assert family["samples"] == [("test_lookups_total", {"result": "hit"}, 3.0),
+                                 ("test_lookups_total", {"result": "miss"}, 1.0)]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_search_seconds", "Search time", buckets=(0.1, 1.0, 10.0),
+                                  labels={"kind": "bfs"})
+    for value in (0.05, 0.1, 0.5, 5.0, 50.0):
+        histogram.observe(value)
+    samples = parse(metrics.render())["test_search_seconds"]["samples"]
+    assert samples == [
+        ("test_search_seconds_bucket", {"kind": "bfs", "le": "0.1"}, 2.0),
+        ("test_search_seconds_bucket", {"kind": "bfs", "le": "1"}, 3.0),
+        ("test_search_seconds_bucket", {"kind": "bfs", "le": "10"}, 4.0),
+        ("test_search_seconds_bucket", {"kind": "bfs", "le": "+Inf"}, 5.0),
+        ("test_search_seconds_sum", {"kind": "bfs"}, 55.65),
+        ("test_search_seconds_count", {"kind": "bfs"}, 5.0),
+    ]
+
+
+def test_render_reads_all_values_under_the_lock():
+    # an observe() between reading the buckets and _count would make them disagree
+    histogram = metrics.Histogram("test_busy_seconds", "Read while rendering", buckets=(0.5,))
+    histogram.observe(0.1)
+    read_locked = []
+    samples = histogram.samples
+
+    def checked_samples():
+        for sample in samples():
+            read_locked.append(metrics._LOCK.locked())
+            yield sample
+
+    histogram.samples = checked_samples
+    values = {(name, labels.get("le")): value
+              for name, labels, value in parse(metrics.render())["test_busy_seconds"]["samples"]}
+    assert read_locked == [True] * 4
+    assert values[("test_busy_seconds_bucket", "+Inf")] == values[("test_busy_seconds_count", None)] == 1
+
+
+def test_metrics_endpoint_serves_the_exposition_format(sdos_app):
+    from fastapi.testclient import TestClient
+    response = TestClient(sdos_app.app).get("/metrics")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    families = parse(response.text)
+    assert families["sdos_stage_seconds"]["type"] == "histogram"
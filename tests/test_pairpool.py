@@ -0,0 +1,60 @@
+# tests/test_pairpool.py
+import time
+
+from sdos.pairpool import PairPool, PairSampler, largest_component
+
+
+def _chain(n):
+    """Artists 0 - 1 - ... - n-1 in a line."""
+    graph = {i: [] for i in range(n)}
+    for i in range(n - 1):
+        graph[i].append((i + 1, f"t{i}"))
+        graph[i + 1].append((i, f"t{i}"))
+    return graph
+
+
+def test_sampler_idles_while_graph_is_not_loaded():
+    calls = []
+
+    def get_graph():
+        calls.append(time.monotonic())
+        return None
+
+    sampler = PairSampler(PairPool(10), get_graph, lambda s, t, p: (s, t), refresh_seconds=1.0,
+                          idle_seconds=0.05)
+    sampler.start()
+    time.sleep(0.5)
+    sampler.stop()
+    # 0.05 + 0.1 + 0.2 + 0.4 backoff: a handful of attempts, not a spinning loop
+    assert 1 <= len(calls) <= 6
+
+
+def test_sampler_idles_when_no_pair_is_describable():
+    graph = _chain(10)
+    described = []
+
+    def describe(source, target, path):
+        described.append((source, target))
+        return None
+
+    sampler = PairSampler(PairPool(10), lambda: graph, describe, min_degrees=1, refresh_seconds=1.0,
+                          idle_seconds=0.05, seed=1)
+    sampler.start()
+    time.sleep(0.5)
+    sampler.stop()
+    assert 1 <= len(described) <= 6
+
+
+def test_sampler_fills_pool_with_far_pairs():
+    graph = _chain(30)
+    pool = PairPool(5)
+    sampler = PairSampler(pool, lambda: graph, lambda s, t, p: (s, t, len(p)), min_degrees=3, seed=7)
+    while not pool.full:
+        sampler.sample_one()
+    assert all(degrees >= 3 and abs(s - t) == degrees for s, t, degrees in pool.entries())
+
+
+def test_largest_component():
+    graph = _chain(4)
+    graph.update({10: [(11, "x")], 11: [(10, "x")]})
+    assert sorted(largest_component(graph)) == [0, 1, 2, 3]
@@ -0,0 +1,34 @@
+# tests/test_pathfinder.py
+import os
+import sys
+import subprocess
+from collections import deque
+
+import pathfinder
+
+GRAPH = {1: [(2, "a")], 2: [(1, "a"), (3, "b")], 3: [(2, "b")]}
+
+
+def test_import_does_not_load_the_command_line():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.check_output([sys.executable, "-c", "import sys, pathfinder; print('terminal_sdos' in sys.modules)"],
+                                  cwd=root)
+    assert out.strip() == b"False"
+
+
+def test_legacy_bfs_helpers():
+    visited_start = {1: (None, None)}
+    visited_end = {3: (None, None)}
+    queue_start, queue_end = deque([1]), deque([3])
+    assert pathfinder.expand_frontier(GRAPH, queue_start, visited_start, visited_end) is None
+    meet = pathfinder.expand_frontier(GRAPH, queue_end, visited_end, visited_start)
+    assert meet == 2
+    path = pathfinder.reconstruct_path(meet, visited_start, visited_end)
+    assert path == pathfinder.bidirectional_bfs_with_tracks(GRAPH, 1, 3, {}) == [(2, "a"), (3, "b")]
+
+
+def test_old_names_are_still_exported():
+    namespace = {}
+    exec("from pathfinder import *", namespace)
+    assert {"DB_CONFIG", "get_or_build_graph", "search_artists", "bidirectional_bfs_with_tracks",
+            "expand_frontier", "reconstruct_path", "main"} <= set(namespace)
@@ -0,0 +1,202 @@
+# tests/test_pathfinding.py
+import random
+import threading
+
+import pytest
+
+from sdos.pathfinding import (
+    SearchLimits,
+    all_shortest_paths_bfs,
+    bidirectional_bfs_with_tracks,
+    direction_optimizing_bfs_with_tracks,
+    ranked_bfs_with_tracks,
+)
+
+from graph_helpers import (
+    add_edge,
+    assert_valid_path,
+    brute_force_distance,
+    brute_force_shortest_paths,
+    grid_graph,
+    random_graph,
+)
+
+
+# huge alpha / beta make every step after the first bottom-up
+@pytest.mark.parametrize("alpha, beta", [(14.0, 24.0), (1e9, 1e9)])
+@pytest.mark.parametrize("seed", range(5))
+def test_direction_optimizing_matches_brute_force(seed, alpha, beta):
+    graph = random_graph(200, 260, seed)
+    rng = random.Random(seed)
+    nodes = sorted(graph)
+    bottom_up_steps = 0
+    for _ in range(100):
+        start, end = rng.choice(nodes), rng.choice(nodes)
+        excluded = [(start, n) for n, _ in graph[start][:1]]
+        stats = {}
+        path = direction_optimizing_bfs_with_tracks(graph, start, end, excluded_edges=excluded, stats=stats,
+                                                    alpha=alpha, beta=beta)
+        distance = brute_force_distance(graph, start, end, excluded)
+        if distance is None:
+            assert path is None
+            continue
+        if start == end:
+            assert path == [(end, None)]
+            continue
+        assert len(path) == distance and path[-1][0] == end
+        assert_valid_path(graph, start, path, excluded)
+        bottom_up_steps += stats["bottom_up_steps"]
+    assert bottom_up_steps > 0 or alpha < 1e9
+
+
+def test_bottom_up_expanded_counts_scanned_artists():
+    # a chain: every bottom-up step scans the artists still unvisited on that side
+    graph = {i: [] for i in range(10)}
+    for i in range(9):
+        graph[i].append((i + 1, f"t{i}"))
+        graph[i + 1].append((i, f"t{i}"))
+    stats = {}
+    path = direction_optimizing_bfs_with_tracks(graph, 0, 9, stats=stats, alpha=1e9, beta=1e9)
+    assert [n for n, _ in path] == list(range(1, 10))
+    assert stats["bottom_up_steps"] == 9
+    # the end side steps once (9 unvisited, reaches 8), then the start side (ties go to it)
+    # scans 9, 8, ..., 2 unvisited artists until it reaches 8
+    assert stats["expanded"] == 9 + 9 + 8 + 7 + 6 + 5 + 4 + 3 + 2
+
+
+def test_plain_bfs_matches_brute_force():
+    graph = random_graph(150, 200, 11)
+    for start in list(graph)[:20]:
+        for end in list(graph)[-20:]:
+            path = bidirectional_bfs_with_tracks(graph, start, end)
+            distance = brute_force_distance(graph, start, end)
+            if start == end:
+                continue
+            assert (path is None) == (distance is None)
+            if path:
+                assert len(path) == distance
+                assert_valid_path(graph, start, path)
+
+
+def test_budget_is_charged_per_expanded_artist():
+    # 0 fans out to 1..20, 200 to 300..330; only 1 - 300 links the two sides
+    graph = {0: [(i, f"a{i}") for i in range(1, 21)], 200: [(i, f"b{i}") for i in range(300, 331)]}
+    for i in range(1, 21):
+        graph[i] = [(0, f"a{i}")]
+    for i in range(300, 331):
+        graph[i] = [(200, f"b{i}")]
+    graph[1].append((300, "link"))
+    graph[300].append((1, "link"))
+
+    # 0, then 200, then the first artist of the 20-artist layer meets the other side
+    path = bidirectional_bfs_with_tracks(graph, 0, 200, limits=SearchLimits(max_expanded=3))
+    assert [n for n, _ in path] == [1, 300, 200]
+
+    stats = {}
+    assert bidirectional_bfs_with_tracks(graph, 0, 200, stats=stats, limits=SearchLimits(max_expanded=2)) is None
+    assert stats["gave_up"] == "budget" and stats["min_degrees"] == 3
+
+
+def test_cancelled_search_gives_up():
+    graph = random_graph(100, 150, 3)
+    cancel = threading.Event()
+    cancel.set()
+    stats = {}
+    start, end = sorted(graph)[0], sorted(graph)[-1]
+    assert direction_optimizing_bfs_with_tracks(graph, start, end, stats=stats,
+                                                limits=SearchLimits(cancel=cancel)) is None
+    assert stats["gave_up"] == "cancelled"
+
+
+def _weight_of(graph, weights, a, b, track):
+    return weights[a][graph[a].index((b, track))]
+
+
+def _path_cost(graph, weights, start, path):
+    cost, node = 0.0, start
+    for artist_id, track in path:
+        cost += 1.0 / _weight_of(graph, weights, node, artist_id, track)
+        node = artist_id
+    return cost
+
+
+def test_ranked_bfs_breaks_ties_by_id_then_prefers_heavy_collaborations():
+    # two equally short routes 1 - 2 - 4 and 1 - 3 - 4
+    graph = {1: [(2, "a"), (3, "b")], 2: [(1, "a"), (4, "c")], 3: [(1, "b"), (4, "d")], 4: [(2, "c"), (3, "d")]}
+    equal = {a: [1] * len(row) for a, row in graph.items()}
+    assert ranked_bfs_with_tracks(graph, 1, 4, equal) == [(2, "a"), (4, "c")]
+    heavy_via_3 = {1: [1, 5], 2: [1, 1], 3: [5, 5], 4: [1, 5]}
+    assert ranked_bfs_with_tracks(graph, 1, 4, heavy_via_3) == [(3, "b"), (4, "d")]
+    # a weight row that does not line up with its adjacency row falls back to degrees (2 and 3 tie there)
+    assert ranked_bfs_with_tracks(graph, 1, 4, {**heavy_via_3, 1: [1]}) == [(3, "b"), (4, "d")]
+
+
+def test_ranked_bfs_rescores_meeting_nodes_after_the_first_meet():
+    # the start side meets 5 through 2 first; 3, later in the same layer, is a cheaper parent of 5
+    graph = {}
+    for a, b in [(1, 2), (1, 3), (2, 5), (3, 5), (3, 6), (9, 5), (9, 6)]:
+        add_edge(graph, a, b, f"{a}-{b}")
+    weight = {frozenset((3, 5)): 10}
+    weights = {a: [weight.get(frozenset((a, b)), 1) for b, _ in row] for a, row in graph.items()}
+    stats = {}
+    assert ranked_bfs_with_tracks(graph, 1, 9, weights, stats=stats) == [(3, "1-3"), (5, "3-5"), (9, "9-5")]
+    assert stats["expanded"] == 4
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_ranked_bfs_finds_the_cheapest_shortest_path(seed):
+    graph = random_graph(60, 110, seed)
+    rng = random.Random(seed)
+    # symmetric small integer weights, so many shortest paths tie on cost
+    pair_weight = {}
+    weights = {a: [pair_weight.setdefault(frozenset((a, b)), rng.randint(1, 3)) for b, _ in row]
+               for a, row in graph.items()}
+    nodes = sorted(graph)
+    for _ in range(40):
+        start, end = rng.choice(nodes), rng.choice(nodes)
+        if start == end:
+            continue
+        path = ranked_bfs_with_tracks(graph, start, end, weights)
+        candidates = brute_force_shortest_paths(graph, start, end)
+        if not candidates:
+            assert path is None
+            continue
+        assert path in candidates
+        best = min(_path_cost(graph, weights, start, p) for p in candidates)
+        assert _path_cost(graph, weights, start, path) == pytest.approx(best)
+
+
+def test_path_dag_counts_and_unranks_every_grid_route():
+    graph = grid_graph(5, 6)
+    dag = all_shortest_paths_bfs(graph, 0, 29)
+    routes = list(dag.routes())
+    assert dag.route_count == len(dag) == 126
+    assert len({tuple(r) for r in routes}) == 126
+    assert sorted(routes) == sorted(brute_force_shortest_paths(graph, 0, 29))
+    assert dag.degrees == 9
+    # pages line up with single routes, and the order does not change between searches
+    assert list(dag.routes(120, 10)) == routes[120:]
+    assert [all_shortest_paths_bfs(graph, 0, 29).route(i) for i in (0, 63, 125)] == \
+        [routes[0], routes[63], routes[125]]
+    with pytest.raises(IndexError):
+        dag.route(126)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_path_dag_matches_brute_force_enumeration(seed):
+    graph = random_graph(80, 160, seed)
+    rng = random.Random(seed)
+    nodes = sorted(graph)
+    for _ in range(60):
+        start, end = rng.choice(nodes), rng.choice(nodes)
+        excluded = [(start, n) for n, _ in graph[start][:1]] if rng.random() < 0.3 else []
+        dag = all_shortest_paths_bfs(graph, start, end, excluded_edges=excluded)
+        if start == end:
+            assert dag.route_count == 1 and dag.route(0) == [(end, None)]
+            continue
+        expected = brute_force_shortest_paths(graph, start, end, excluded)
+        if not expected:
+            assert dag is None
+            continue
+        assert dag.route_count == len(expected)
+        assert sorted(dag.routes()) == sorted(expected)
@@ -0,0 +1,92 @@
+# tests/test_pathjson.py
+import json
+
+import pytest
+
+from sdos.pathjson import ArtistFragments, encode_compact, encode_hops, encode_object
+
+from graph_helpers import GraphEngine
+
+NAMES = {
+    1: ('Say "Hi"', "8e66ea2b-b57b-47d9-8df0-df4630aeb8e5"),
+    2: ("Björk \\ Sigur Rós", None),
+    3: ("東京事変", "0383dadf-2a4e-4d10-a46a-e9e041da8eb3"),
+    4: ("Tab\there", None),
+}
+GRAPH = {1: [(2, 'Track "One"')], 2: [(1, 'Track "One"'), (3, None)], 3: [(2, None), (4, "Ünïcode ♫")],
+         4: [(3, "Ünïcode ♫")]}
+
+
+def old_response(source_id, result):
+    """The body as the app built it before pathjson: hop dicts through JSONResponse."""
+    def hops(path):
+        full_path, prev_id = [], source_id
+        for node_id, track in path:
+            full_path.append({"from_id": prev_id, "from_name": NAMES[prev_id][0], "to_id": node_id,
+                              "to_name": NAMES[node_id][0], "to_mbid": NAMES[node_id][1], "track": track})
+            prev_id = node_id
+        return full_path
+
+    body = dict(result, path=hops(result["path"]) if result["found"] else [])
+    if "routes" in body:
+        body["routes"] = [hops(route) for route in body["routes"]]
+    # starlette's JSONResponse.render
+    return json.dumps(body, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+@pytest.fixture
+def app(sdos_app, monkeypatch):
+    monkeypatch.setattr(sdos_app, "ENGINE", GraphEngine(GRAPH, NAMES, disk_cache_mb=0, landmark_count=0))
+    return sdos_app
+
+
+def render(app, result, **fields):
+    return app._render_path(app.PathRequest(source_id=1, target_id=4, **fields), result).body
+
+
+PATH = [(2, 'Track "One"'), (3, None), (4, "Ünïcode ♫")]
+
+
+@pytest.mark.parametrize("result", [
+    {"found": True, "seconds": 0.25, "degrees": 3, "path": PATH},
+    {"found": True, "seconds": 1e-05, "degrees": 3, "path": PATH, "search_seconds": 0.5, "cached": True},
+    {"found": True, "seconds": 0.5, "degrees": 3, "path": PATH, "route_count": 2, "route_offset": 0,
+     "routes": [PATH, PATH[:1]]},
+    {"found": False, "seconds": 0.125},
+    {"found": False, "seconds": 3.0, "gave_up": "budget", "stats": {"expanded": 7, "visited": 9}},
+])
+def test_full_format_matches_json_dumps_byte_for_byte(app, result):
+    assert render(app, result) == old_response(1, result)
+
+
+def test_compact_format_decodes_back_to_the_path(app):
+    routes = [PATH, [(2, 'Track "One"')]]
+    result = {"found": True, "seconds": 0.5, "degrees": 3, "path": PATH, "route_count": 2, "route_offset": 0,
+              "routes": routes[1:]}
+    body = json.loads(render(app, result, format="compact"))
+    assert body["format"] == "compact" and body["route_count"] == 2
+    artists = body["artists"]
+    # every artist listed once, in first-use order
+    assert [a["id"] for a in artists] == [1, 2, 3, 4]
+    assert [(a["name"], a["mbid"]) for a in artists] == [NAMES[i] for i in (1, 2, 3, 4)]
+    for encoded, route in zip([body["path"]] + body["routes"], routes):
+        assert encoded[0] == [0, None]
+        assert [(artists[i]["id"], track) for i, track in encoded[1:]] == route
+
+
+def test_fragments_are_encoded_once():
+    calls = []
+    fragments = ArtistFragments(lambda a: calls.append(a) or NAMES[a], max_entries=3)
+    encode_hops(fragments, 1, PATH)
+    encode_hops(fragments, 1, PATH[:1])
+    # the table holds at most 3 artists: 4 starts it over, so 1 and 2 are encoded again
+    assert calls == [1, 2, 3, 4, 1, 2]
+    artists, encoded = encode_compact(fragments, 1, [PATH[:1]])
+    assert json.loads(artists) == [{"id": 1, "name": 'Say "Hi"', "mbid": NAMES[1][1]},
+                                   {"id": 2, "name": NAMES[2][0], "mbid": None}]
+    assert json.loads(encoded[0]) == [[0, None], [1, 'Track "One"']]
+
+
+def test_encode_object_keeps_field_order():
+    assert encode_object({"a": 1, "path": None, "b": "x"}, {"path": b"[]", "extra": b"{}"}) == \
+        b'{"a":1,"path":[],"b":"x","extra":{}}'
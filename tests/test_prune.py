@@ -0,0 +1,95 @@
+# tests/test_prune.py
+import random
+
+import pytest
+
+from sdos.pathfinding import ranked_bfs_with_tracks
+from sdos.prune import prune_leaves
+from graph_helpers import (
+    add_edge,
+    assert_valid_path,
+    brute_force_distance,
+    brute_force_shortest_paths,
+    random_graph,
+)
+
+
+def graph_with_trees(seed):
+    """A random core with pendant chains and trees hanging off it, plus a tree component of its own."""
+    rng = random.Random(seed)
+    graph = random_graph(40, 70, seed)
+    core = sorted(graph)
+    for node in range(100, 160):
+        parent = rng.choice(core) if node < 110 or rng.random() < 0.2 else rng.randrange(100, node)
+        add_edge(graph, parent, node, f"{parent}-{node}")
+    for node in range(201, 208):
+        parent = rng.randrange(200, node)
+        add_edge(graph, parent, node, f"{parent}-{node}")
+    return graph
+
+
+def pendant_bridges(pruned, rng, n):
+    return rng.sample(sorted((a, parent) for a, (parent, _) in pruned.hanging.items() if parent is not None), n)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_pruned_paths_match_brute_force(seed):
+    graph = graph_with_trees(seed)
+    pruned = prune_leaves(graph)
+    assert len(pruned) == len(graph) and all(a in pruned for a in graph)
+    # the core is the 2-core: no artist in it has fewer than two core collaborators
+    assert all(len(row) >= 2 for row in pruned.core.values())
+    assert not any(a in pruned.core for a in range(200, 208))
+
+    rng = random.Random(seed)
+    nodes = sorted(graph)
+    for _ in range(150):
+        start, end = rng.choice(nodes), rng.choice(nodes)
+        excluded = pendant_bridges(pruned, rng, 2) if rng.random() < 0.5 else []
+        if rng.random() < 0.3:
+            excluded.append(rng.choice(sorted((a, b) for a, row in pruned.core.items() for b, _ in row)))
+        distance = brute_force_distance(graph, start, end, excluded)
+        path = pruned.find_path(start, end, excluded_edges=excluded)
+        if start == end:
+            assert path == [(end, None)]
+            continue
+        if distance is None:
+            assert path is None
+            assert pruned.find_all_paths(start, end, excluded_edges=excluded) is None
+            continue
+        assert len(path) == distance and path[-1][0] == end
+        assert_valid_path(graph, start, path, excluded)
+
+        dag = pruned.find_all_paths(start, end, excluded_edges=excluded)
+        expected = brute_force_shortest_paths(graph, start, end, excluded)
+        routes = list(dag.routes())
+        assert dag.route_count == len(expected)
+        assert sorted(routes) == sorted(expected)
+
+
+def test_pruned_ranked_search_uses_core_weights():
+    graph = graph_with_trees(7)
+    weights = {a: [1] * len(row) for a, row in graph.items()}
+    pruned = prune_leaves(graph, weights)
+    assert set(pruned.weights) == set(pruned.core)
+    assert all(len(pruned.weights[a]) == len(row) for a, row in pruned.core.items())
+    rng = random.Random(7)
+    nodes = sorted(graph)
+    for _ in range(50):
+        start, end = rng.choice(nodes), rng.choice(nodes)
+        path = pruned.find_path(start, end, search=ranked_bfs_with_tracks, weights=pruned.weights)
+        distance = brute_force_distance(graph, start, end)
+        if start == end:
+            continue
+        assert (path is None) == (distance is None)
+        if path is None:
+            continue
+        assert len(path) == distance
+        assert_valid_path(graph, start, path)
+
+
+def test_neighbors_recover_the_full_adjacency():
+    graph = graph_with_trees(1)
+    pruned = prune_leaves(graph)
+    for artist_id, row in graph.items():
+        assert sorted((n, t) for n, t, _ in pruned.neighbors(artist_id)) == sorted(row)
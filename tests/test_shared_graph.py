@@ -0,0 +1,92 @@
+# tests/test_shared_graph.py
+import os
+from array import array
+
+import pytest
+
+from sdos.graphindex import neighbors_by_weight
+from sdos.pathfinding import (
+    bidirectional_bfs_with_tracks,
+    ranked_bfs_with_tracks,
+    direction_optimizing_bfs_with_tracks,
+    all_shortest_paths_bfs,
+)
+from sdos.shared_graph import (
+    SharedGraph,
+    write_shared_graph,
+    open_or_create_shared,
+    shared_graph_build_id,
+    SHARED_GRAPH_FILE,
+)
+
+# 1 - 2 - 4 - 5 and 1 - 3 - 4: two routes 1 -> 5, artist 6 alone with 7
+GRAPH = {
+    1: [(2, "a"), (3, "b")],
+    2: [(1, "a"), (4, "c")],
+    3: [(1, "b"), (4, "d")],
+    4: [(2, "c"), (3, "d"), (5, "é")],
+    5: [(4, "é")],
+    6: [(7, "x")],
+    7: [(6, "x")],
+}
+WEIGHTS = {n: array('I', [len(GRAPH[m]) for m, _ in row]) for n, row in GRAPH.items()}
+
+
+@pytest.fixture
+def shared(tmp_path):
+    path = str(tmp_path / SHARED_GRAPH_FILE)
+    write_shared_graph(path, GRAPH, WEIGHTS, build_id="build-1")
+    graph = SharedGraph(path)
+    yield graph
+    graph.close()
+
+
+def test_rows_hold_track_indices(shared):
+    assert shared.build_id == "build-1"
+    assert len(shared) == len(GRAPH) and sorted(shared) == sorted(GRAPH)
+    for artist_id, row in GRAPH.items():
+        assert shared.degree(artist_id) == len(row)
+        assert [(n, shared.track_name(t)) for n, t in shared.get(artist_id)] == row
+    assert shared.get(99) is None and shared.degree(99) == 0
+
+
+@pytest.mark.parametrize("search", [bidirectional_bfs_with_tracks, direction_optimizing_bfs_with_tracks])
+def test_paths_come_back_with_track_names(shared, search):
+    assert search(shared, 1, 5) == search(GRAPH, 1, 5)
+    assert search(shared, 1, 6) is None
+
+
+def test_ranked_and_all_routes_match_the_dict_graph(shared):
+    assert ranked_bfs_with_tracks(shared, 1, 5, weights=shared.weights) == \
+        ranked_bfs_with_tracks(GRAPH, 1, 5, weights=WEIGHTS)
+    assert ranked_bfs_with_tracks(shared, 1, 5) == ranked_bfs_with_tracks(GRAPH, 1, 5)
+    assert list(all_shortest_paths_bfs(shared, 1, 5).routes()) == list(all_shortest_paths_bfs(GRAPH, 1, 5).routes())
+
+
+def test_neighbors_listing_has_track_names(shared):
+    assert neighbors_by_weight(shared, shared.weights, 4) == neighbors_by_weight(GRAPH, WEIGHTS, 4)
+
+
+def test_shared_files_follow_the_graph_build(tmp_path):
+    directory = str(tmp_path / "shared")
+    graphs = {"build-1": GRAPH, "build-2": {8: [(9, "y")], 9: [(8, "y")]}}
+    current = ["build-1"]
+    loads = []
+
+    def load_graph():
+        loads.append(current[0])
+        return graphs[current[0]], current[0]
+
+    def open_shared():
+        graph, names = open_or_create_shared(directory, load_graph, lambda: {8: ("Eight", None)},
+                                             build_id=current[0])
+        build_id = graph.build_id
+        graph.close()
+        names.close()
+        return build_id
+
+    assert open_shared() == "build-1"
+    assert open_shared() == "build-1" and loads == ["build-1"]
+    current[0] = "build-2"
+    assert open_shared() == "build-2" and loads == ["build-1", "build-2"]
+    assert shared_graph_build_id(os.path.join(directory, SHARED_GRAPH_FILE)) == "build-2"
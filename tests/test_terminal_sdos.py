@@ -0,0 +1,97 @@
+# tests/test_terminal_sdos.py
+import json
+
+import pytest
+
+import terminal_sdos
+from sdos.pathfinding import SearchLimits
+
+ARTISTS = {1: ("Daft Punk", "056e4f3e-d505-4dad-8ec1-d04f521cbb56"), 2: ("Pharrell Williams", None),
+           3: ("Earth, Wind & Fire", None), 4: ("Nile Rodgers", None), 9: ("Not In Graph", None)}
+
+
+class StubEngine:
+    """The parts of Engine the CLI uses, over a fixed path 1 - 4 - 2 / 3 - 4."""
+
+    def __init__(self):
+        self.limits = []
+
+    def search(self, name, limit=10):
+        return [{"id": i, "name": n, "gid": g, "in_graph": i != 9, "degree": 1, "release_count": 1}
+                for i, (n, g) in ARTISTS.items() if name.lower() in n.lower()][:limit]
+
+    def resolve_artist(self, artist_id):
+        return ARTISTS.get(artist_id, (f"<id:{artist_id}>", None))
+
+    def missing(self, *artist_ids):
+        return [a for a in artist_ids if a == 9 or a not in ARTISTS]
+
+    def path(self, source_id, target_id, limits=None):
+        self.limits.append(limits)
+        if limits is not None and limits.deadline is not None:
+            return {"found": False, "seconds": 0.0, "gave_up": "timeout"}
+        return {"found": True, "seconds": 0.001, "degrees": 2, "path": [(4, "Get Lucky"), (target_id, "Le Freak")]}
+
+
+@pytest.mark.parametrize("line, pair", [
+    ("Daft Punk, Pharrell Williams", ("Daft Punk", "Pharrell Williams")),
+    ('"Earth, Wind & Fire",id:1234', ("Earth, Wind & Fire", "id:1234")),
+    ('  "Earth, Wind & Fire" ,  "Nile Rodgers"  ', ("Earth, Wind & Fire", "Nile Rodgers")),
+    ("", None), ("# comment, line", None), ("only one", None), ("a, b, c", None), ("a, ", None),
+])
+def test_parse_pair(line, pair):
+    assert terminal_sdos.parse_pair(line) == pair
+
+
+def test_answer_resolves_names_and_ids():
+    record = terminal_sdos.answer(StubEngine(), "earth, wind", "id:2")
+    assert record["source"] == {"id": 3, "name": "Earth, Wind & Fire", "mbid": None}
+    assert record["target"] == {"id": 2, "name": "Pharrell Williams", "mbid": None}
+    assert record["found"] and record["degrees"] == 2
+    assert record["path"] == [{"id": 4, "name": "Nile Rodgers", "mbid": None, "track": "Get Lucky"},
+                              {"id": 2, "name": "Pharrell Williams", "mbid": None, "track": "Le Freak"}]
+
+
+def test_answer_reports_unknown_and_missing_artists():
+    engine = StubEngine()
+    assert terminal_sdos.answer(engine, "nobody at all", "Daft Punk")["error"] == "artist 'nobody at all' not found"
+    assert terminal_sdos.answer(engine, "Daft Punk", "id:9")["error"] == "not in the collaboration graph: Not In Graph"
+    assert engine.limits == []
+
+
+def test_timeout_gives_up(capsys):
+    engine = StubEngine()
+    terminal_sdos.run_queries(engine, ["Daft Punk, Pharrell Williams\n"], jsonl=True, timeout=0.5)
+    record = json.loads(capsys.readouterr().out)
+    assert isinstance(engine.limits[0], SearchLimits) and engine.limits[0].deadline is not None
+    assert record["found"] is False and record["gave_up"] == "timeout" and "path" not in record
+
+
+def test_jsonl_records_one_per_pair(capsys):
+    lines = ["Daft Punk, Pharrell Williams\n", "not a pair\n", "# skipped\n", "\n", "Daft Punk, nobody at all\n"]
+    terminal_sdos.run_queries(StubEngine(), lines, jsonl=True)
+    out, err = capsys.readouterr()
+    records = [json.loads(line) for line in out.splitlines()]
+    assert len(records) == 2
+    found, failed = records
+    assert set(found) == {"source_query", "target_query", "resolve_seconds", "source", "target", "found", "degrees",
+                          "path", "cached", "path_seconds", "total_seconds"}
+    assert found["source"]["mbid"] == ARTISTS[1][1] and found["cached"] is False
+    assert failed == {"source_query": "Daft Punk", "target_query": "nobody at all",
+                      "resolve_seconds": failed["resolve_seconds"], "source": found["source"],
+                      "error": "artist 'nobody at all' not found"}
+    assert "Expected two artists separated by a comma: not a pair" in err
+
+
+def test_text_output_and_engine_errors(capsys):
+    class FailingEngine(StubEngine):
+        def path(self, source_id, target_id, limits=None):
+            raise RuntimeError("boom")
+
+    terminal_sdos.run_queries(StubEngine(), ["Daft Punk, Pharrell Williams"])
+    out, err = capsys.readouterr()
+    assert "[1] ✅ Daft Punk → Pharrell Williams: 2 degrees" in out and "via: 'Get Lucky'" in out
+    assert "Answered 1/1 pairs" in err
+    terminal_sdos.run_queries(FailingEngine(), ["Daft Punk, Pharrell Williams"])
+    out, err = capsys.readouterr()
+    assert "[1] ❌ Daft Punk / Pharrell Williams: RuntimeError: boom" in out and "Answered 0/1 pairs" in err